@@ -5,23 +5,107 @@ from .sub_agents.intent_parser.agent import intent_parser_agent
 from .sub_agents.compound_searcher.agent import compound_searcher_agent
 from .sub_agents.plant_mapper.agent import plant_mapper_agent
 from .sub_agents.recommender.agent import recommender_agent
+from .sub_agents.aroma_fast_path.agent import AromaPathRouterAgent, aroma_fast_path_agent
 from .sub_agents.music.agent import music_agent
-from .sub_agents.mental_support.agent import mental_support_agent
+from .sub_agents.mental_support.agent import mental_support_agent, sentence_tts_mental_support_agent
+from .tools.music_jobs import resume_music_jobs
+from .utils.audio_post import AudioPostAgent
+from .utils.clients import agent_models, prewarm_clients, share_agent_models
+from .utils.config import AUDIO_POSTPROCESS, DELIVERY_MODE, MENTAL_SUPPORT_TTS_MODE, METRICS_ENABLED, METRICS_PORT, PIPELINE_MODE, PREWARM_CLIENTS
+from .utils.dag_agent import DagAgent
+from .utils.deadline import install_deadlines
+from .utils.hedging import hedge_agent_tree
+from .utils.intent_cache import IntentCacheAgent
+from .utils.metrics import instrument_agent_tree, start_metrics_server
+from .utils.progressive import ProgressiveDeliveryAgent
+from .utils.rate_limiter import govern_agent_tree
 #from Aroma_Agents.tools.tts_tool import generate_audio_tts
 
-from google.adk.agents import SequentialAgent
+if MENTAL_SUPPORT_TTS_MODE == "sentence":
+    # Speaks the monologue sentence by sentence while it is still being written.
+    mental_support_agent = sentence_tts_mental_support_agent
+
+# compound -> plant -> recommendation, skipped when the intent cache already has the result
+aroma_chain_agent = IntentCacheAgent(
+    name="aroma_chain_agent",
+    description="Finds aroma compounds, maps them to plants and writes a recommendation, cached per intent.",
+    sub_agents=[
+        SequentialAgent(
+            name="aroma_chain",
+            sub_agents=[compound_searcher_agent, plant_mapper_agent, recommender_agent],
+        )
+    ],
+)
+
+# the same three results from one fused LLM call, cached separately
+aroma_fast_path_cache_agent = IntentCacheAgent(
+    name="aroma_fast_path_cache_agent",
+    namespace="fast_path",
+    sub_agents=[aroma_fast_path_agent],
+)
+
+# chooses the chain or the fast path per request (`aroma_fast_path` state key / AROMA_PATH_MODE)
+aroma_router_agent = AromaPathRouterAgent(
+    name="aroma_router_agent",
+    description="Routes each request to the three-stage aroma chain or the fused fast path.",
+    sub_agents=[aroma_chain_agent, aroma_fast_path_cache_agent],
+)
+
 # Define pipeline
-aroma_agent = SequentialAgent(
+pipeline_sub_agents = [
+    intent_parser_agent,
+    aroma_router_agent,
+    mental_support_agent, # Using the agent with the new native TTS service
+    music_agent,
+]
+
+if AUDIO_POSTPROCESS:
+    # Normalized delivery audio and the voice-over-music mix, once both are written.
+    pipeline_sub_agents.append(
+        AudioPostAgent(
+            name="audio_post_agent",
+            description="Trims, normalizes and resamples the comfort audio and mixes it over the song.",
+        )
+    )
+
+# "dag" lets mental_support/music (which only read {intent[...]}) run alongside the aroma chain.
+pipeline_cls = DagAgent if PIPELINE_MODE == "dag" else SequentialAgent
+
+aroma_agent = pipeline_cls(
     name="Aroma_Agents",
     description="An emotional support agent pipeline combining aroma, music, and text-based care.",
-    sub_agents=[
-        intent_parser_agent,
-        compound_searcher_agent,
-        plant_mapper_agent,
-        recommender_agent,
-        mental_support_agent, # Using the agent with the new native TTS service
-        music_agent,
-    ],
+    sub_agents=pipeline_sub_agents,
 )
 
-root_agent = aroma_agent
\ No newline at end of file
+if DELIVERY_MODE == "progressive":
+    # Stage results go out as they are ready; a background song follows in its own event.
+    root_agent = ProgressiveDeliveryAgent(
+        name="aroma_delivery",
+        description="Delivers each stage's result as soon as it is ready, and the song when it is done.",
+        sub_agents=[aroma_agent],
+    )
+else:
+    root_agent = aroma_agent
+
+# Agents on the same model share one model object, and with it one client and connection pool.
+share_agent_models(root_agent)
+
+# Every LLM call waits for its model's shared rate limiter; 429s back off instead of failing.
+govern_agent_tree(root_agent)
+
+# Slow calls of the agents in AROMA_HEDGE_AGENTS are sent twice; the first answer wins.
+hedge_agent_tree(root_agent)
+
+# Each run gets AROMA_REQUEST_BUDGET seconds; stages that no longer fit are skipped or deferred.
+install_deadlines(root_agent)
+
+if METRICS_ENABLED:
+    instrument_agent_tree(root_agent)
+    if METRICS_PORT:
+        start_metrics_server(METRICS_PORT)
+
+# Finish the songs a previous process submitted to Suno but did not get to download.
+resume_music_jobs()
+
+if PREWARM_CLIENTS:
+    prewarm_clients(agent_models(root_agent))
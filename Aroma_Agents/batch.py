@@ -0,0 +1,221 @@
+# Aroma_Agents/batch.py
+
+"""
+Runs the pipeline over a JSONL file of user inputs.
+
+    python -m Aroma_Agents.batch inputs.jsonl results.jsonl --max-in-flight 16
+
+Each input line is {"user_input": "...", "id": optional} or a bare JSON string. Results are
+appended to the output JSONL as soon as each session finishes, and `<output>.checkpoint`
+records how far the input has been fully processed, so rerunning the same command after a
+crash continues where it stopped. Input is streamed and at most `2 * max_in_flight` lines are
+held in memory, whatever the size of the file.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from pathlib import Path
+from typing import Iterator, Optional, Set, Tuple
+
+from google.adk.runners import InMemoryRunner
+from google.genai import types
+
+from Aroma_Agents.utils.config import BATCH_MAX_IN_FLIGHT
+from Aroma_Agents.utils.metrics import forget_invocations
+
+APP_NAME = "aroma_batch"
+# State keys copied into every result line.
+RESULT_KEYS = {
+    "intent": "intent",
+    "recommendation": "recommendation_result",
+    "plants": "matching_plants_or_products",
+    "mental": "mental",
+    "mental_audio": "mental_audio",
+    "mental_audio_delivery": "mental_audio_delivery",
+    "music_files": "music_files",
+    "mixed_audio": "mixed_audio",
+    "skipped_stages": "skipped_stages",
+}
+
+
+def read_inputs(path: Path, start_line: int = 0) -> Iterator[Tuple[int, Optional[dict]]]:
+    """Yields (line number, record) lazily from `start_line` on; blank lines yield a None record."""
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f):
+            if line_no < start_line:
+                continue
+            if not line.strip():
+                yield line_no, None
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                record = {"_error": f"invalid JSON: {e}"}
+            if isinstance(record, str):
+                record = {"user_input": record}
+            elif not isinstance(record, dict):
+                record = {"_error": "expected an object"}
+            yield line_no, record
+
+
+class BatchCheckpoint:
+    """
+    Tracks the low watermark of the input: every line below `next_line` has a result.
+
+    Sessions finish out of order, so after a restart the lines above the watermark that had
+    already completed (at most `2 * max_in_flight` of them) are recovered from the output file.
+    """
+
+    def __init__(self, path: Path, input_path: Path):
+        self.path = path
+        self.input_path = str(input_path)
+        self.next_line = 0
+        self.done_ahead: Set[int] = set()
+        self._last_save = 0.0
+
+    def load(self, output_path: Path):
+        if self.path.exists():
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            if data.get("input") == self.input_path:
+                self.next_line = data.get("next_line", 0)
+        if output_path.exists():
+            with open(output_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        line_no = json.loads(line).get("line", -1)
+                    except ValueError:
+                        continue  # torn last line from a crash
+                    if line_no >= self.next_line:
+                        self.done_ahead.add(line_no)
+
+    def is_done(self, line_no: int) -> bool:
+        return line_no < self.next_line or line_no in self.done_ahead
+
+    def advance(self, pending: Set[int], read_next: int):
+        """Moves the watermark to the oldest line still in flight (or past everything read so far)."""
+        self.next_line = max(self.next_line, min(pending) if pending else read_next)
+        self.done_ahead = {line_no for line_no in self.done_ahead if line_no >= self.next_line}
+
+    def save(self, force: bool = False):
+        now = time.monotonic()
+        if not force and now - self._last_save < 1.0:
+            return
+        self._last_save = now
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps({"input": self.input_path, "next_line": self.next_line}), encoding="utf-8")
+        os.replace(tmp_path, self.path)
+
+
+async def run_batch(
+    input_path: str,
+    output_path: str,
+    max_in_flight: int = BATCH_MAX_IN_FLIGHT,
+    timeout: Optional[float] = None,
+    agent=None,
+) -> dict:
+    """Processes every input line not yet recorded and returns {"processed", "failed", "skipped"}."""
+    if agent is None:
+        from Aroma_Agents.agent import root_agent as agent
+
+    input_path, output_path = Path(input_path), Path(output_path)
+    checkpoint = BatchCheckpoint(output_path.with_name(output_path.name + ".checkpoint"), input_path.resolve())
+    checkpoint.load(output_path)
+    runner = InMemoryRunner(agent=agent, app_name=APP_NAME)
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max_in_flight * 2)
+    pending: Set[int] = set()
+    read_next = checkpoint.next_line
+    counts = {"processed": 0, "failed": 0, "skipped": 0}
+    output = open(output_path, "a", encoding="utf-8")
+
+    async def run_one(line_no: int, record: dict) -> dict:
+        result = {"line": line_no, "id": record.get("id"), "user_input": record.get("user_input")}
+        if "_error" in record or not record.get("user_input"):
+            result["error"] = record.get("_error", "missing user_input")
+            return result
+        user_id = str(record.get("id") or f"line-{line_no}")
+        session = await runner.session_service.create_session(
+            app_name=APP_NAME, user_id=user_id, state={"user_input": record["user_input"]}
+        )
+        message = types.Content(role="user", parts=[types.Part(text=record["user_input"])])
+        started = time.perf_counter()
+        try:
+            async def consume():
+                async for _ in runner.run_async(user_id=user_id, session_id=session.id, new_message=message):
+                    pass
+            await asyncio.wait_for(consume(), timeout)
+        except Exception as e:
+            result["error"] = repr(e)
+        result["seconds"] = round(time.perf_counter() - started, 3)
+        final = await runner.session_service.get_session(app_name=APP_NAME, user_id=user_id, session_id=session.id)
+        for field, key in RESULT_KEYS.items():
+            result[field] = final.state.get(key) if final else None
+        if final is not None:
+            # A run that timed out never reached the root's after-callback, which clears its timings.
+            forget_invocations(event.invocation_id for event in final.events)
+        # Sessions are not needed after the result is written; keep memory flat.
+        await runner.session_service.delete_session(app_name=APP_NAME, user_id=user_id, session_id=session.id)
+        return result
+
+    async def worker():
+        while True:
+            item = await queue.get()
+            if item is None:
+                queue.task_done()
+                return
+            line_no, record = item
+            try:
+                result = await run_one(line_no, record)
+            except Exception as e:
+                # One bad line must not take the worker (and the whole batch) down with it.
+                result = {"line": line_no, "id": record.get("id") if isinstance(record, dict) else None, "error": repr(e)}
+            output.write(json.dumps(result, ensure_ascii=False, default=str) + "\n")
+            output.flush()
+            pending.discard(line_no)
+            checkpoint.advance(pending, read_next)
+            checkpoint.save()
+            counts["failed" if result.get("error") else "processed"] += 1
+            if (counts["processed"] + counts["failed"]) % 100 == 0:
+                print(f"📦 Batch progress: {counts['processed']} ok, {counts['failed']} failed")
+            queue.task_done()
+
+    workers = [asyncio.create_task(worker()) for _ in range(max_in_flight)]
+    try:
+        for line_no, record in read_inputs(input_path, checkpoint.next_line):
+            read_next = line_no + 1
+            if record is None:
+                continue
+            if checkpoint.is_done(line_no):
+                counts["skipped"] += 1
+                continue
+            pending.add(line_no)
+            await queue.put((line_no, record))  # blocks while the workers are saturated
+        for _ in workers:
+            await queue.put(None)
+        await asyncio.gather(*workers)
+        checkpoint.advance(pending, read_next)
+    finally:
+        for task in workers:
+            task.cancel()
+        output.close()
+        checkpoint.save(force=True)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the Aroma_Agents pipeline over a JSONL file of user inputs.")
+    parser.add_argument("input", help='JSONL file: {"user_input": "...", "id": "..."} per line')
+    parser.add_argument("output", help="JSONL file the results are appended to")
+    parser.add_argument("--max-in-flight", type=int, default=BATCH_MAX_IN_FLIGHT)
+    parser.add_argument("--timeout", type=float, default=None, help="per-session timeout in seconds")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    counts = asyncio.run(run_batch(args.input, args.output, args.max_in_flight, args.timeout))
+    print(f"✅ Batch finished in {time.perf_counter() - started:.1f}s: {counts}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+# Aroma_Agents/serve.py
+
+"""
+Serves the pipeline over HTTP to many concurrent clients.
+
+    python -m Aroma_Agents.serve --port 8080
+
+`POST /run` with {"user_input": "...", "user_id": optional, "budget_s": optional} streams NDJSON: one
+{"stage", "text", "elapsed_s"} line per stage result as soon as the pipeline delivers it (see
+utils/progressive.py), then {"done": true, "results": {...}} with the same fields as a batch
+result line, or {"error": "..."}. When the admission queue is full the request is answered
+right away with a 503 and a Retry-After header (see utils/admission.py). `GET /healthz`
+reports the running and queued requests.
+
+`GET /files/<path>` serves the audio and music files named in the results (e.g.
+/files/audio_outputs/ab/<key>/x.wav) with byte ranges and content-hash ETags, without reading
+them into memory (see utils/file_serving.py).
+
+A client that disconnects cancels its run end to end: the agents, the TTS stream and the
+music job it started (unless another request waits for the same song).
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from contextlib import aclosing
+from typing import Any, AsyncIterator, Dict, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from google.adk.runners import InMemoryRunner
+from google.genai import types
+
+from Aroma_Agents.batch import RESULT_KEYS
+from Aroma_Agents.tools.music_tool import MUSIC_OUTPUT_DIR
+from Aroma_Agents.tools.tts_tool import AUDIO_OUTPUT_DIR
+from Aroma_Agents.utils.admission import (
+    DISCONNECT_POLL_SECONDS,
+    AdmissionController,
+    Overloaded,
+    StageLimits,
+    install_stage_limits,
+)
+from Aroma_Agents.utils.config import (
+    SERVE_HOST,
+    SERVE_MAX_CONCURRENT,
+    SERVE_MAX_QUEUE,
+    SERVE_PORT,
+    SERVE_QUEUE_TIMEOUT,
+    SERVE_STAGE_LIMITS,
+)
+from Aroma_Agents.utils.file_serving import FileRangeResponse, resolve_file
+from Aroma_Agents.utils.metrics import forget_invocations, registry as metrics
+
+APP_NAME = "aroma_serve"
+
+metrics.describe("aroma_requests_cancelled_total", "Admitted requests cancelled because the client disconnected.")
+
+
+def _line(record: Dict[str, Any]) -> bytes:
+    return (json.dumps(record, ensure_ascii=False, default=str) + "\n").encode("utf-8")
+
+
+async def _run_pipeline(runner: InMemoryRunner, user_id: str, state: Dict[str, Any], lines: asyncio.Queue, stage_limits: StageLimits):
+    """Runs one request in its own session and puts its NDJSON records on `lines`."""
+    user_input = state["user_input"]
+    session = await runner.session_service.create_session(app_name=APP_NAME, user_id=user_id, state=state)
+    message = types.Content(role="user", parts=[types.Part(text=user_input)])
+    try:
+        async with aclosing(runner.run_async(user_id=user_id, session_id=session.id, new_message=message)) as events:
+            async for event in events:
+                metadata = event.custom_metadata or {}
+                if "aroma_stage" in metadata:
+                    lines.put_nowait({"stage": metadata["aroma_stage"], "text": metadata.get("text"), "elapsed_s": metadata.get("elapsed_s")})
+        final = await runner.session_service.get_session(app_name=APP_NAME, user_id=user_id, session_id=session.id)
+        lines.put_nowait({"done": True, "results": {field: final.state.get(key) if final else None for field, key in RESULT_KEYS.items()}})
+    except Exception as e:
+        lines.put_nowait({"error": repr(e)})
+    finally:
+        stage_limits.release_session(session.id)
+        # A cancelled run never reaches the root's after-callback, which clears its timings.
+        ended = await runner.session_service.get_session(app_name=APP_NAME, user_id=user_id, session_id=session.id)
+        if ended is not None:
+            forget_invocations(event.invocation_id for event in ended.events)
+        await runner.session_service.delete_session(app_name=APP_NAME, user_id=user_id, session_id=session.id)
+
+
+async def _supervise(run: asyncio.Task, request: Request, lines: asyncio.Queue, admission: AdmissionController, started: float):
+    """Cancels `run` when the client goes away and frees the admission slot when it ends."""
+    try:
+        while not run.done():
+            await asyncio.wait({run}, timeout=DISCONNECT_POLL_SECONDS)
+            if not run.done() and await request.is_disconnected():
+                print("🔌 Client disconnected; cancelling its run.")
+                metrics.increment("aroma_requests_cancelled_total")
+                run.cancel()
+                break
+        await asyncio.gather(run, return_exceptions=True)
+    finally:
+        if not run.done():
+            run.cancel()
+        admission.release(time.perf_counter() - started)
+        lines.put_nowait(None)
+
+
+async def _stream(lines: asyncio.Queue, supervisor: asyncio.Task) -> AsyncIterator[bytes]:
+    try:
+        while True:
+            record = await lines.get()
+            if record is None:
+                return
+            yield _line(record)
+    finally:
+        # The response was abandoned (e.g. the client disconnected mid-write).
+        if not supervisor.done():
+            supervisor.cancel()
+
+
+def create_app(
+    agent=None,
+    admission: Optional[AdmissionController] = None,
+    stage_limits: Optional[StageLimits] = None,
+) -> FastAPI:
+    """Builds the FastAPI app around `agent` (the root agent by default)."""
+    if agent is None:
+        from Aroma_Agents.agent import root_agent as agent
+
+    admission = admission or AdmissionController(SERVE_MAX_CONCURRENT, SERVE_MAX_QUEUE, SERVE_QUEUE_TIMEOUT)
+    stage_limits = stage_limits or StageLimits(SERVE_STAGE_LIMITS)
+    install_stage_limits(agent, stage_limits)
+    runner = InMemoryRunner(agent=agent, app_name=APP_NAME)
+    app = FastAPI(title="Aroma_Agents")
+    # Keeps the supervisors referenced while they run.
+    supervisors: set = set()
+
+    @app.post("/run")
+    async def run(request: Request):
+        try:
+            body = await request.json()
+        except ValueError:
+            return JSONResponse({"error": "invalid JSON"}, status_code=400)
+        user_input = body.get("user_input") if isinstance(body, dict) else None
+        if not isinstance(user_input, str) or not user_input.strip():
+            return JSONResponse({"error": "missing user_input"}, status_code=400)
+
+        try:
+            admitted = await admission.admit(request.is_disconnected)
+        except Overloaded as e:
+            return JSONResponse({"error": str(e)}, status_code=503, headers={"Retry-After": str(e.retry_after)})
+        if not admitted:
+            return JSONResponse({"error": "client disconnected"}, status_code=499)
+
+        started = time.perf_counter()
+        state = {"user_input": user_input}
+        if isinstance(body.get("budget_s"), (int, float)):
+            state["aroma_budget_s"] = body["budget_s"]  # see utils/deadline.py
+        lines: asyncio.Queue = asyncio.Queue()
+        # The run starts right away, so the slot is released even if the response is never read.
+        pipeline = asyncio.create_task(_run_pipeline(runner, str(body.get("user_id") or "anonymous"), state, lines, stage_limits))
+        supervisor = asyncio.create_task(_supervise(pipeline, request, lines, admission, started))
+        supervisors.add(supervisor)
+        supervisor.add_done_callback(supervisors.discard)
+        return StreamingResponse(_stream(lines, supervisor), media_type="application/x-ndjson")
+
+    @app.api_route("/files/{path:path}", methods=["GET", "HEAD"])
+    async def files(path: str):
+        # Only files inside the output stores; the path is the one given in the results.
+        resolved = await asyncio.to_thread(resolve_file, path, (AUDIO_OUTPUT_DIR, MUSIC_OUTPUT_DIR))
+        if resolved is None:
+            return JSONResponse({"error": "not found"}, status_code=404)
+        return FileRangeResponse(resolved)
+
+    @app.get("/healthz")
+    async def healthz():
+        return {"status": "ok", **admission.stats()}
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the Aroma_Agents pipeline over HTTP.")
+    parser.add_argument("--host", default=SERVE_HOST)
+    parser.add_argument("--port", type=int, default=SERVE_PORT)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    uvicorn.run(create_app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
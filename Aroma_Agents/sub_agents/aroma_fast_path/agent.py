@@ -0,0 +1,117 @@
+# agent.py
+
+from contextlib import aclosing
+from pydantic import BaseModel
+from typing import AsyncGenerator, List
+from google.adk.agents import BaseAgent, LlmAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.genai import types
+from .prompt import AROMA_FAST_PATH_PROMPT
+from Aroma_Agents.sub_agents.compound_searcher.agent import CompoundSearcherOutput
+from Aroma_Agents.sub_agents.plant_mapper.agent import PlantInfo, PlantMapperOutput
+from Aroma_Agents.sub_agents.recommender.agent import RecommenderOutput
+from Aroma_Agents.utils.config import AROMA_FAST_PATH_MODEL, AROMA_PATH_MODE
+from Aroma_Agents.utils.state_render import compact_instruction
+from Aroma_Agents.utils.intent_cache import AROMA_RESULT_KEYS
+
+
+# Output schema: compound_searcher + plant_mapper + recommender in one response
+class AromaFastPathOutput(BaseModel):
+    compound_candidates: List[str]
+    matching_plants_or_products: List[PlantInfo]
+    recommendation_result: RecommenderOutput
+
+
+class AromaFastPathAgent(BaseAgent):
+    """
+    Runs compound search, plant mapping and the recommendation as one structured LLM call
+    (its sub-agent) and splits the answer into the same three state keys, in the same shape,
+    as the three-stage chain writes them.
+    """
+
+    input_keys: List[str] = ["intent"]
+    output_keys: List[str] = AROMA_RESULT_KEYS
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        fused = self.sub_agents[0]
+        # Taken from this run's state_delta: state may still hold an earlier turn's result.
+        result = None
+        async with aclosing(fused.run_async(ctx)) as events:
+            async for event in events:
+                if not event.partial and event.actions.state_delta.get(fused.output_key) is not None:
+                    result = event.actions.state_delta[fused.output_key]
+                yield event
+
+        if not isinstance(result, dict):
+            print("⚠️ Fast path returned no structured result.")
+            return
+        output = AromaFastPathOutput.model_validate(result)
+        recommendation = output.recommendation_result.model_dump(exclude_none=True)
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            content=types.Content(role="model", parts=[types.Part(text=output.recommendation_result.model_dump_json(exclude_none=True))]),
+            actions=EventActions(state_delta={
+                "compound_candidates": CompoundSearcherOutput(
+                    compound_candidates=output.compound_candidates
+                ).model_dump(exclude_none=True),
+                "matching_plants_or_products": PlantMapperOutput(
+                    matching_plants_or_products=output.matching_plants_or_products
+                ).model_dump(exclude_none=True),
+                "recommendation_result": recommendation,
+            }),
+        )
+
+
+class AromaPathRouterAgent(BaseAgent):
+    """
+    Picks the three-stage chain (first sub-agent) or the fused fast path (second sub-agent)
+    for each request.
+
+    Set the session state key `aroma_fast_path` to true/false to choose per request, otherwise
+    `default_path` (AROMA_PATH_MODE) applies. The path taken is recorded in `aroma_path`, so
+    latency and quality of both can be compared side by side.
+    """
+
+    input_keys: List[str] = ["intent"]
+    output_keys: List[str] = AROMA_RESULT_KEYS + ["aroma_path"]
+    default_path: str = AROMA_PATH_MODE
+
+    def select_path(self, state) -> str:
+        requested = state.get("aroma_fast_path")
+        if isinstance(requested, str):
+            requested = requested.strip().lower() in ("1", "true", "yes", "fast_path")
+        if requested is None:
+            return "fast_path" if self.default_path == "fast_path" else "chain"
+        return "fast_path" if requested else "chain"
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        path = self.select_path(ctx.session.state)
+        agent = self.sub_agents[1] if path == "fast_path" else self.sub_agents[0]
+        print(f"🛤️ Aroma path: {path}")
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            actions=EventActions(state_delta={"aroma_path": path}),
+        )
+        async with aclosing(agent.run_async(ctx)) as events:
+            async for event in events:
+                yield event
+
+
+aroma_fast_path_agent = AromaFastPathAgent(
+    name="aroma_fast_path_agent",
+    description="Finds compounds, maps them to plants and writes a recommendation in a single LLM call.",
+    sub_agents=[
+        LlmAgent(
+            name="aroma_fast_path_llm",
+            model=AROMA_FAST_PATH_MODEL,
+            instruction=compact_instruction(AROMA_FAST_PATH_PROMPT),
+            output_schema=AromaFastPathOutput,
+            output_key="aroma_fast_path_result",
+        )
+    ],
+)
@@ -3,6 +3,7 @@ from typing import Optional
 from google.adk.agents import LlmAgent
 from Aroma_Agents.sub_agents.compound_searcher.prompt import COMPOUND_PROMPT
 from Aroma_Agents.utils.config import COMPOUND_SEARCHER_MODEL
+from Aroma_Agents.utils.state_render import compact_instruction
 
 
 # 输入模式：接收来自 intent_parser 的情绪、偏好等
@@ -22,7 +23,7 @@ class CompoundSearcherOutput(BaseModel):
 compound_searcher_agent = LlmAgent(
     name="compound_searcher_agent",
     model=COMPOUND_SEARCHER_MODEL,
-    instruction=COMPOUND_PROMPT,
+    instruction=compact_instruction(COMPOUND_PROMPT),
     input_schema=CompoundSearchInput,
     output_schema=CompoundSearcherOutput,
     output_key="compound_candidates",  # 与 output_schema 对应
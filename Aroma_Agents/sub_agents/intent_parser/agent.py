@@ -1,8 +1,15 @@
 from pydantic import BaseModel
-from typing import Optional
-from google.adk.agents import LlmAgent
+from typing import AsyncGenerator, List, Optional
+from contextlib import aclosing
+from google.adk.agents import BaseAgent, LlmAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.genai import types
+from .lexicon import classify_intent
 from .prompt import INTENT_PROMPT
-from Aroma_Agents.utils.config import INTENT_PARSER_MODEL
+from Aroma_Agents.utils.config import INTENT_PARSER_MODE, INTENT_PARSER_MODEL, INTENT_RULES_MIN_CONFIDENCE
+from Aroma_Agents.utils.metrics import registry as metrics
+from Aroma_Agents.utils.state_render import compact_instruction
 
 class IntentInput(BaseModel):
     user_input: str
@@ -14,11 +21,73 @@ class IntentOutput(BaseModel):
     preferences: Optional[str] = None
 
 
-intent_parser_agent = LlmAgent(
+llm_intent_parser_agent = LlmAgent(
     name="intent_parser_agent",
     model=INTENT_PARSER_MODEL,
-    instruction=INTENT_PROMPT,  # instruction 现在已包含 {{ user_input }}
+    instruction=compact_instruction(INTENT_PROMPT),  # instruction 现在已包含 {{ user_input }}
     input_schema=IntentInput,
     output_schema=IntentOutput,
     output_key="intent",
 )
+
+
+def _user_text(ctx: InvocationContext) -> str:
+    """The `user_input` state key if set (batch runs), otherwise the text of the user's message."""
+    text = ctx.session.state.get("user_input")
+    if text:
+        return str(text)
+    parts = ctx.user_content.parts if ctx.user_content and ctx.user_content.parts else []
+    return " ".join(part.text for part in parts if part.text)
+
+
+class RuleIntentParserAgent(BaseAgent):
+    """
+    Fills `intent` from the keyword classifier in `lexicon.py` when it is confident enough.
+
+    Ambiguous input (no known mood, negations, contrasts, long messages) goes to the fallback
+    LLM sub-agent, which writes the same `intent` state as the LLM-only intent parser.
+    """
+
+    input_keys: List[str] = ["user_input"]
+    output_keys: List[str] = ["intent"]
+    min_confidence: float = INTENT_RULES_MIN_CONFIDENCE
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        intent, confidence = classify_intent(_user_text(ctx))
+        if intent is not None and confidence >= self.min_confidence:
+            print(f"🧭 Intent from rules (confidence {confidence:.2f}): {intent}")
+            metrics.increment("aroma_intent_parser_total", source="rules")
+            output = IntentOutput(**intent)
+            yield Event(
+                invocation_id=ctx.invocation_id,
+                author=self.name,
+                branch=ctx.branch,
+                content=types.Content(role="model", parts=[types.Part(text=output.model_dump_json(exclude_none=True))]),
+                actions=EventActions(state_delta={"intent": output.model_dump(exclude_none=True)}),
+            )
+            return
+
+        print(f"🔎 Intent unclear to the rules (confidence {confidence:.2f}); asking the LLM")
+        metrics.increment("aroma_intent_parser_total", source="llm")
+        async with aclosing(self.sub_agents[0].run_async(ctx)) as events:
+            async for event in events:
+                yield event
+
+
+rule_intent_parser_agent = RuleIntentParserAgent(
+    name="intent_parser_agent",
+    description="Reads mood, context and preferences with local keyword rules, asking the LLM only for ambiguous input.",
+    sub_agents=[
+        LlmAgent(
+            name="intent_parser_fallback_agent",
+            model=INTENT_PARSER_MODEL,
+            instruction=compact_instruction(INTENT_PROMPT),
+            input_schema=IntentInput,
+            output_schema=IntentOutput,
+            output_key="intent",
+        )
+    ],
+)
+
+# "rules" (default) answers simple input locally with LLM fallback, "llm" always asks the model.
+intent_parser_agent = llm_intent_parser_agent if INTENT_PARSER_MODE == "llm" else rule_intent_parser_agent
@@ -0,0 +1,257 @@
+# sub_agents/intent_parser/lexicon.py
+
+"""
+Keyword classifier that fills `IntentOutput` without a model call for simple inputs such as
+"I'm anxious about exams" or "最近考试压力好大，睡不着".
+
+English cues match on word boundaries, Chinese cues as substrings; overlapping cues keep the
+longest one, so "不开心" is read as sad instead of "not happy". A cue preceded by a negation
+("not anxious", "不焦虑") is ignored and makes the input count as nuanced. `classify_intent`
+returns the intent with a confidence in [0, 1]; below the configured threshold the caller
+asks the LLM instead.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+# canonical mood -> (cue, weight); weight < 1 for words that are often used loosely
+MOOD_CUES: Dict[str, List[Tuple[str, float]]] = {
+    "anxious": [
+        ("anxious", 1.0), ("anxiety", 1.0), ("nervous", 1.0), ("worried", 1.0), ("worrying", 1.0), ("uneasy", 1.0),
+        ("panic", 1.0), ("panicking", 1.0), ("on edge", 1.0), ("jittery", 1.0), ("scared", 0.8), ("afraid", 0.8),
+        ("焦虑", 1.0), ("紧张", 1.0), ("担心", 1.0), ("不安", 1.0), ("心慌", 1.0), ("忐忑", 1.0), ("害怕", 0.8),
+    ],
+    "stressed": [
+        ("stressed", 1.0), ("stressed out", 1.0), ("stress", 0.9), ("stressful", 0.9), ("under pressure", 1.0),
+        ("pressure", 0.7), ("tense", 0.9), ("burned out", 1.0), ("burnt out", 1.0), ("burnout", 1.0),
+        ("压力", 0.9), ("压力大", 1.0), ("压力好大", 1.0), ("焦头烂额", 1.0), ("紧绷", 0.9),
+    ],
+    "tired": [
+        ("tired", 1.0), ("exhausted", 1.0), ("fatigued", 1.0), ("fatigue", 1.0), ("drained", 1.0), ("worn out", 1.0),
+        ("weary", 1.0), ("sleepy", 0.8), ("no energy", 1.0),
+        ("好累", 1.0), ("很累", 1.0), ("太累", 1.0), ("累了", 1.0), ("疲惫", 1.0), ("疲劳", 1.0), ("乏力", 1.0),
+        ("没精神", 1.0), ("没力气", 1.0), ("好困", 0.8), ("犯困", 0.8),
+    ],
+    "sad": [
+        ("sad", 1.0), ("unhappy", 1.0), ("depressed", 1.0), ("heartbroken", 1.0), ("miserable", 1.0), ("upset", 0.9),
+        ("feeling down", 1.0), ("feel down", 1.0), ("down", 0.5), ("low", 0.5), ("blue", 0.5), ("crying", 0.9),
+        ("难过", 1.0), ("伤心", 1.0), ("悲伤", 1.0), ("不开心", 1.0), ("郁闷", 1.0), ("沮丧", 1.0), ("失落", 1.0),
+        ("想哭", 1.0), ("抑郁", 1.0), ("心情不好", 1.0), ("低落", 1.0),
+    ],
+    "lonely": [
+        ("lonely", 1.0), ("loneliness", 1.0), ("isolated", 1.0), ("alone", 0.7),
+        ("孤独", 1.0), ("寂寞", 1.0), ("孤单", 1.0),
+    ],
+    "angry": [
+        ("angry", 1.0), ("furious", 1.0), ("irritated", 1.0), ("annoyed", 1.0), ("frustrated", 1.0), ("mad", 0.6),
+        ("生气", 1.0), ("愤怒", 1.0), ("烦躁", 1.0), ("恼火", 1.0), ("气死", 1.0),
+    ],
+    "overwhelmed": [
+        ("overwhelmed", 1.0), ("overwhelming", 1.0), ("swamped", 1.0), ("can't cope", 1.0), ("cannot cope", 1.0),
+        ("too much", 0.6),
+        ("崩溃", 1.0), ("喘不过气", 1.0), ("应付不过来", 1.0), ("受不了", 0.9),
+    ],
+    "restless": [
+        ("restless", 1.0), ("can't focus", 1.0), ("cannot focus", 1.0), ("can't concentrate", 1.0), ("distracted", 0.8),
+        ("坐立不安", 1.0), ("心烦", 1.0), ("静不下心", 1.0), ("注意力不集中", 1.0),
+    ],
+    "happy": [
+        ("happy", 1.0), ("joyful", 1.0), ("excited", 1.0), ("cheerful", 1.0),
+        ("开心", 1.0), ("高兴", 1.0), ("快乐", 1.0), ("兴奋", 1.0),
+    ],
+}
+
+# context -> (cues, mood it implies when no mood word is present)
+CONTEXT_CUES: Dict[str, Tuple[List[str], Optional[str]]] = {
+    "exams": (
+        ["exam", "exams", "finals", "midterm", "midterms", "test", "tests", "studying", "thesis", "gaokao",
+         "考试", "期末", "考研", "高考", "复习", "论文", "答辩"],
+        "stressed",
+    ),
+    "work": (
+        ["work", "job", "boss", "deadline", "deadlines", "office", "overtime", "meeting", "meetings", "colleague",
+         "colleagues", "career",
+         "工作", "上班", "加班", "老板", "领导", "同事", "项目", "截止", "ddl", "996"],
+        "stressed",
+    ),
+    "insomnia": (
+        ["can't sleep", "cannot sleep", "couldn't sleep", "cant sleep", "insomnia", "trouble sleeping", "sleepless",
+         "awake at night", "poor sleep",
+         "失眠", "睡不着", "睡不好", "半夜醒"],
+        "sleepless",
+    ),
+    "relationship": (
+        ["breakup", "broke up", "boyfriend", "girlfriend", "partner", "husband", "wife", "divorce", "relationship",
+         "分手", "男朋友", "女朋友", "对象", "失恋", "离婚", "感情"],
+        "sad",
+    ),
+    "family": (
+        ["family", "parents", "mom", "dad", "mother", "father", "kids", "children",
+         "家人", "父母", "爸妈", "家里"],
+        None,
+    ),
+    "loneliness": (
+        ["no friends", "by myself", "far from home", "new city",
+         "一个人", "没有朋友", "异乡"],
+        "lonely",
+    ),
+    "health": (
+        ["sick", "illness", "headache", "pain", "hospital",
+         "生病", "头疼", "头痛", "医院", "不舒服"],
+        None,
+    ),
+    "postpartum": (
+        ["postpartum", "new mom", "newborn", "产后", "坐月子", "刚生完"],
+        "overwhelmed",
+    ),
+    "grief": (
+        ["passed away", "died", "funeral", "grief", "grieving",
+         "去世", "离世", "葬礼"],
+        "sad",
+    ),
+    "money": (
+        ["money", "debt", "bills", "rent",
+         "房贷", "欠债", "房租", "没钱"],
+        "stressed",
+    ),
+}
+
+# preference -> cues
+PREFERENCE_CUES: Dict[str, List[str]] = {
+    "tea": ["tea", "herbal tea", "chamomile", "茶", "花茶"],
+    "diffuser": ["diffuser", "essential oil", "essential oils", "aromatherapy", "香薰", "扩香", "精油"],
+    "bath": ["bath", "bathtub", "soak", "泡澡", "泡脚"],
+    "massage": ["massage", "按摩"],
+    "candles": ["candle", "candles", "蜡烛", "香薰蜡烛"],
+    "music": ["music", "song", "songs", "playlist", "音乐", "歌"],
+    "floral scents": ["floral", "flowers", "lavender", "rose", "花香", "薰衣草", "玫瑰"],
+    "citrus scents": ["citrus", "orange", "lemon", "grapefruit", "柑橘", "橙子", "柠檬", "西柚"],
+    "woody scents": ["woody", "pine", "cedar", "sandalwood", "木质", "松木", "檀香"],
+    "mint": ["mint", "peppermint", "薄荷"],
+    "light scents": ["mild", "light scent", "subtle", "not too strong", "淡一点", "清淡"],
+}
+
+# Weight a mood gets from a context that implies it ("can't sleep" -> sleepless).
+IMPLIED_MOOD_WEIGHT = 0.5
+# Inputs longer than this usually carry details the rules would drop.
+LONG_INPUT_CHARS = 240
+LONG_INPUT_CJK_CHARS = 80
+
+_EN_NEGATIONS = {"not", "no", "never", "don't", "dont", "didn't", "isn't", "wasn't", "aren't", "without", "hardly", "barely"}
+_ZH_NEGATIONS = "不没别未无"
+_CONTRAST_RE = re.compile(r"\b(but|however|although|though|yet)\b|但是|可是|不过|虽然")
+_CJK_RE = re.compile(r"[一-鿿]")
+# A negation only reaches cues in its own clause: "not anxious, just tired" is tired.
+_CLAUSE_BREAK_RE = re.compile(r"[,.;:!?，。；：！？、]")
+_EN_WORD_RE = re.compile(r"[a-z']+")
+
+
+@dataclass
+class _Cue:
+    kind: str  # "mood", "context" or "preference"
+    label: str
+    text: str
+    weight: float = 1.0
+    implies: Optional[str] = None
+    pattern: re.Pattern = field(init=False)
+
+    def __post_init__(self):
+        if _CJK_RE.search(self.text):
+            self.pattern = re.compile(re.escape(self.text))
+        else:
+            words = r"\s+".join(re.escape(word) for word in self.text.split())
+            self.pattern = re.compile(rf"(?<![a-z']){words}(?![a-z'])")
+
+
+def _build_cues() -> List[_Cue]:
+    cues = [_Cue("mood", mood, text, weight) for mood, entries in MOOD_CUES.items() for text, weight in entries]
+    cues += [_Cue("context", label, text, implies=implies) for label, (texts, implies) in CONTEXT_CUES.items() for text in texts]
+    cues += [_Cue("preference", label, text) for label, texts in PREFERENCE_CUES.items() for text in texts]
+    return cues
+
+
+_CUES = _build_cues()
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.lower().replace("’", "'").replace("‘", "'").split())
+
+
+def _negated(text: str, start: int, cue: _Cue) -> bool:
+    if _CJK_RE.search(cue.text):
+        window = _CLAUSE_BREAK_RE.split(text[max(0, start - 3):start])[-1]
+        return any(char in _ZH_NEGATIONS for char in window)
+    window = _CLAUSE_BREAK_RE.split(text[max(0, start - 40):start])[-1]
+    preceding = _EN_WORD_RE.findall(window)[-3:]
+    return any(word in _EN_NEGATIONS or word.endswith("n't") for word in preceding)
+
+
+def _match_cues(text: str) -> Tuple[List[Tuple[int, _Cue]], int]:
+    """Non-overlapping cue matches in text order (longest cue wins), and the number of negated ones."""
+    found = [(match.start(), match.end(), cue) for cue in _CUES for match in cue.pattern.finditer(text)]
+    found.sort(key=lambda item: (item[0] - item[1], item[0]))
+    taken: List[Tuple[int, int]] = []
+    matches, negated = [], 0
+    for start, end, cue in found:
+        if any(start < other_end and other_start < end for other_start, other_end in taken):
+            continue
+        taken.append((start, end))
+        if _negated(text, start, cue):
+            negated += 1
+        else:
+            matches.append((start, cue))
+    matches.sort(key=lambda item: item[0])
+    return matches, negated
+
+
+def _ordered_labels(matches: List[Tuple[int, _Cue]], kind: str) -> List[str]:
+    labels: List[str] = []
+    for _, cue in matches:
+        if cue.kind == kind and cue.label not in labels:
+            labels.append(cue.label)
+    return labels
+
+
+def classify_intent(text: str) -> Tuple[Optional[Dict[str, str]], float]:
+    """
+    Returns ({"mood", "context", "preferences"} without empty fields, confidence), or
+    (None, 0.0) when the input names no mood or situation the lexicon knows.
+    """
+    text = _normalize(text or "")
+    matches, negated = _match_cues(text)
+
+    direct: Dict[str, float] = {}
+    for _, cue in matches:
+        if cue.kind == "mood":
+            direct[cue.label] = max(direct.get(cue.label, 0.0), cue.weight)
+    contexts = _ordered_labels(matches, "context")
+    implied = [cue.implies for _, cue in matches if cue.kind == "context" and cue.implies]
+    if not direct and not implied:
+        return None, 0.0
+
+    if direct:
+        ranked = sorted(direct.items(), key=lambda item: -item[1])
+        top = ranked[0][1]
+        # A second strong mood is kept ("anxious, tired"); weak ones are noise.
+        moods = [mood for mood, weight in ranked[:2] if weight >= 0.6 * top]
+        confidence = 0.55 + 0.3 * top - 0.1 * (len(moods) - 1)
+    else:
+        moods = [implied[0]]
+        confidence = 0.55 + 0.3 * IMPLIED_MOOD_WEIGHT
+
+    if contexts:
+        confidence += 0.1
+    confidence -= 0.25 * negated
+    if _CONTRAST_RE.search(text):
+        confidence -= 0.1
+    if len(text) > LONG_INPUT_CHARS or len(_CJK_RE.findall(text)) > LONG_INPUT_CJK_CHARS:
+        confidence -= 0.15
+
+    intent = {"mood": ", ".join(moods)}
+    if contexts:
+        intent["context"] = " and ".join(contexts[:2])
+    preferences = _ordered_labels(matches, "preference")
+    if preferences:
+        intent["preferences"] = ", ".join(preferences)
+    return intent, round(max(0.0, min(1.0, confidence)), 2)
@@ -1,11 +1,24 @@
+import asyncio
+from contextlib import aclosing
+from pathlib import Path
 from pydantic import BaseModel
-from typing import Optional
+from typing import AsyncGenerator, List, Optional
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
 from google.adk.agents.llm_agent import Agent
+from google.adk.agents.run_config import RunConfig, StreamingMode
+from google.adk.events import Event, EventActions
+from google.genai import types
 #from Aroma_Agents.utils.gemini_llm import GeminiLLM
-from Aroma_Agents.sub_agents.mental_support.prompt import MENTAL_SUPPORT_PROMPT
-from Aroma_Agents.utils.config import MENTAL_SUPPORT_MODEL
+from Aroma_Agents.sub_agents.mental_support.prompt import MENTAL_SUPPORT_PROMPT, MENTAL_SUPPORT_STREAMING_PROMPT
+from Aroma_Agents.utils.config import GOOGLE_API_KEY, MENTAL_SUPPORT_MODEL, SENTENCE_TTS_MAX_PARALLEL, TTS_MODEL, TTS_VOICE
+from Aroma_Agents.utils.state_render import compact_instruction
 #from Aroma_Agents.tools.tts_tool import generate_audio_tts
 from Aroma_Agents.tools import tts_tool
+from Aroma_Agents.utils import deadline
+from Aroma_Agents.utils.artifact_store import get_artifact_store
+from Aroma_Agents.utils.gemini_tts_generator import GeminiTTSGenerator
+from Aroma_Agents.utils.sentence_tts import SentenceSplitter, SentenceTTSPipeline
 
 
 
@@ -22,7 +35,7 @@ class MentalSupportOutput(BaseModel):
 mental_support_agent = Agent(
     name="mental_support_agent",
     model=MENTAL_SUPPORT_MODEL,
-    instruction=MENTAL_SUPPORT_PROMPT,
+    instruction=compact_instruction(MENTAL_SUPPORT_PROMPT),
     input_schema=MentalSupportInput,
     #output_schema=MentalSupportOutput,
     output_key="mental",
@@ -30,3 +43,98 @@ mental_support_agent = Agent(
         tts_tool.generate_audio_tool
     ],
 )
+
+
+class SentenceTTSMentalSupportAgent(BaseAgent):
+    """
+    Streams the monologue from its writer sub-agent and sends every finished sentence to
+    TTS while the rest is still being generated, with bounded parallelism. The segments
+    are stitched back in order into one WAV whose path is stored in `mental_audio`.
+    """
+
+    input_keys: List[str] = ["intent"]
+    output_keys: List[str] = ["mental", "mental_audio"]
+    max_parallel: int = SENTENCE_TTS_MAX_PARALLEL
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        writer = self.sub_agents[0]
+        tts = GeminiTTSGenerator(api_key=GOOGLE_API_KEY, voice=TTS_VOICE, model=TTS_MODEL)
+        output_file = Path(tts_tool.AUDIO_OUTPUT_DIR) / f"mental_support_{ctx.invocation_id}.wav"
+        pipeline = SentenceTTSPipeline(tts, output_file, max_parallel=self.max_parallel)
+        splitter = SentenceSplitter()
+
+        # Force SSE for the writer so text arrives in chunks; only forward the partial
+        # events if the caller asked for streaming itself.
+        caller_streams = ctx.run_config is not None and ctx.run_config.streaming_mode == StreamingMode.SSE
+        run_config = (ctx.run_config or RunConfig()).model_copy(update={"streaming_mode": StreamingMode.SSE})
+        writer_ctx = ctx.model_copy(update={"run_config": run_config})
+
+        streamed = False
+        monologue = ""
+        state_delta = {}
+        try:
+            async with aclosing(writer.run_async(writer_ctx)) as events:
+                async for event in events:
+                    text = ""
+                    if event.content and event.content.parts and event.author == writer.name:
+                        text = "".join(part.text for part in event.content.parts if part.text and not part.thought)
+                    if event.partial:
+                        streamed = streamed or bool(text)
+                        for sentence in splitter.feed(text):
+                            pipeline.submit(sentence)
+                        if caller_streams:
+                            yield event
+                        continue
+                    monologue = monologue or text
+                    # Without streaming support the whole monologue arrives in the final event.
+                    if text and not streamed:
+                        for sentence in splitter.feed(text):
+                            pipeline.submit(sentence)
+                    yield event
+
+            for sentence in splitter.flush():
+                pipeline.submit(sentence)
+            try:
+                # At most the time left in the request's budget; wait_for cancels the pipeline.
+                audio_path = await asyncio.wait_for(pipeline.finish(), deadline.remaining())
+                if audio_path:
+                    # Hand the file to the artifact store so the directory stays size-bounded.
+                    store = get_artifact_store(tts_tool.AUDIO_OUTPUT_DIR)
+                    key = store.make_key(kind="tts_sentences", text=monologue, voice=TTS_VOICE, model=TTS_MODEL)
+                    audio_path = store.put(key, [audio_path])[0]
+                message = f"Audio successfully generated and saved to {audio_path}" if audio_path else "⚠️ No monologue text to synthesize."
+            except asyncio.TimeoutError:
+                audio_path = None
+                deadline.record_skip("sentence_tts")
+                state_delta["skipped_stages"] = list(ctx.session.state.get("skipped_stages") or []) + ["sentence_tts"]
+                message = "⏳ Audio skipped: the request ran out of time before the synthesis finished."
+            except Exception as e:
+                audio_path = None
+                message = f"❌ Error during TTS synthesis: {e}"
+        except BaseException:
+            pipeline.cancel()
+            raise
+
+        print(message)
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            content=types.Content(role="model", parts=[types.Part(text=message)]),
+            actions=EventActions(state_delta={**state_delta, "mental_audio": audio_path}),
+        )
+
+
+sentence_tts_mental_support_agent = SentenceTTSMentalSupportAgent(
+    name="mental_support_agent",
+    description="Writes a comforting monologue and speaks it sentence by sentence as it is written.",
+    sub_agents=[
+        Agent(
+            name="mental_support_writer",
+            model=MENTAL_SUPPORT_MODEL,
+            instruction=compact_instruction(MENTAL_SUPPORT_STREAMING_PROMPT),
+            input_schema=MentalSupportInput,
+            output_key="mental",
+        )
+    ],
+)
@@ -1,11 +1,13 @@
 # Aroma_Agents/sub_agents/music/agent.py
 
 from google.adk.agents.llm_agent import LlmAgent
+from google.adk.tools import LongRunningFunctionTool
 from pydantic import BaseModel
 from typing import Optional
-from .prompt import MUSIC_AGENT_PROMPT
+from .prompt import MUSIC_AGENT_PROMPT, MUSIC_AGENT_BACKGROUND_PROMPT
 from Aroma_Agents.tools import music_tool
-from Aroma_Agents.utils.config import MUSIC_AGENT_MODEL
+from Aroma_Agents.utils.config import MUSIC_AGENT_MODEL, MUSIC_TOOL_MODE
+from Aroma_Agents.utils.state_render import compact_instruction
 
 
 
@@ -18,14 +20,21 @@ class MusicOutput(BaseModel):
     lyrics: str
 
 
+if MUSIC_TOOL_MODE == "background":
+    # The song is generated by a background job; the tool call returns a job id immediately.
+    music_instruction = compact_instruction(MUSIC_AGENT_BACKGROUND_PROMPT)
+    music_tools = [LongRunningFunctionTool(func=music_tool.start_music_generation)]
+else:
+    music_instruction = compact_instruction(MUSIC_AGENT_PROMPT)
+    music_tools = [music_tool.create_and_generate_music]
+
+
 music_agent = LlmAgent(
     name="music_agent",
     model=MUSIC_AGENT_MODEL,
     description="Generates a healing-themed original song lyrics based on mood and context.",
-    instruction=MUSIC_AGENT_PROMPT,
+    instruction=music_instruction,
     input_schema=MusicInput,
     #output_schema=MusicOutput,
-    tools=[
-        music_tool.create_and_generate_music 
-    ], 
+    tools=music_tools,
 )
@@ -1,10 +1,17 @@
 # agent.py
 
+import json
+from contextlib import aclosing
 from pydantic import BaseModel
-from typing import List, Optional
-from google.adk.agents import LlmAgent
-from .prompt import PLANT_MAPPER_PROMPT
-from Aroma_Agents.utils.config import PLANT_MAPPER_MODEL
+from typing import AsyncGenerator, List, Optional
+from google.adk.agents import BaseAgent, LlmAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.genai import types
+from .knowledge_base import resolve_compounds
+from .prompt import PLANT_MAPPER_FALLBACK_PROMPT, PLANT_MAPPER_PROMPT
+from Aroma_Agents.utils.config import PLANT_MAPPER_MODE, PLANT_MAPPER_MODEL
+from Aroma_Agents.utils.state_render import compact_instruction
 
 
 # Output schema for plant_mapper
@@ -19,11 +26,102 @@ class PlantMapperInput(BaseModel):
 class PlantMapperOutput(BaseModel):
     matching_plants_or_products: List[PlantInfo]  # ✅ 用于满足 prompt 替换变量需求
 
-plant_mapper_agent = LlmAgent(
+llm_plant_mapper_agent = LlmAgent(
     name="plant_mapper_agent",
     model=PLANT_MAPPER_MODEL,
-    instruction=PLANT_MAPPER_PROMPT,  # Prompt 中包含 {+compound_candidates+}
+    instruction=compact_instruction(PLANT_MAPPER_PROMPT),  # Prompt 中包含 {+compound_candidates+}
     input_schema=PlantMapperInput,
     output_schema=PlantMapperOutput,
     output_key="matching_plants_or_products"
 )
+
+
+def _compound_list(value) -> List[str]:
+    """Accepts the compound_searcher output as stored in state: {"compound_candidates": [...]}, a list or a JSON string."""
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            return [name.strip() for name in value.split(",") if name.strip()]
+    if isinstance(value, dict):
+        value = value.get("compound_candidates", [])
+    return [str(name) for name in value or []]
+
+
+def _fallback_plants(value) -> List[dict]:
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            return []
+    if isinstance(value, dict):
+        value = value.get("matching_plants_or_products", [])
+    return [plant for plant in value or [] if isinstance(plant, dict) and plant.get("plant_name")]
+
+
+class IndexedPlantMapperAgent(BaseAgent):
+    """
+    Maps compounds to plants from the bundled knowledge base (`knowledge_base.py`).
+
+    Only the compounds the index cannot resolve are sent to the fallback LLM sub-agent, so the
+    common case needs no model call and always gives the same answer. Writes the same
+    `matching_plants_or_products` state as the LLM-only plant mapper.
+    """
+
+    input_keys: List[str] = ["compound_candidates"]
+    output_keys: List[str] = ["matching_plants_or_products"]
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        compounds = _compound_list(ctx.session.state.get("compound_candidates"))
+        plants, unresolved = resolve_compounds(compounds)
+        print(f"🌿 Plant index resolved {len(compounds) - len(unresolved)}/{len(compounds)} compounds")
+
+        if unresolved:
+            print(f"🔎 Asking the LLM about: {', '.join(unresolved)}")
+            yield Event(
+                invocation_id=ctx.invocation_id,
+                author=self.name,
+                branch=ctx.branch,
+                actions=EventActions(state_delta={"unresolved_compounds": unresolved}),
+            )
+            fallback = self.sub_agents[0]
+            # Taken from this run's events: state still holds an earlier turn's answer if the
+            # fallback fails or writes nothing now.
+            fallback_result = None
+            async with aclosing(fallback.run_async(ctx)) as events:
+                async for event in events:
+                    if not event.partial and event.actions.state_delta.get(fallback.output_key) is not None:
+                        fallback_result = event.actions.state_delta[fallback.output_key]
+                    yield event
+            seen_plants = {plant["plant_name"].lower() for plant in plants}
+            for plant in _fallback_plants(fallback_result):
+                if plant["plant_name"].lower() not in seen_plants:
+                    seen_plants.add(plant["plant_name"].lower())
+                    plants.append(plant)
+
+        output = PlantMapperOutput(matching_plants_or_products=plants)
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            content=types.Content(role="model", parts=[types.Part(text=output.model_dump_json(exclude_none=True))]),
+            actions=EventActions(state_delta={"matching_plants_or_products": output.model_dump(exclude_none=True)}),
+        )
+
+
+indexed_plant_mapper_agent = IndexedPlantMapperAgent(
+    name="plant_mapper_agent",
+    description="Maps aroma compounds to plants from a local index, asking the LLM only for unknown compounds.",
+    sub_agents=[
+        LlmAgent(
+            name="plant_mapper_fallback_agent",
+            model=PLANT_MAPPER_MODEL,
+            instruction=compact_instruction(PLANT_MAPPER_FALLBACK_PROMPT),
+            output_schema=PlantMapperOutput,
+            output_key="plant_mapper_fallback_result",
+        )
+    ],
+)
+
+# "index" (default) uses the local knowledge base with LLM fallback, "llm" always asks the model.
+plant_mapper_agent = llm_plant_mapper_agent if PLANT_MAPPER_MODE == "llm" else indexed_plant_mapper_agent
@@ -0,0 +1,195 @@
+# sub_agents/plant_mapper/knowledge_base.py
+
+"""
+Bundled compound -> plant table for the compounds compound_searcher_agent suggests most often.
+
+Lookups go through `normalize_compound_name`, so "α-Pinene", "alpha pinene" and "(+)-alpha-Pinene"
+all hit the same entry, and through `COMPOUND_SYNONYMS` for alternative names (Eucalyptol /
+1,8-Cineole, Geranial / Citral, ...). Anything the index cannot resolve is left for the LLM.
+"""
+
+import re
+from typing import Dict, List, Optional, Tuple
+
+# canonical compound name -> plants (plant_name, part_used, additional_info)
+COMPOUND_PLANTS: Dict[str, List[Tuple[str, str, str]]] = {
+    "Linalool": [
+        ("Lavender", "Flowering tops", "Lavender is rich in linalool, which is associated with calming and anxiety-reducing effects."),
+        ("Coriander", "Seeds", "Coriander seed oil is mostly linalool and has a sweet, soothing scent."),
+        ("Sweet Basil", "Leaves", "Sweet basil contains linalool, traditionally used to ease mental fatigue."),
+    ],
+    "Linalyl acetate": [
+        ("Lavender", "Flowering tops", "Linalyl acetate gives lavender its soft, relaxing floral note."),
+        ("Clary Sage", "Flowering tops", "Clary sage is high in linalyl acetate and is used to relieve tension."),
+        ("Bergamot Orange", "Fruit peel", "Bergamot peel oil contains linalyl acetate, known for easing stress."),
+    ],
+    "Limonene": [
+        ("Sweet Orange", "Fruit peel", "Sweet orange peel oil is mostly limonene, known for its uplifting, mood-boosting effect."),
+        ("Lemon", "Fruit peel", "Lemon contains limonene, which is known for its mood-boosting and stress-reducing effects."),
+        ("Grapefruit", "Fruit peel", "Grapefruit peel oil is rich in limonene and has a bright, energizing scent."),
+    ],
+    "Menthol": [
+        ("Peppermint", "Leaves", "Peppermint is used for headaches and dizziness due to menthol."),
+    ],
+    "Menthone": [
+        ("Peppermint", "Leaves", "Menthone contributes to peppermint's fresh, clearing aroma."),
+    ],
+    "1,8-Cineole": [
+        ("Eucalyptus", "Leaves", "Eucalyptus oil is dominated by 1,8-cineole, which helps clear the airways and the mind."),
+        ("Rosemary", "Leaves", "Rosemary contains 1,8-cineole, associated with alertness and concentration."),
+    ],
+    "alpha-Pinene": [
+        ("Pine", "Needles", "Pine needles contain alpha-pinene, which has been shown to reduce anxiety and improve mood."),
+        ("Frankincense", "Resin", "Frankincense resin is rich in alpha-pinene and is used for grounding and calm breathing."),
+        ("Cypress", "Leaves and twigs", "Cypress oil contains alpha-pinene and has a fresh, forest-like scent."),
+    ],
+    "beta-Caryophyllene": [
+        ("Black Pepper", "Fruit", "Black pepper oil contains beta-caryophyllene, associated with calming and comforting warmth."),
+        ("Clove", "Flower buds", "Clove bud oil contains beta-caryophyllene alongside eugenol."),
+    ],
+    "Geraniol": [
+        ("Rose", "Flowers", "Rose contains geraniol, which may help to reduce stress and promote emotional well-being."),
+        ("Palmarosa", "Grass", "Palmarosa oil is rich in geraniol and has a gentle, rosy scent."),
+        ("Geranium", "Leaves", "Geranium contains geraniol and is used to balance mood."),
+    ],
+    "Citronellol": [
+        ("Rose", "Flowers", "Citronellol is a key component of rose oil's comforting floral scent."),
+        ("Geranium", "Leaves", "Geranium oil contains citronellol, traditionally used for emotional balance."),
+    ],
+    "Citral": [
+        ("Lemongrass", "Leaves", "Lemongrass is rich in citral and has a fresh, uplifting lemon scent."),
+        ("Lemon Balm", "Leaves", "Lemon balm (melissa) contains citral and is traditionally used to calm nervousness."),
+    ],
+    "Citronellal": [
+        ("Citronella", "Leaves", "Citronella grass oil is rich in citronellal and has a fresh, lemony scent."),
+        ("Lemon Eucalyptus", "Leaves", "Lemon eucalyptus oil is dominated by citronellal."),
+    ],
+    "Eugenol": [
+        ("Clove", "Flower buds", "Clove bud oil is mostly eugenol, with a warm, spicy, comforting aroma."),
+    ],
+    "Thymol": [
+        ("Thyme", "Leaves", "Thyme contains thymol, used in steam inhalations and teas."),
+    ],
+    "Carvacrol": [
+        ("Oregano", "Leaves", "Oregano oil is rich in carvacrol and has a strong herbal scent."),
+    ],
+    "Camphor": [
+        ("Rosemary", "Leaves", "Rosemary contains camphor, which gives it a stimulating, clearing note."),
+        ("Camphor Tree", "Wood", "Camphor wood oil is used in inhalations for a refreshing effect."),
+    ],
+    "Chamazulene": [
+        ("German Chamomile", "Flowers", "Chamazulene gives German chamomile oil its blue color and soothing reputation."),
+    ],
+    "alpha-Bisabolol": [
+        ("German Chamomile", "Flowers", "German chamomile contains alpha-bisabolol, associated with calming and skin-soothing effects."),
+    ],
+    "Apigenin": [
+        ("Chamomile", "Flowers", "Chamomile tea contains apigenin, which is associated with relaxation and better sleep."),
+    ],
+    "Valerenic acid": [
+        ("Valerian", "Roots", "Valerian root contains valerenic acid and is traditionally used to support sleep."),
+    ],
+    "L-Theanine": [
+        ("Green Tea", "Leaves", "Green tea contains L-theanine, which promotes calm alertness."),
+    ],
+    "Santalol": [
+        ("Sandalwood", "Heartwood", "Sandalwood oil is rich in santalol and is used for grounding and meditation."),
+    ],
+    "Cedrol": [
+        ("Cedarwood", "Wood", "Cedarwood oil contains cedrol, associated with relaxation and sleep."),
+    ],
+    "Patchoulol": [
+        ("Patchouli", "Leaves", "Patchouli oil is defined by patchoulol and has a deep, earthy, grounding scent."),
+    ],
+    "Benzyl acetate": [
+        ("Jasmine", "Flowers", "Benzyl acetate is a main component of jasmine's sweet, uplifting scent."),
+        ("Ylang-Ylang", "Flowers", "Ylang-ylang contains benzyl acetate and is used to ease tension."),
+    ],
+    "Nerolidol": [
+        ("Neroli", "Flowers", "Neroli (bitter orange blossom) contains nerolidol and is used for calming anxiety."),
+    ],
+    "Sclareol": [
+        ("Clary Sage", "Flowering tops", "Clary sage contains sclareol and is used to relieve tension."),
+    ],
+    "Vanillin": [
+        ("Vanilla", "Cured pods", "Vanillin gives vanilla its warm, comforting scent."),
+    ],
+    "Cinnamaldehyde": [
+        ("Cinnamon", "Bark", "Cinnamon bark oil is rich in cinnamaldehyde and has a warm, cozy aroma."),
+    ],
+    "Zingiberene": [
+        ("Ginger", "Rhizome", "Ginger contains zingiberene and is used in warming teas and massage oils."),
+    ],
+}
+
+# alternative name -> canonical name in COMPOUND_PLANTS
+COMPOUND_SYNONYMS: Dict[str, str] = {
+    "Eucalyptol": "1,8-Cineole",
+    "Cineole": "1,8-Cineole",
+    "Cineol": "1,8-Cineole",
+    "d-Limonene": "Limonene",
+    "Pinene": "alpha-Pinene",
+    "Caryophyllene": "beta-Caryophyllene",
+    "Geranial": "Citral",
+    "Neral": "Citral",
+    "Bisabolol": "alpha-Bisabolol",
+    "Theanine": "L-Theanine",
+    "alpha-Santalol": "Santalol",
+    "Patchouli alcohol": "Patchoulol",
+    "Linalyl ester": "Linalyl acetate",
+    # Plant names the compound searcher sometimes returns instead of a compound.
+    "Bergamot": "Linalyl acetate",
+    "Lavender": "Linalool",
+    "Chamomile": "Apigenin",
+}
+
+_GREEK = {"α": "alpha", "β": "beta", "γ": "gamma", "δ": "delta"}
+# Stereo/optical prefixes that do not change the plant mapping: (+)-, (-)-, (R)-, (S)-, (E)-, (Z)-
+_STEREO_PREFIX_RE = re.compile(r"^\((?:[+\-±]|[rsez])\)-?")
+
+
+def normalize_compound_name(name: str) -> str:
+    """Folds case, greek letters, stereo prefixes, spaces and punctuation into an index key."""
+    key = name.strip().lower()
+    for letter, spelled in _GREEK.items():
+        key = key.replace(letter, spelled)
+    key = _STEREO_PREFIX_RE.sub("", key)
+    return re.sub(r"[^a-z0-9]", "", key)
+
+
+_INDEX: Dict[str, str] = {normalize_compound_name(name): name for name in COMPOUND_PLANTS}
+_INDEX.update({normalize_compound_name(alias): canonical for alias, canonical in COMPOUND_SYNONYMS.items()})
+
+
+def lookup_compound(name: str) -> Optional[List[dict]]:
+    """Returns the PlantInfo records for a compound, or None if the index does not know it."""
+    canonical = _INDEX.get(normalize_compound_name(name))
+    if canonical is None:
+        return None
+    return [
+        {"plant_name": plant_name, "part_used": part_used, "additional_info": additional_info}
+        for plant_name, part_used, additional_info in COMPOUND_PLANTS[canonical]
+    ]
+
+
+def resolve_compounds(compounds: List[str], plants_per_compound: int = 1) -> Tuple[List[dict], List[str]]:
+    """
+    Maps compounds to plants using the index, picking up to `plants_per_compound` plants per
+    compound that are not already in the result (so Linalool and Linalyl acetate do not both
+    return Lavender).
+
+    Returns (plant records, compounds the index could not resolve).
+    """
+    records: List[dict] = []
+    seen_plants = set()
+    unresolved: List[str] = []
+    for compound in compounds:
+        plants = lookup_compound(compound)
+        if plants is None:
+            unresolved.append(compound)
+            continue
+        new_plants = [plant for plant in plants if plant["plant_name"].lower() not in seen_plants]
+        for plant in new_plants[:plants_per_compound]:
+            seen_plants.add(plant["plant_name"].lower())
+            records.append(plant)
+    return records, unresolved
@@ -20,3 +20,24 @@ Respond in the following JSON format (in English only):
   ]
 }
 """
+
+PLANT_MAPPER_FALLBACK_PROMPT = """
+You are a botanical mapping assistant. Your task is to match essential oil compounds to their respective plants.
+
+Given the following compounds:
+
+{unresolved_compounds}
+
+Respond in the following JSON format (in English only), with one plant per compound:
+
+{
+  "matching_plants_or_products": [
+    {
+      "plant_name": "Peppermint",
+      "part_used": "Leaves",
+      "additional_info": "Peppermint is used for headaches and dizziness due to menthol."
+    },
+    ...
+  ]
+}
+"""
@@ -3,6 +3,7 @@ from typing import List, Optional
 from google.adk.agents import LlmAgent
 from Aroma_Agents.sub_agents.recommender.prompt import RECOMMENDER_PROMPT
 from Aroma_Agents.utils.config import AROMA_RECOMMENDER_MODEL
+from Aroma_Agents.utils.state_render import compact_instruction
 
 
 class RecommenderInput(BaseModel):
@@ -19,7 +20,7 @@ class RecommenderOutput(BaseModel):
 recommender_agent = LlmAgent(
     name="recommender_agent",
     model=AROMA_RECOMMENDER_MODEL,
-    instruction=RECOMMENDER_PROMPT,
+    instruction=compact_instruction(RECOMMENDER_PROMPT),
     input_schema=RecommenderInput,
     output_schema=RecommenderOutput,
     output_key="recommendation_result",
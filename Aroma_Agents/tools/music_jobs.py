@@ -0,0 +1,511 @@
+# Aroma_Agents/tools/music_jobs.py
+
+"""
+Durable Suno job queue.
+
+Every song request is a row in a SQLite table (task id, session, lyrics hash, state, attempts)
+before anything is sent to Suno, and a worker pool running on its own event loop thread moves
+the rows through
+
+    queued -> submitted -> downloading -> completed | failed | cancelled
+
+Status checks are not a loop per job: one sweeper checks every submitted job that is due in a
+single pass (bounded by MUSIC_JOB_STATUS_PARALLEL) and writes the results in one transaction,
+so hundreds of songs can be in flight without hundreds of pollers. Because the task id is on
+disk, a restarted process picks up where the previous one stopped instead of orphaning the
+generated tracks. A job is only cancelled when every caller waiting for it went away (e.g. the
+client disconnected); Suno has no cancel endpoint, so that stops the polling and the download.
+"""
+
+import asyncio
+import json
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from contextlib import closing
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from Aroma_Agents.tools import music_tool
+from Aroma_Agents.utils.artifact_store import get_artifact_store
+from Aroma_Agents.utils.config import (
+    MUSIC_JOB_DB_PATH,
+    MUSIC_JOB_MAX_ATTEMPTS,
+    MUSIC_JOB_QUEUE_ENABLED,
+    MUSIC_JOB_STATUS_PARALLEL,
+    MUSIC_JOB_WORKERS,
+)
+from Aroma_Agents.utils.metrics import registry as metrics
+from Aroma_Agents.utils.rate_limiter import current_session
+from Aroma_Agents.utils.suno_webhook import get_webhook_receiver
+
+ACTIVE_STATES = ("queued", "submitted", "downloading")
+FINAL_STATES = ("completed", "failed", "cancelled")
+# Finished rows are kept this long for status lookups, then pruned on startup.
+FINISHED_JOB_RETENTION_SECONDS = 7 * 24 * 3600
+# The sweeper wakes at least this often, even when no job is due.
+MAX_SWEEP_INTERVAL = 5.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS music_jobs (
+    job_id TEXT PRIMARY KEY,
+    task_id TEXT,
+    session_id TEXT,
+    lyrics_hash TEXT NOT NULL,
+    lyrics TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    state TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    checks INTEGER NOT NULL DEFAULT 0,
+    audio_urls TEXT,
+    files TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    submitted_at REAL,
+    updated_at REAL NOT NULL,
+    next_check_at REAL
+);
+CREATE INDEX IF NOT EXISTS music_jobs_state ON music_jobs (state, next_check_at);
+CREATE INDEX IF NOT EXISTS music_jobs_lyrics ON music_jobs (lyrics_hash, state);
+"""
+_JSON_COLUMNS = ("audio_urls", "files")
+
+
+class MusicJobStore:
+    """SQLite table of music jobs; safe to use from several threads."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    @staticmethod
+    def _to_dict(row: Optional[sqlite3.Row]) -> Optional[Dict[str, Any]]:
+        if row is None:
+            return None
+        job = dict(row)
+        for column in _JSON_COLUMNS:
+            job[column] = json.loads(job[column]) if job[column] else None
+        return job
+
+    @staticmethod
+    def _to_columns(fields: Dict[str, Any]) -> Dict[str, Any]:
+        return {key: json.dumps(value) if key in _JSON_COLUMNS and value is not None else value for key, value in fields.items()}
+
+    def create(self, lyrics: str, filename: str, lyrics_hash: str, session_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Inserts a queued job, or returns the active job for the same lyrics hash so identical
+        songs requested concurrently are generated once.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT * FROM music_jobs WHERE lyrics_hash = ? AND state IN (?, ?, ?) ORDER BY created_at LIMIT 1",
+                    (lyrics_hash, *ACTIVE_STATES),
+                ).fetchone()
+                if row is None:
+                    job_id = uuid.uuid4().hex
+                    self._conn.execute(
+                        "INSERT INTO music_jobs (job_id, session_id, lyrics_hash, lyrics, filename, state, created_at, updated_at, next_check_at)"
+                        " VALUES (?, ?, ?, ?, ?, 'queued', ?, ?, ?)",
+                        (job_id, session_id, lyrics_hash, lyrics, filename, now, now, now),
+                    )
+                    row = self._conn.execute("SELECT * FROM music_jobs WHERE job_id = ?", (job_id,)).fetchone()
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return self._to_dict(row)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM music_jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return self._to_dict(row)
+
+    def update(self, job_id: str, **fields):
+        self.update_many([(job_id, fields)])
+
+    def update_many(self, updates: List[tuple]):
+        """Applies [(job_id, {column: value})] in a single transaction."""
+        if not updates:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                for job_id, fields in updates:
+                    columns = self._to_columns({**fields, "updated_at": now})
+                    assignments = ", ".join(f"{column} = ?" for column in columns)
+                    self._conn.execute(f"UPDATE music_jobs SET {assignments} WHERE job_id = ?", (*columns.values(), job_id))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def in_state(self, *states: str) -> List[Dict[str, Any]]:
+        placeholders = ", ".join("?" for _ in states)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT * FROM music_jobs WHERE state IN ({placeholders}) ORDER BY created_at", states
+            ).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def due(self, state: str, now: float, limit: int) -> List[Dict[str, Any]]:
+        """Jobs in `state` whose next_check_at has passed, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM music_jobs WHERE state = ? AND next_check_at <= ? ORDER BY next_check_at LIMIT ?",
+                (state, now, limit),
+            ).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def next_due_at(self) -> Optional[float]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MIN(next_check_at) FROM music_jobs WHERE state IN ('queued', 'submitted')"
+            ).fetchone()
+        return row[0]
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT state, COUNT(*) FROM music_jobs GROUP BY state").fetchall()
+        return {state: count for state, count in rows}
+
+    def prune(self, older_than: float) -> int:
+        """Deletes finished jobs last updated before `older_than` (a time.time() value)."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM music_jobs WHERE state IN (?, ?, ?) AND updated_at < ?", (*FINAL_STATES, older_than)
+            )
+        return cursor.rowcount
+
+
+def _poll_delay(checks: int) -> float:
+    """Backoff with "equal jitter" after `checks` status checks, like `music_tool.poll_delays()`."""
+    capped = min(music_tool.POLL_INITIAL_DELAY * music_tool.POLL_BACKOFF_FACTOR ** checks, music_tool.POLL_MAX_DELAY)
+    return capped / 2 + random.uniform(0, capped / 2)
+
+
+class MusicJobQueue:
+    """
+    Drains a `MusicJobStore` with `workers` submit/download workers and one status sweeper.
+
+    The queue owns an event loop in a daemon thread, so jobs keep running no matter which loop
+    (or `asyncio.run()` call) submitted them. `start()` resumes every unfinished job in the table.
+    """
+
+    def __init__(self, store: MusicJobStore, workers: int = MUSIC_JOB_WORKERS, status_parallel: int = MUSIC_JOB_STATUS_PARALLEL):
+        self.store = store
+        self.workers = workers
+        self.status_parallel = status_parallel
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._ready = threading.Event()
+        self._work: Optional[asyncio.Queue] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._active: set = set()
+        self._waiters: Dict[str, List[asyncio.Future]] = {}
+        self._callbacks: Dict[str, asyncio.Future] = {}
+        # Callers that submitted a job and have neither finished waiting nor abandoned it.
+        # Taken in submit(), under the same lock as the store lookup that shares an active job,
+        # so a job cannot be cancelled between another caller finding it and waiting for it.
+        self._interest: Dict[str, int] = {}
+        self._interest_lock = threading.RLock()
+
+    # --- public API (any thread / loop) ---
+    def start(self) -> "MusicJobQueue":
+        if self._loop is None:
+            threading.Thread(target=self._run_loop, name="music-jobs", daemon=True).start()
+            self._ready.wait()
+        return self
+
+    async def submit(self, lyrics: str, filename: str, session_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Records a song request and returns its job row; identical active requests share one job.
+        Follow it with `wait()`, or `abandon()` when the caller goes away.
+        """
+        with self._interest_lock:
+            job = self.store.create(lyrics, filename, music_tool.music_cache_key(lyrics), session_id)
+            self._interest[job["job_id"]] = self._interest.get(job["job_id"], 0) + 1
+        self._loop.call_soon_threadsafe(self._wake.set)
+        return job
+
+    async def wait(self, job_id: str, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Waits up to `timeout` seconds for the job to finish and returns its (possibly still active) row."""
+        future: Future = asyncio.run_coroutine_threadsafe(self._wait_final(job_id), self._loop)
+        try:
+            await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            pass
+        # Done waiting, but not cancelled: a job still running after `timeout` keeps going.
+        self._release(job_id)
+        return self.store.get(job_id)
+
+    def abandon(self, job_id: str):
+        """Cancels the job unless another caller still has an interest in it; call it when a waiter is cancelled."""
+        if self._release(job_id) == 0:
+            self._loop.call_soon_threadsafe(self._abandon, job_id)
+
+    def stats(self) -> Dict[str, int]:
+        return self.store.counts()
+
+    def _release(self, job_id: str) -> Optional[int]:
+        """Drops one caller's interest in the job; returns how many are left (None if untracked)."""
+        with self._interest_lock:
+            count = self._interest.get(job_id)
+            if count is None:
+                return None
+            if count <= 1:
+                del self._interest[job_id]
+                return 0
+            self._interest[job_id] = count - 1
+            return count - 1
+
+    # --- queue loop ---
+    def _run_loop(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._work = asyncio.Queue()
+        self._wake = asyncio.Event()
+        self._loop.call_soon(self._ready.set)
+        self._loop.run_until_complete(self._main())
+
+    async def _main(self):
+        self._resume()
+        workers = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        try:
+            await self._sweep_forever()
+        finally:
+            for task in workers:
+                task.cancel()
+
+    def _resume(self):
+        pruned = self.store.prune(time.time() - FINISHED_JOB_RETENTION_SECONDS)
+        now = time.time()
+        submitted = self.store.in_state("submitted")
+        queued = self.store.in_state("queued")
+        # Callbacks that arrived while we were down are gone: check these right away, and
+        # release submits that were claimed by a worker of the previous process.
+        self.store.update_many([(job["job_id"], {"next_check_at": now}) for job in submitted + queued])
+        for job in submitted:
+            self._watch_callback(job)
+        downloading = self.store.in_state("downloading")
+        for job in downloading:
+            self._dispatch("download", job)
+        if submitted or downloading or queued:
+            print(f"🔁 Resuming music jobs: {len(queued)} queued, {len(submitted)} submitted, {len(downloading)} downloading.")
+        if pruned:
+            print(f"🧹 Pruned {pruned} finished music job(s) from {self.store.path}.")
+
+    async def _wait_final(self, job_id: str):
+        job = self.store.get(job_id)
+        if job is None or job["state"] in FINAL_STATES:
+            return
+        future = self._loop.create_future()
+        self._waiters.setdefault(job_id, []).append(future)
+        await future
+
+    def _finish(self, job_id: str, **fields):
+        self.store.update(job_id, **fields)
+        self._active.discard(job_id)
+        with self._interest_lock:
+            self._interest.pop(job_id, None)
+        callback = self._callbacks.pop(job_id, None)
+        if callback is not None:
+            callback.cancel()
+        metrics.increment("aroma_music_jobs_total", state=fields["state"])
+        for future in self._waiters.pop(job_id, []):
+            if not future.done():
+                future.set_result(None)
+
+    def _abandon(self, job_id: str):
+        with self._interest_lock:
+            # Checked again under the lock: another caller may have submitted the same song since.
+            if self._interest.get(job_id):
+                return
+            job = self.store.get(job_id)
+            if job is None or job["state"] in FINAL_STATES:
+                return
+            print(f"🛑 Music job {job_id} cancelled in state {job['state']}: nobody is waiting for it.")
+            # Still under the lock, so submit() cannot share the job any more once it returns.
+            self._finish(job_id, state="cancelled", error="Cancelled: the request waiting for the song went away.")
+
+    def _cancelled(self, job_id: str) -> bool:
+        job = self.store.get(job_id)
+        return job is None or job["state"] == "cancelled"
+
+    def _dispatch(self, action: str, job: Dict[str, Any]):
+        if job["job_id"] not in self._active:
+            self._active.add(job["job_id"])
+            if action == "submit":
+                # Claimed: the sweeper skips it until the worker reschedules or submits it.
+                self.store.update(job["job_id"], next_check_at=None)
+            self._work.put_nowait((action, job["job_id"]))
+
+    async def _worker(self):
+        while True:
+            action, job_id = await self._work.get()
+            job = self.store.get(job_id)
+            # Suno requests are queued fairly per session by the rate limiter.
+            current_session.set((job or {}).get("session_id") or "")
+            try:
+                if job is not None and job["state"] not in FINAL_STATES:
+                    await (self._submit(job) if action == "submit" else self._download(job))
+            except Exception as e:
+                print(f"❌ Music job {job_id} {action} crashed: {e!r}")
+                self._finish(job_id, state="failed", error=repr(e))
+            finally:
+                self._work.task_done()
+
+    async def _submit(self, job: Dict[str, Any]):
+        try:
+            task_id = await music_tool.submit_music_generation_task_async(job["lyrics"], job["filename"])
+        except (RuntimeError, music_tool.requests.exceptions.RequestException) as e:
+            if self._cancelled(job["job_id"]):
+                return
+            attempts = job["attempts"] + 1
+            if attempts >= MUSIC_JOB_MAX_ATTEMPTS:
+                self._finish(job["job_id"], state="failed", attempts=attempts, error=f"Could not start the process. {e}")
+            else:
+                self.store.update(job["job_id"], attempts=attempts, next_check_at=time.time() + _poll_delay(attempts))
+                self._active.discard(job["job_id"])
+                self._wake.set()
+            return
+        if self._cancelled(job["job_id"]):
+            return
+        now = time.time()
+        receiver = get_webhook_receiver()
+        first_check = music_tool.SAFETY_POLL_SECONDS if receiver is not None else _poll_delay(0)
+        self.store.update(job["job_id"], state="submitted", task_id=task_id, submitted_at=now, checks=0, next_check_at=now + first_check)
+        self._active.discard(job["job_id"])
+        self._watch_callback({**job, "task_id": task_id})
+        # The sweeper may be sleeping on a longer timeout computed before this job had a check due.
+        self._wake.set()
+
+    async def _download(self, job: Dict[str, Any]):
+        store = get_artifact_store(music_tool.MUSIC_OUTPUT_DIR)
+        saved_files = await music_tool.download_music_files_async(
+            job["audio_urls"] or [], job["filename"], str(store.entry_dir(job["lyrics_hash"]))
+        )
+        if self._cancelled(job["job_id"]):
+            return
+        if saved_files:
+            self._finish(job["job_id"], state="completed", files=store.put(job["lyrics_hash"], saved_files))
+            return
+        attempts = job["attempts"] + 1
+        if attempts >= MUSIC_JOB_MAX_ATTEMPTS:
+            self._finish(job["job_id"], state="failed", attempts=attempts, error="Task completed, but failed to download any files.")
+            return
+        self.store.update(job["job_id"], attempts=attempts)
+        await asyncio.sleep(_poll_delay(attempts))
+        self._work.put_nowait(("download", job["job_id"]))
+
+    def _watch_callback(self, job: Dict[str, Any]):
+        receiver = get_webhook_receiver()
+        if receiver is None or job["job_id"] in self._callbacks:
+            return
+        future = receiver.callbacks.future_for(job["task_id"])
+        self._callbacks[job["job_id"]] = future
+
+        def on_callback(done: asyncio.Future):
+            receiver.callbacks.discard(job["task_id"], done)
+            if self._callbacks.get(job["job_id"]) is done:
+                del self._callbacks[job["job_id"]]
+            if not done.cancelled():
+                self._apply_status([(job, done.result())])
+
+        future.add_done_callback(on_callback)
+
+    def _apply_status(self, results: List[tuple]):
+        """Moves checked jobs on from [(job, status dict)] and writes the changes in one transaction."""
+        now = time.time()
+        updates, downloads, failures = [], [], []
+        for job, status in results:
+            current = self.store.get(job["job_id"])
+            if current is None or current["state"] != "submitted":
+                continue  # already handled, e.g. by a callback racing the sweeper
+            state = status.get("status")
+            if state == "completed":
+                updates.append((job["job_id"], {"state": "downloading", "audio_urls": status["audio_urls"], "next_check_at": None}))
+                downloads.append(job)
+            elif state == "failed":
+                failures.append((job["job_id"], status.get("message")))
+            elif now - (job["submitted_at"] or now) > music_tool.POLL_TIMEOUT_SECONDS:
+                failures.append((job["job_id"], f"Polling timed out after {music_tool.POLL_TIMEOUT_SECONDS / 60:.0f} minutes."))
+            else:
+                # "processing", or a transient "error" from the status endpoint: check again later.
+                checks = job["checks"] + 1
+                delay = music_tool.SAFETY_POLL_SECONDS if job["job_id"] in self._callbacks else _poll_delay(checks)
+                updates.append((job["job_id"], {"checks": checks, "next_check_at": now + delay}))
+        self.store.update_many(updates)
+        for job in downloads:
+            self._dispatch("download", job)
+        for job_id, message in failures:
+            self._finish(job_id, state="failed", error=message)
+
+    async def _check(self, job: Dict[str, Any], semaphore: asyncio.Semaphore) -> tuple:
+        async with semaphore:
+            status = await music_tool.check_music_generation_status_async(job["task_id"])
+        metrics.increment("aroma_suno_polls_total", mode="job_queue")
+        return job, status
+
+    async def _sweep_forever(self):
+        semaphore = asyncio.Semaphore(self.status_parallel)
+        while True:
+            self._wake.clear()
+            now = time.time()
+            try:
+                for job in self.store.due("queued", now, limit=10_000):
+                    self._dispatch("submit", job)
+                due = self.store.due("submitted", now, limit=self.status_parallel * 8)
+                if due:
+                    self._apply_status(await asyncio.gather(*(self._check(job, semaphore) for job in due)))
+                    continue
+            except Exception as e:
+                # Keep sweeping; the jobs are still in the table and are retried on the next pass.
+                print(f"⚠️ Music job sweep failed: {e!r}")
+            next_due = self.store.next_due_at()
+            timeout = MAX_SWEEP_INTERVAL if next_due is None else min(MAX_SWEEP_INTERVAL, max(0.0, next_due - time.time()))
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+
+_queue: Optional[MusicJobQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_music_job_queue() -> Optional[MusicJobQueue]:
+    """Returns the started process-wide queue, or None when AROMA_MUSIC_JOB_QUEUE is off."""
+    global _queue
+    if not MUSIC_JOB_QUEUE_ENABLED:
+        return None
+    with _queue_lock:
+        if _queue is None:
+            _queue = MusicJobQueue(MusicJobStore(MUSIC_JOB_DB_PATH)).start()
+        return _queue
+
+
+def resume_music_jobs() -> Optional[MusicJobQueue]:
+    """Starts the queue at startup if the job table still holds unfinished jobs from a previous run."""
+    if not MUSIC_JOB_QUEUE_ENABLED or not Path(MUSIC_JOB_DB_PATH).exists():
+        return None
+    try:
+        # A connection used as a context manager only commits; closing() also releases the file.
+        with closing(sqlite3.connect(MUSIC_JOB_DB_PATH)) as conn:
+            (unfinished,) = conn.execute(
+                "SELECT COUNT(*) FROM music_jobs WHERE state IN (?, ?, ?)", ACTIVE_STATES
+            ).fetchone()
+    except sqlite3.Error:
+        return None
+    return get_music_job_queue() if unfinished else None
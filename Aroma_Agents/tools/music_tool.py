@@ -1,15 +1,30 @@
 # Aroma_Agents/tools/music_tool.py
 
-import requests
-from pathlib import Path
+import asyncio
+import hashlib
+import random
+import re
 import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 import os
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+
+from google.adk.tools.tool_context import ToolContext
+from Aroma_Agents.utils import deadline
+from Aroma_Agents.utils.artifact_store import get_artifact_store, save_adk_artifact
+from Aroma_Agents.utils.config import REGISTER_ADK_ARTIFACTS, SUNO_API_KEY, SUNO_BASE_URL, SUNO_WEBHOOK_SAFETY_POLL_SECONDS
+from Aroma_Agents.utils.lazy import lazy_module
+from Aroma_Agents.utils.metrics import registry as metrics
+from Aroma_Agents.utils.suno_webhook import SunoWebhookReceiver, get_webhook_receiver
 
-from Aroma_Agents.utils.config import SUNO_API_KEY
+# The HTTP stack is only loaded when the first Suno request is made.
+requests = lazy_module("requests")
+http_client = lazy_module("Aroma_Agents.utils.http_client")
 
 # 定义 API 地址
-BASE_URL = "https://apibox.erweima.ai/api/v1"
+BASE_URL = SUNO_BASE_URL
 GENERATE_URL = f"{BASE_URL}/generate"
 # <<< 核心修正 1: 使用最终正确的状态查询 URL >>>
 STATUS_URL = f"{BASE_URL}/generate/record-info"
@@ -19,6 +34,29 @@ HEADERS = {
     "Authorization": f"Bearer {SUNO_API_KEY}"
 }
 
+MUSIC_OUTPUT_DIR = "music_outputs"
+MUSIC_STYLE = "emotional, healing song with feeling"
+MUSIC_MODEL = "V3_5"
+
+# Async orchestrator polling schedule: exponential backoff with jitter, bounded overall.
+POLL_INITIAL_DELAY = 5.0
+POLL_MAX_DELAY = 30.0
+POLL_BACKOFF_FACTOR = 1.5
+POLL_TIMEOUT_SECONDS = 600.0
+# Streaming downloads: chunk size, (connect, read) timeouts, resume attempts, parallel files.
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+# Smaller reads under a latency budget, so a slow transfer notices soon that it ran out of time.
+BUDGETED_CHUNK_SIZE = 8 * 1024
+DOWNLOAD_TIMEOUT = (10, 60)
+DOWNLOAD_MAX_ATTEMPTS = 4
+DOWNLOAD_MAX_PARALLEL = 4
+# Used as callBackUrl when no webhook receiver is configured (the API requires one).
+DEFAULT_CALLBACK_URL = "https://webhook.site/"
+# With a webhook receiver, status is only polled this often as a safety net.
+SAFETY_POLL_SECONDS = SUNO_WEBHOOK_SAFETY_POLL_SECONDS
+# Finished background jobs kept around for result lookups.
+MAX_FINISHED_JOBS = 1000
+
 # --- 工具 1: 提交任务 (无需修改) ---
 def submit_music_generation_task(lyrics: str, title: str) -> str:
     """
@@ -28,17 +66,18 @@ def submit_music_generation_task(lyrics: str, title: str) -> str:
         raise RuntimeError("SUNO_API_KEY not found in config.")
 
     print(f"🎵 Submitting music generation task for title: '{title}'...")
+    receiver = get_webhook_receiver()
     payload = {
         "prompt": lyrics,
-        "style": "emotional, healing song with feeling",
+        "style": MUSIC_STYLE,
         "title": title,
         "customMode": True,
         "instrumental": False,
-        "model": "V3_5",
-        "callBackUrl": "https://webhook.site/" 
+        "model": MUSIC_MODEL,
+        "callBackUrl": receiver.callback_url if receiver else DEFAULT_CALLBACK_URL,
     }
     try:
-        response = requests.post(GENERATE_URL, headers=HEADERS, json=payload, timeout=30)
+        response = http_client.get_http_client().post(GENERATE_URL, headers=HEADERS, json=payload, timeout=deadline.clamp(30, deadline.MIN_CALL_TIMEOUT), rate_limit="suno")
         response.raise_for_status()
         task_data = response.json()
         if task_data.get("code") != 200 or not task_data.get("data") or "taskId" not in task_data.get("data"):
@@ -66,11 +105,12 @@ def check_music_generation_status(task_id: str) -> Dict[str, Any]:
     print(f"🕒 Checking status for Task ID: {task_id}...")
     
     try:
-        status_response = requests.get(
+        status_response = http_client.get_http_client().get(
             STATUS_URL, 
             headers=HEADERS, 
             params={"taskId": task_id}, 
-            timeout=30
+            timeout=deadline.clamp(30, deadline.MIN_CALL_TIMEOUT),
+            rate_limit="suno",
         )
         status_response.raise_for_status()
         response_data = status_response.json()
@@ -108,87 +148,387 @@ def check_music_generation_status(task_id: str) -> Dict[str, Any]:
         print(f"❌ Polling request failed for Task ID {task_id}: {e}")
         return {"status": "error", "message": f"Network request failed: {e}", "audio_urls": None}
 
-# --- 工具 3: 下载文件 (无需修改) ---
-def download_music_files(audio_urls: List[str], base_filename: str) -> List[str]:
-    # This function is already correct and does not need changes.
-    output_dir = Path("music_outputs")
+# --- 工具 3: 下载文件 (流式 / 并行 / 断点续传) ---
+def _completed_range_size(response: "requests.Response") -> Optional[int]:
+    # A 416 reply carries "Content-Range: bytes */<total size>".
+    content_range = response.headers.get("Content-Range", "")
+    if content_range.startswith("bytes */"):
+        try:
+            return int(content_range.split("/")[1])
+        except ValueError:
+            return None
+    return None
+
+
+def _range_start(response: "requests.Response") -> Optional[int]:
+    # A 206 reply carries "Content-Range: bytes <start>-<end>/<total size>".
+    match = re.match(r"bytes (\d+)-", response.headers.get("Content-Range", ""))
+    return int(match.group(1)) if match else None
+
+
+def download_file(audio_url: str, output_path: Path, deadline_at: Optional[float] = None) -> Path:
+    """
+    Streams one URL to `output_path` in chunks, resuming an interrupted transfer with an
+    HTTP Range request. Data is written to a `.part` file that is renamed into place only
+    once complete, so a crash never leaves a truncated MP3 behind.
+
+    With `deadline_at` (a time.monotonic() value, see `deadline.remaining()`) the read timeout
+    is shortened to the time left and the transfer stops once it has passed; the `.part` file
+    is kept for a later resume.
+    """
+    # The partial file is tied to the URL so a different song with the same name never
+    # resumes from someone else's bytes.
+    url_tag = hashlib.sha1(audio_url.encode("utf-8")).hexdigest()[:12]
+    part_path = output_path.with_name(f"{output_path.name}.{url_tag}.part")
+
+    for attempt in range(1, DOWNLOAD_MAX_ATTEMPTS + 1):
+        offset = part_path.stat().st_size if part_path.exists() else 0
+        headers = {"Range": f"bytes={offset}-"} if offset else {}
+        timeout = DOWNLOAD_TIMEOUT
+        if deadline_at is not None:
+            left = max(deadline_at - time.monotonic(), deadline.MIN_CALL_TIMEOUT)
+            timeout = (min(DOWNLOAD_TIMEOUT[0], left), min(DOWNLOAD_TIMEOUT[1], left))
+        try:
+            with http_client.get_http_client().get(audio_url, headers=headers, stream=True, timeout=timeout) as response:
+                if response.status_code == 416 and offset:
+                    if _completed_range_size(response) == offset:
+                        break  # the partial file already holds the whole body
+                    # Longer than the body (or of another version of it): never usable.
+                    part_path.unlink(missing_ok=True)
+                    raise requests.exceptions.HTTPError(f"{offset} bytes on disk do not match the file on the server", response=response)
+                response.raise_for_status()
+                if offset and response.status_code == 206 and _range_start(response) != offset:
+                    # Appending another range than the one asked for would corrupt the MP3.
+                    part_path.unlink(missing_ok=True)
+                    raise requests.exceptions.HTTPError(f"asked for bytes from {offset}, got {response.headers.get('Content-Range')!r}", response=response)
+                # A 200 reply to a Range request means the server ignored it: start over.
+                mode = "ab" if offset and response.status_code == 206 else "wb"
+                with open(part_path, mode) as f:
+                    chunk_size = DOWNLOAD_CHUNK_SIZE if deadline_at is None else BUDGETED_CHUNK_SIZE
+                    for chunk in response.iter_content(chunk_size=chunk_size):
+                        f.write(chunk)
+                        if deadline_at is not None and time.monotonic() > deadline_at:
+                            raise requests.exceptions.Timeout("the request ran out of its latency budget")
+            break
+        except requests.exceptions.RequestException as e:
+            if attempt == DOWNLOAD_MAX_ATTEMPTS or (deadline_at is not None and time.monotonic() >= deadline_at):
+                raise
+            resumed_from = part_path.stat().st_size if part_path.exists() else 0
+            print(f"⚠️ Download of '{output_path.name}' interrupted ({e}). Resuming from byte {resumed_from}...")
+
+    os.replace(part_path, output_path)
+    return output_path
+
+
+def download_music_files(audio_urls: List[str], base_filename: str, output_dir: str = MUSIC_OUTPUT_DIR) -> List[str]:
+    output_dir = Path(output_dir)
     output_dir.mkdir(parents=True, exist_ok=True)
-    saved_files = []
     if not audio_urls:
         print("⚠️ No audio URLs provided to download.")
         return []
 
-    print(f"⬇️ Starting download of {len(audio_urls)} file(s)...")
+    # The budget lives in a contextvar, which the download threads below do not inherit.
+    left = deadline.remaining()
+    deadline_at = time.monotonic() + left if left is not None else None
+
+    output_paths = []
     for index, audio_url in enumerate(audio_urls):
         file_suffix = f"_{index + 1}" if len(audio_urls) > 1 else ""
-        output_path = output_dir / f"{base_filename}{file_suffix}.mp3"
+        output_paths.append(output_dir / f"{base_filename}{file_suffix}.mp3")
+
+    def download(audio_url: str, output_path: Path) -> Optional[str]:
         print(f"🔗 Downloading '{output_path.name}' from: {audio_url[:70]}...")
         try:
-            audio_response = requests.get(audio_url, timeout=120)
-            audio_response.raise_for_status()
-            with open(output_path, "wb") as f:
-                f.write(audio_response.content)
-            print(f"✅ Music saved to: {output_path}")
-            saved_files.append(str(output_path))
-        except requests.exceptions.RequestException as e:
+            download_file(audio_url, output_path, deadline_at)
+        except (requests.exceptions.RequestException, OSError) as e:
             print(f"⚠️ Failed to download audio file from {audio_url}: {e}")
-            continue
+            return None
+        print(f"✅ Music saved to: {output_path}")
+        return str(output_path)
+
+    print(f"⬇️ Starting download of {len(audio_urls)} file(s)...")
+    # Suno usually returns two tracks; fetch them concurrently over the shared pool.
+    with ThreadPoolExecutor(max_workers=min(len(audio_urls), DOWNLOAD_MAX_PARALLEL)) as executor:
+        results = list(executor.map(download, audio_urls, output_paths))
+    saved_files = [path for path in results if path]
+
     if not saved_files:
         print("❌ Failed to download any of the generated audio files.")
     print("\n🎉 Download task finished!")
     return saved_files
 
-# --- 编排器 (无需修改) ---
-def create_and_generate_music(lyrics: str, filename: str) -> str:
-    # This orchestrator calls the updated check_music_generation_status
-    # and requires no changes itself.
+def music_cache_key(lyrics: str) -> str:
+    """Artifact store key of a song: everything we send to Suno that shapes the result."""
+    return get_artifact_store(MUSIC_OUTPUT_DIR).make_key(kind="music", lyrics=lyrics, style=MUSIC_STYLE, model=MUSIC_MODEL)
+
+
+def _cached_songs_message(paths: List[str]) -> str:
+    message = f"Successfully generated and saved {len(paths)} song(s). Paths: {', '.join(paths)}"
+    print(f"♻️ Reusing cached song(s) for identical lyrics. {message}")
+    return message
+
+
+# --- 异步版本: 提交 / 轮询 / 下载 ---
+# Each HTTP call runs in a worker thread only for the duration of the request; the waits
+# between polls are asyncio sleeps, so one event loop can keep hundreds of jobs in flight.
+
+def poll_delays() -> Iterator[float]:
+    """Yields exponentially growing poll delays with "equal jitter" (half fixed, half random)."""
+    delay = POLL_INITIAL_DELAY
+    while True:
+        capped = min(delay, POLL_MAX_DELAY)
+        yield capped / 2 + random.uniform(0, capped / 2)
+        delay *= POLL_BACKOFF_FACTOR
+
+
+async def submit_music_generation_task_async(lyrics: str, title: str) -> str:
+    return await asyncio.to_thread(submit_music_generation_task, lyrics, title)
+
+
+async def check_music_generation_status_async(task_id: str) -> Dict[str, Any]:
+    return await asyncio.to_thread(check_music_generation_status, task_id)
+
+
+async def download_music_files_async(audio_urls: List[str], base_filename: str, output_dir: str = MUSIC_OUTPUT_DIR) -> List[str]:
+    return await asyncio.to_thread(download_music_files, audio_urls, base_filename, output_dir)
+
+
+async def wait_for_music_generation(task_id: str, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+    """
+    Waits until a submitted task completes, fails or `timeout` seconds pass: through the webhook
+    receiver when one is configured, otherwise by polling with backoff.
+
+    Returns the final status dict, or None if the task did not finish in time.
+    """
+    timeout = POLL_TIMEOUT_SECONDS if timeout is None else timeout
+    loop = asyncio.get_running_loop()
+    deadline_at = loop.time() + timeout
+    receiver = get_webhook_receiver()
+    if receiver is not None:
+        return await _wait_for_callback(receiver, task_id, deadline_at)
+    for delay in poll_delays():
+        remaining = deadline_at - loop.time()
+        if remaining <= 0:
+            return None
+        await asyncio.sleep(min(delay, remaining))
+        status_result = await check_music_generation_status_async(task_id)
+        metrics.increment("aroma_suno_polls_total", mode="async")
+        if status_result.get("status") in ("completed", "failed", "error"):
+            return status_result
+
+
+async def _wait_for_callback(receiver: SunoWebhookReceiver, task_id: str, deadline_at: float) -> Optional[Dict[str, Any]]:
+    """Waits for Suno's completion callback, polling only every SAFETY_POLL_SECONDS in case it is lost."""
+    loop = asyncio.get_running_loop()
+    future = receiver.callbacks.future_for(task_id)
     try:
-        print(f"Orchestrator: Kicking off the music generation process for '{filename}'...")
-        task_id = submit_music_generation_task(lyrics=lyrics, title=filename)
-    except RuntimeError as e:
-        error_message = f"Orchestrator ERROR: Could not start the process. {e}"
-        print(error_message)
-        return error_message
-
-    print("Orchestrator: Waiting 2 seconds for the task to register on the server...")
-    time.sleep(2)
-
-    max_retries = 60
-    wait_seconds = 10
-    final_status = None
-
-    print(f"Orchestrator: Starting to poll for task {task_id}. This may take several minutes...")
-    for i in range(max_retries):
-        if i > 0:
-            time.sleep(wait_seconds)
-        
-        status_result = check_music_generation_status(task_id)
-        current_status = status_result.get('status', 'unknown')
-        
-        if current_status == 'completed':
-            final_status = status_result
-            break
-        elif current_status in ['failed', 'error']:
-            final_status = status_result
-            print(f"Orchestrator: Stopping polling due to failure or error: {status_result['message']}")
-            break
-        
-        if i > 0 and (i * wait_seconds) % 30 == 0:
-            print(f"Orchestrator: Still waiting for music generation... ({(i * wait_seconds) + 2} seconds elapsed)")
-
-    if final_status and final_status['status'] == 'completed':
-        audio_urls = final_status.get('audio_urls', [])
-        if audio_urls:
-            saved_files = download_music_files(audio_urls=audio_urls, base_filename=filename)
-            if saved_files:
-                result_message = f"Successfully generated and saved {len(saved_files)} song(s). Paths: {', '.join(saved_files)}"
-                print(f"Orchestrator: {result_message}")
-                return result_message
-            else:
-                return "Orchestrator ERROR: Task completed, but failed to download any files."
-        else:
-            return "Orchestrator ERROR: Task completed, but no audio URLs were found."
-    elif final_status:
-        return f"Orchestrator ERROR: Process failed. Final status: {final_status['status']}. Reason: {final_status['message']}"
+        while True:
+            remaining = deadline_at - loop.time()
+            if remaining <= 0:
+                return None
+            try:
+                return await asyncio.wait_for(asyncio.shield(future), min(SAFETY_POLL_SECONDS, remaining))
+            except asyncio.TimeoutError:
+                pass
+            status_result = await check_music_generation_status_async(task_id)
+            metrics.increment("aroma_suno_polls_total", mode="safety_net")
+            if status_result.get("status") in ("completed", "failed", "error"):
+                return status_result
+    finally:
+        receiver.callbacks.discard(task_id, future)
+
+
+# Identical lyrics submitted concurrently wait for the first job instead of paying twice.
+_inflight_songs: Dict[str, asyncio.Lock] = {}
+
+
+def _music_job_queue():
+    # Imported here: music_jobs builds on the functions of this module.
+    from Aroma_Agents.tools.music_jobs import get_music_job_queue
+    return get_music_job_queue()
+
+
+def _music_job_result(job: Dict[str, Any], timeout: Optional[float]) -> Tuple[List[str], str]:
+    if job["state"] == "completed":
+        result_message = f"Successfully generated and saved {len(job['files'])} song(s). Paths: {', '.join(job['files'])}"
+        print(f"Orchestrator: {result_message}")
+        return job["files"], result_message
+    if job["state"] in ("failed", "cancelled"):
+        return [], f"Orchestrator ERROR: Process {job['state']}. Reason: {job['error']}"
+    return [], (
+        f"Orchestrator ERROR: The song was not ready after {timeout:.0f} seconds. "
+        f"It is still being generated as music job {job['job_id']}."
+    )
+
+
+async def generate_music_files_async(
+    lyrics: str, filename: str, timeout: Optional[float] = None, session_id: Optional[str] = None
+) -> Tuple[List[str], str]:
+    """
+    Generates a song: submits it to Suno, waits for it (callback or polling) and downloads it.
+
+    Returns (saved file paths, result message); the list is empty when the job failed.
+    Songs already in the artifact store for the same lyrics/style/model are reused. With the
+    durable job queue enabled the song is generated by `music_jobs`, which keeps going (and
+    survives a restart) even if this call gives up after `timeout` seconds.
+    """
+    store = get_artifact_store(MUSIC_OUTPUT_DIR)
+    cache_key = music_cache_key(lyrics)
+    queue = _music_job_queue()
+    if queue is not None:
+        cached = store.get(cache_key)
+        if cached:
+            return cached, _cached_songs_message(cached)
+        job = await queue.submit(lyrics, filename, session_id=session_id)
+        print(f"Orchestrator: Music job {job['job_id']} queued for '{filename}'...")
+        return _music_job_result(await _wait_for_queued_job(queue, job["job_id"], timeout), timeout or POLL_TIMEOUT_SECONDS)
+
+    timeout = POLL_TIMEOUT_SECONDS if timeout is None else timeout
+    lock = _inflight_songs.setdefault(cache_key, asyncio.Lock())
+    try:
+        async with lock:
+            cached = store.get(cache_key)
+            if cached:
+                return cached, _cached_songs_message(cached)
+
+            try:
+                print(f"Orchestrator: Kicking off the music generation process for '{filename}'...")
+                task_id = await submit_music_generation_task_async(lyrics=lyrics, title=filename)
+            except (RuntimeError, requests.exceptions.RequestException) as e:
+                error_message = f"Orchestrator ERROR: Could not start the process. {e}"
+                print(error_message)
+                return [], error_message
+
+            final_status = await wait_for_music_generation(task_id, timeout=timeout)
+            if final_status is None:
+                return [], f"Orchestrator ERROR: Polling timed out after {timeout / 60:.0f} minutes. The task took too long."
+            if final_status["status"] != "completed":
+                return [], f"Orchestrator ERROR: Process failed. Final status: {final_status['status']}. Reason: {final_status['message']}"
+
+            saved_files = await download_music_files_async(
+                final_status.get("audio_urls") or [], filename, str(store.entry_dir(cache_key))
+            )
+            if not saved_files:
+                return [], "Orchestrator ERROR: Task completed, but failed to download any files."
+            saved_files = store.put(cache_key, saved_files)
+            result_message = f"Successfully generated and saved {len(saved_files)} song(s). Paths: {', '.join(saved_files)}"
+            print(f"Orchestrator: {result_message}")
+            return saved_files, result_message
+    finally:
+        if not lock.locked() and _inflight_songs.get(cache_key) is lock:
+            del _inflight_songs[cache_key]
+
+
+async def create_and_generate_music(lyrics: str, filename: str, tool_context: ToolContext) -> str:
+    """
+    Generates a song from the given lyrics with the Suno API and saves the MP3 file(s).
+
+    Args:
+        lyrics: The full lyrics of the song.
+        filename: A simple, descriptive base filename for the output, without extension.
+
+    Returns:
+        A string describing the saved file paths or the error that occurred.
+    """
+    # Waits at most for the rest of the request's budget; only a queued song keeps being produced after that.
+    timeout = deadline.clamp(POLL_TIMEOUT_SECONDS)
+    saved_files, message = await generate_music_files_async(lyrics, filename, timeout=timeout, session_id=tool_context.session.id)
+    if not saved_files and timeout is not None and timeout < POLL_TIMEOUT_SECONDS and deadline.remaining() == 0:
+        # Only a queued job is still being produced; without the queue the Suno task is given up.
+        reason = "deferred" if _music_job_queue() is not None else "budget"
+        deadline.record_skip("music", reason, tool_context.state)
+    if saved_files:
+        tool_context.state["music_files"] = saved_files
+        if REGISTER_ADK_ARTIFACTS:
+            for path in saved_files:
+                await save_adk_artifact(tool_context, path)
+    return message
+
+
+# --- 后台任务 (long-running tool) ---
+_music_jobs: Dict[str, asyncio.Task] = {}
+
+
+def _prune_finished_jobs():
+    finished = [job_id for job_id, task in _music_jobs.items() if task.done()]
+    for job_id in finished[: max(0, len(finished) - MAX_FINISHED_JOBS)]:
+        del _music_jobs[job_id]
+
+
+async def start_music_generation(lyrics: str, filename: str, tool_context: ToolContext) -> Dict[str, Any]:
+    """
+    Starts generating a song from the given lyrics in the background and returns immediately.
+
+    Args:
+        lyrics: The full lyrics of the song.
+        filename: A simple, descriptive base filename for the output, without extension.
+
+    Returns:
+        A dict with the job id and status "pending"; the song is delivered when the job finishes.
+    """
+    _prune_finished_jobs()
+    queue = _music_job_queue()
+    if queue is not None:
+        # The durable job id doubles as the background job id, so its status outlives a restart.
+        job_id = (await queue.submit(lyrics, filename, session_id=tool_context.session.id))["job_id"]
+        coroutine = _wait_for_music_job(queue, job_id)
     else:
-        return f"Orchestrator ERROR: Polling timed out after {(max_retries * wait_seconds) / 60:.0f} minutes. The task took too long."
\ No newline at end of file
+        job_id = uuid.uuid4().hex
+        coroutine = generate_music_files_async(lyrics, filename)
+    _music_jobs[job_id] = asyncio.create_task(coroutine, name=f"music-{job_id}")
+    # Lets the pipeline (see utils/progressive.py) deliver the song in a follow-up event.
+    tool_context.state["music_job_id"] = job_id
+    print(f"🎵 Music job {job_id} started in the background for '{filename}'.")
+    return {"status": "pending", "job_id": job_id, "message": "Music generation started. The song will be delivered when it is ready."}
+
+
+async def _wait_for_queued_job(queue, job_id: str, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+    try:
+        return await queue.wait(job_id, timeout)
+    except asyncio.CancelledError:
+        # The caller went away (e.g. the client disconnected): stop the job unless someone else waits for it.
+        queue.abandon(job_id)
+        raise
+
+
+async def _wait_for_music_job(queue, job_id: str) -> Tuple[List[str], str]:
+    job = await _wait_for_queued_job(queue, job_id)
+    return _music_job_result(job, POLL_TIMEOUT_SECONDS)
+
+
+def get_music_job(job_id: str) -> Optional[asyncio.Task]:
+    """Returns the asyncio task of a background music job; it resolves to (saved file paths, result message)."""
+    return _music_jobs.get(job_id)
+
+
+def cancel_music_job(job_id: str) -> bool:
+    """Cancels a background music job that is still running; returns whether there was one to cancel."""
+    task = _music_jobs.get(job_id)
+    if task is None or task.done():
+        return False
+    task.cancel()
+    print(f"🛑 Music job {job_id} cancelled.")
+    return True
+
+
+def music_job_status(job_id: str) -> Dict[str, Any]:
+    """Returns {"status": "pending" | "completed" | "failed" | "cancelled" | "unknown", "message": ..., "files": [...]} for a job."""
+    task = _music_jobs.get(job_id)
+    if task is None:
+        queue = _music_job_queue()
+        job = queue.store.get(job_id) if queue is not None else None
+        if job is None:
+            return {"status": "unknown", "job_id": job_id, "message": "No such music job."}
+        if job["state"] not in ("completed", "failed", "cancelled"):
+            return {"status": "pending", "job_id": job_id, "message": f"Music generation is still in progress ({job['state']})."}
+        files, message = _music_job_result(job, POLL_TIMEOUT_SECONDS)
+        return {"status": job["state"], "job_id": job_id, "message": message, "files": files}
+    if not task.done():
+        return {"status": "pending", "job_id": job_id, "message": "Music generation is still in progress."}
+    if task.cancelled():
+        return {"status": "cancelled", "job_id": job_id, "message": "Music generation was cancelled."}
+    if task.exception():
+        return {"status": "failed", "job_id": job_id, "message": str(task.exception())}
+    files, message = task.result()
+    status = "completed" if files else "failed"
+    return {"status": status, "job_id": job_id, "message": message, "files": files}
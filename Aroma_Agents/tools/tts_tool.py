@@ -1,14 +1,46 @@
 # Aroma_Agents/tools/tts_tool.py
 
-from pathlib import Path
-# 1. 不再需要导入 Tool 或 ToolContext
+import asyncio
+import threading
+from typing import Optional
+from google.adk.tools.tool_context import ToolContext
+from Aroma_Agents.utils import deadline
+from Aroma_Agents.utils.artifact_store import get_artifact_store, save_adk_artifact
 from Aroma_Agents.utils.gemini_tts_generator import GeminiTTSGenerator
 # 确保从 config.py 中同时导入 API 密钥和模型名称
-from Aroma_Agents.utils.config import GOOGLE_API_KEY, TTS_MODEL
+from Aroma_Agents.utils.config import GOOGLE_API_KEY, REGISTER_ADK_ARTIFACTS, TTS_MODEL, TTS_VOICE
 
+AUDIO_OUTPUT_DIR = "audio_outputs"
 
-# 2. 定义一个具有简单类型签名的普通函数
-def generate_audio_tool(text: str, filename: str) -> str:
+
+def synthesize_cached(text: str, filename: str, cancel: Optional[threading.Event] = None) -> Optional[str]:
+    """
+    Returns the path of the WAV for `text`, calling Gemini only if the artifact store has no
+    entry for the same (text, voice, model). Identical concurrent requests synthesize once.
+    Setting `cancel` stops the TTS stream (SynthesisCancelled).
+    """
+    store = get_artifact_store(AUDIO_OUTPUT_DIR)
+    key = store.make_key(kind="tts", text=text, voice=TTS_VOICE, model=TTS_MODEL)
+    with store.claim(key):
+        cached = store.get(key)
+        if cached:
+            print(f"♻️ Reusing cached audio: {cached[0]}")
+            return cached[0]
+
+        # 初始化 TTS 生成器
+        tts = GeminiTTSGenerator(api_key=GOOGLE_API_KEY, voice=TTS_VOICE, model=TTS_MODEL)
+        output_path = tts.generate_audio(
+            text=text,
+            output_path=str(store.entry_dir(key)),
+            base_filename=filename,
+            cancel=cancel,
+        )
+        if output_path is None:
+            return None
+        return store.put(key, [output_path])[0]
+
+
+async def generate_audio_tool(text: str, filename: str, tool_context: ToolContext) -> str:
     """
     Generates an audio file from text using a Text-to-Speech (TTS) engine.
 
@@ -19,30 +51,38 @@ def generate_audio_tool(text: str, filename: str) -> str:
     Returns:
         A string indicating the result of the operation.
     """
-    # 3. 直接使用函数参数，而不是 context.inputs
     if not text:
         message = "⚠️ Missing 'text' input for TTS. Skipping synthesis."
-        print(message)  # 使用 print 进行日志记录
+        print(message)
         return message
 
-    # 初始化 TTS 生成器
-    # (请确保 GeminiTTSGenerator 的实现是正确的，并且能接收这些参数)
-    tts = GeminiTTSGenerator(api_key=GOOGLE_API_KEY, model=TTS_MODEL)
-
-    output_dir = Path("audio_outputs")
-    output_dir.mkdir(exist_ok=True)
-    
+    cancel = threading.Event()
     try:
-        # 调用实际的生成逻辑
-        output_path = tts.generate_audio(
-            text=text,
-            output_path=str(output_dir),
-            base_filename=filename
+        # ADK calls sync tools on the event loop; run the TTS stream in a worker thread
+        # so stages running concurrently in the DAG pipeline are not blocked.
+        # At most the time left in the request's budget; the rest of the pipeline goes on without audio.
+        output_path = await asyncio.wait_for(
+            asyncio.to_thread(synthesize_cached, text, filename, cancel), deadline.remaining()
         )
-        success_message = f"Audio successfully generated and saved to {output_path}"
-        print(success_message)
-        return success_message
+    except asyncio.TimeoutError:
+        cancel.set()
+        deadline.record_skip("generate_audio_tool", "budget", tool_context.state)
+        return "⏳ Audio skipped: the request ran out of time before the synthesis finished."
+    except asyncio.CancelledError:
+        # The thread cannot be cancelled; tell it to stop reading the stream instead.
+        cancel.set()
+        raise
     except Exception as e:
         error_message = f"❌ Error during TTS synthesis: {e}"
         print(error_message)
-        return error_message
\ No newline at end of file
+        return error_message
+    if output_path is None:
+        return "❌ Error during TTS synthesis: the model returned no audio."
+
+    tool_context.state["mental_audio"] = output_path
+    success_message = f"Audio successfully generated and saved to {output_path}"
+    if REGISTER_ADK_ARTIFACTS:
+        version = await save_adk_artifact(tool_context, output_path)
+        success_message += f" (artifact version {version})"
+    print(success_message)
+    return success_message
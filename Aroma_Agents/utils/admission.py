@@ -0,0 +1,183 @@
+# Aroma_Agents/utils/admission.py
+
+"""
+Admission control and per-stage concurrency limits for the serving mode (see serve.py).
+
+`AdmissionController` lets at most `max_concurrent` requests run the pipeline; up to
+`max_queue` more wait for a slot for at most `queue_timeout` seconds, and everything beyond
+that is shed right away with `Overloaded` (HTTP 503 + Retry-After) instead of piling up
+latency for everyone. `StageLimits` caps how many runs of an individual agent (e.g. the
+music agent) are in flight across all requests, so one slow stage cannot take every slot.
+"""
+
+import asyncio
+import math
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.callback_context import CallbackContext
+
+from Aroma_Agents.utils import deadline
+from Aroma_Agents.utils.metrics import registry as metrics
+
+# How often a queued request checks whether its client is still connected.
+DISCONNECT_POLL_SECONDS = 0.5
+
+metrics.describe("aroma_admission_rejected_total", "Requests shed by admission control, per reason.")
+metrics.describe("aroma_admission_wait_seconds", "Time admitted requests waited for a pipeline slot.")
+metrics.describe("aroma_request_seconds", "Wall time of admitted requests, from admission to release.")
+metrics.describe("aroma_stage_limit_wait_seconds", "Time an agent waited for its stage limit, per agent.")
+
+
+class Overloaded(Exception):
+    """Raised by `AdmissionController.admit()` when a request is shed; `retry_after` is in seconds."""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(f"Server overloaded ({reason}); retry in {retry_after}s.")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Bounded admission queue in front of the pipeline; `admit()` and `release()` pair up per request."""
+
+    def __init__(self, max_concurrent: int, max_queue: int, queue_timeout: float):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._slots = asyncio.Semaphore(max_concurrent)
+        self.active = 0
+        self.waiting = 0
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely to free up, from the median request time and the queue depth."""
+        median = metrics.percentiles("aroma_request_seconds")["p50"] or 1.0
+        return max(1, math.ceil(median * (self.waiting + 1) / self.max_concurrent))
+
+    def _reject(self, reason: str) -> Overloaded:
+        metrics.increment("aroma_admission_rejected_total", reason=reason)
+        print(f"🚦 Request shed ({reason}): {self.active} running, {self.waiting} queued.")
+        return Overloaded(reason, self.retry_after())
+
+    async def admit(self, is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None) -> bool:
+        """
+        Waits for a pipeline slot. Returns True once admitted, or False if `is_disconnected()`
+        reported the client gone while queued. Raises `Overloaded` when the queue is full or the
+        wait exceeds `queue_timeout`.
+        """
+        if self._slots.locked() and self.waiting >= self.max_queue:
+            raise self._reject("queue_full")
+        started = time.perf_counter()
+        deadline = started + self.queue_timeout
+        self.waiting += 1
+        # One acquire() for the whole wait keeps the request's place in the semaphore's FIFO;
+        # the disconnect check runs beside it instead of restarting it.
+        acquire = asyncio.ensure_future(self._slots.acquire())
+        admitted = False
+        try:
+            while True:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    raise self._reject("queue_timeout")
+                await asyncio.wait({acquire}, timeout=min(remaining, DISCONNECT_POLL_SECONDS))
+                if acquire.done():
+                    acquire.result()
+                    break
+                if is_disconnected is not None and await is_disconnected():
+                    metrics.increment("aroma_admission_rejected_total", reason="disconnected")
+                    return False
+            admitted = True
+        finally:
+            self.waiting -= 1
+            if not admitted:
+                if not acquire.done():
+                    acquire.cancel()
+                elif not acquire.cancelled() and acquire.exception() is None:
+                    # Granted while we were giving up: pass the slot on.
+                    self._slots.release()
+        self.active += 1
+        metrics.observe("aroma_admission_wait_seconds", time.perf_counter() - started)
+        return True
+
+    def release(self, seconds: Optional[float] = None):
+        """Frees the slot of an admitted request; `seconds` (its run time) feeds `retry_after()`."""
+        self.active -= 1
+        self._slots.release()
+        if seconds is not None:
+            metrics.observe("aroma_request_seconds", seconds)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "active": self.active,
+            "waiting": self.waiting,
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+        }
+
+
+class StageLimits:
+    """
+    Per-agent concurrency caps, e.g. {"music_agent": 8}, enforced by agent callbacks.
+
+    A permit is taken before the agent runs and returned after it. An agent that is cancelled
+    midway never reaches its after-callback, so `release_session()` returns whatever a
+    finished request still holds.
+    """
+
+    def __init__(self, limits: Dict[str, int]):
+        self.limits = dict(limits)
+        self._semaphores = {name: asyncio.Semaphore(limit) for name, limit in self.limits.items()}
+        self._held: Dict[str, List[str]] = {}
+
+    async def before_agent(self, callback_context: CallbackContext):
+        semaphore = self._semaphores.get(callback_context.agent_name)
+        # ADK still runs the later callbacks of a stage the budget check skipped, but never its
+        # after-callback: a permit taken now would be held until the whole request ends.
+        if semaphore is None or callback_context._invocation_context.end_invocation:
+            return None
+        started = time.perf_counter()
+        try:
+            # Waiting for a permit counts against the request's budget like any other delay.
+            await asyncio.wait_for(semaphore.acquire(), deadline.clamp(None))
+        except asyncio.TimeoutError:
+            deadline.skip_agent(callback_context)
+            return None
+        self._held.setdefault(callback_context.session.id, []).append(callback_context.agent_name)
+        metrics.observe("aroma_stage_limit_wait_seconds", time.perf_counter() - started, agent=callback_context.agent_name)
+        return None
+
+    def after_agent(self, callback_context: CallbackContext):
+        held = self._held.get(callback_context.session.id)
+        if held and callback_context.agent_name in held:
+            held.remove(callback_context.agent_name)
+            self._semaphores[callback_context.agent_name].release()
+            if not held:
+                del self._held[callback_context.session.id]
+        return None
+
+    def release_session(self, session_id: str):
+        for agent_name in self._held.pop(session_id, []):
+            self._semaphores[agent_name].release()
+
+
+def _add_last(agent: BaseAgent, field: str, callback):
+    # Last, so the budget check has run (and may have ended the stage) before a permit is taken.
+    existing = getattr(agent, field)
+    callbacks = existing if isinstance(existing, list) else [existing] if existing is not None else []
+    if callback not in callbacks:
+        setattr(agent, field, callbacks + [callback])
+
+
+def install_stage_limits(root: BaseAgent, limits: StageLimits) -> int:
+    """Adds the `limits` callbacks to the agents under `root` that have a limit; returns how many (idempotent)."""
+    count = 0
+    stack = [root]
+    while stack:
+        agent = stack.pop()
+        if agent.name in limits.limits:
+            _add_last(agent, "before_agent_callback", limits.before_agent)
+            _add_last(agent, "after_agent_callback", limits.after_agent)
+            count += 1
+        stack.extend(agent.sub_agents)
+    return count
@@ -0,0 +1,188 @@
+# Aroma_Agents/utils/artifact_store.py
+
+import asyncio
+import atexit
+import hashlib
+import json
+import mimetypes
+import os
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from google.genai import types
+
+from Aroma_Agents.utils.config import ARTIFACT_STORE_MAX_BYTES, ARTIFACT_STORE_MAX_ENTRIES
+
+
+class ArtifactStore:
+    """
+    Content-addressed store for generated audio and music.
+
+    Entries are keyed by a hash of everything that determines the output (text or lyrics,
+    voice, model, style) and live in `<root>/<key[:2]>/<key>/`, so identical requests reuse
+    the same files and different requests never overwrite each other. The index is kept in
+    LRU order; the least recently used entries are deleted once the store grows beyond
+    `max_bytes` or `max_entries`.
+    """
+
+    INDEX_FILE = "artifact_index.json"
+    # Cache hits only refresh `last_access` in memory; the index is written at most this often
+    # for them (and always on put, eviction and exit).
+    INDEX_SAVE_INTERVAL_SECONDS = 30.0
+
+    def __init__(self, root, max_bytes: int = ARTIFACT_STORE_MAX_BYTES, max_entries: int = ARTIFACT_STORE_MAX_ENTRIES):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        # key -> [lock, holders]; dropped when the last claim on the key ends.
+        self._key_locks: Dict[str, list] = {}
+        self._index: "OrderedDict[str, dict]" = OrderedDict()
+        self._dirty = False
+        self._last_save = time.monotonic()
+        self._load_index()
+
+    @staticmethod
+    def make_key(**parts) -> str:
+        """Hashes the generation inputs into a stable entry key."""
+        payload = json.dumps(parts, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def entry_dir(self, key: str) -> Path:
+        """Directory that holds (or will hold) the files of an entry."""
+        path = self.root / key[:2] / key
+        path.mkdir(parents=True, exist_ok=True)
+        return path
+
+    @contextmanager
+    def claim(self, key: str) -> Iterator[None]:
+        """Serializes generation per key, so concurrent identical requests produce the files once."""
+        with self._lock:
+            slot = self._key_locks.setdefault(key, [threading.Lock(), 0])
+            slot[1] += 1
+        try:
+            with slot[0]:
+                yield
+        finally:
+            with self._lock:
+                slot[1] -= 1
+                if slot[1] == 0:
+                    del self._key_locks[key]
+
+    def get(self, key: str) -> Optional[List[str]]:
+        """Returns the cached file paths for `key` and marks it recently used, or None on a miss."""
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is None:
+                return None
+            paths = [self.root / name for name in entry["files"]]
+            if not all(path.exists() for path in paths):
+                # Someone removed the files behind our back; forget the entry.
+                del self._index[key]
+                self._save_index()
+                return None
+            entry["last_access"] = time.time()
+            self._index.move_to_end(key)
+            self._dirty = True
+            if time.monotonic() - self._last_save >= self.INDEX_SAVE_INTERVAL_SECONDS:
+                self._save_index()
+            return [str(path) for path in paths]
+
+    def put(self, key: str, files: List[str]) -> List[str]:
+        """Moves `files` into the entry for `key` (if not already there) and returns their new paths."""
+        target_dir = self.entry_dir(key)
+        stored = []
+        for file in files:
+            source = Path(file)
+            target = target_dir / source.name
+            if source.resolve() != target.resolve():
+                os.replace(source, target)
+            stored.append(target)
+
+        with self._lock:
+            self._index[key] = {
+                "files": [path.relative_to(self.root).as_posix() for path in stored],
+                "size": sum(path.stat().st_size for path in stored),
+                "last_access": time.time(),
+            }
+            self._index.move_to_end(key)
+            self._evict(keep=key)
+            self._save_index()
+        return [str(path) for path in stored]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._index),
+                "bytes": sum(entry["size"] for entry in self._index.values()),
+                "max_bytes": self.max_bytes,
+                "max_entries": self.max_entries,
+            }
+
+    def flush(self):
+        """Writes the access times of recent cache hits to the index, if any are pending."""
+        with self._lock:
+            if self._dirty:
+                self._save_index()
+
+    def _evict(self, keep: str):
+        total = sum(entry["size"] for entry in self._index.values())
+        for key in list(self._index):
+            if total <= self.max_bytes and len(self._index) <= self.max_entries:
+                break
+            if key == keep:
+                continue
+            total -= self._index.pop(key)["size"]
+            shutil.rmtree(self.root / key[:2] / key, ignore_errors=True)
+            try:
+                (self.root / key[:2]).rmdir()  # only succeeds once the prefix dir is empty
+            except OSError:
+                pass
+
+    def _load_index(self):
+        index_path = self.root / self.INDEX_FILE
+        if not index_path.exists():
+            return
+        try:
+            entries = json.loads(index_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        for key, entry in sorted(entries.items(), key=lambda item: item[1].get("last_access", 0)):
+            self._index[key] = entry
+
+    def _save_index(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        index_path = self.root / self.INDEX_FILE
+        tmp_path = index_path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_text(json.dumps(self._index), encoding="utf-8")
+        os.replace(tmp_path, index_path)
+        self._dirty = False
+        self._last_save = time.monotonic()
+
+
+_stores: Dict[str, ArtifactStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_artifact_store(root: str) -> ArtifactStore:
+    """Returns the shared store for an output directory ("audio_outputs", "music_outputs")."""
+    with _stores_lock:
+        if root not in _stores:
+            _stores[root] = ArtifactStore(root)
+            atexit.register(_stores[root].flush)
+        return _stores[root]
+
+
+async def save_adk_artifact(tool_context, path: str) -> int:
+    """Registers a generated file with ADK's artifact service and returns the artifact version."""
+    data = await asyncio.to_thread(Path(path).read_bytes)
+    mime_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    return await tool_context.save_artifact(
+        filename=Path(path).name,
+        artifact=types.Part.from_bytes(data=data, mime_type=mime_type),
+    )
@@ -0,0 +1,381 @@
+# Aroma_Agents/utils/audio_dsp.py
+
+"""
+NumPy building blocks for audio post-processing on memory-mapped 16-bit PCM.
+
+Audio is never read into Python bytes as a whole: WAV data is opened as an `np.memmap`, other
+formats (the Suno MP3s) are decoded by ffmpeg into a temporary raw PCM file that is mapped the
+same way, and every operation walks the frames in blocks of BLOCK_FRAMES. Peak memory is a few
+blocks, whatever the length of the track.
+"""
+
+import os
+import shutil
+import struct
+import subprocess
+import tempfile
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Iterator, Optional, Tuple
+
+import numpy as np
+
+from Aroma_Agents.utils.gemini_tts_generator import STREAMING_WAV_SIZE, WavStreamWriter
+
+# Frames per processing block (~2.7s at 24 kHz).
+BLOCK_FRAMES = 1 << 16
+INT16_SCALE = 32768.0
+# Half-width, in input samples, of the windowed-sinc resampling kernel, and output frames per
+# resampled block (each block builds a frames x taps weight matrix, so it is kept small).
+RESAMPLE_HALF_TAPS = 16
+RESAMPLE_BLOCK_FRAMES = 1 << 13
+# Ducking: voice activity is measured per window, and the music gain ramps over this many windows.
+DUCK_WINDOW_SECONDS = 0.05
+DUCK_RAMP_WINDOWS = 6
+
+
+class AudioToolMissing(RuntimeError):
+    """Raised when a file needs ffmpeg (MP3 decoding, MP3/Opus encoding) and it is not installed."""
+
+
+def dbfs_to_gain(db: float) -> float:
+    return float(10 ** (db / 20))
+
+
+def gain_to_dbfs(gain: float) -> float:
+    return float(20 * np.log10(max(gain, 1e-10)))
+
+
+@dataclass
+class Pcm:
+    """16-bit PCM as a (frames, channels) int16 array, usually a memmap; `temp_path` is deleted on `close()`."""
+
+    samples: np.ndarray
+    rate: int
+    temp_path: Optional[Path] = None
+
+    @property
+    def frames(self) -> int:
+        return self.samples.shape[0]
+
+    @property
+    def channels(self) -> int:
+        return self.samples.shape[1]
+
+    @property
+    def seconds(self) -> float:
+        return self.frames / self.rate
+
+    def blocks(self, start: int = 0, stop: Optional[int] = None) -> Iterator[Tuple[int, np.ndarray]]:
+        """Yields (first frame, float32 block scaled to [-1, 1)) over frames [start, stop)."""
+        stop = self.frames if stop is None else min(stop, self.frames)
+        for offset in range(start, stop, BLOCK_FRAMES):
+            yield offset, self.samples[offset:min(offset + BLOCK_FRAMES, stop)].astype(np.float32) / INT16_SCALE
+
+    def close(self):
+        mapped = getattr(self.samples, "_mmap", None)
+        self.samples = np.zeros((0, self.channels), dtype=np.int16)
+        if mapped is not None:
+            mapped.close()
+        if self.temp_path is not None:
+            self.temp_path.unlink(missing_ok=True)
+            self.temp_path = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def open_wav(path) -> Pcm:
+    """Maps the data chunk of a 16-bit PCM WAV; also reads files whose header sizes were never patched."""
+    path = Path(path)
+    file_size = path.stat().st_size
+    with open(path, "rb") as f:
+        riff, _, wave = struct.unpack("<4sI4s", f.read(12))
+        if riff != b"RIFF" or wave != b"WAVE":
+            raise ValueError(f"{path} is not a WAV file.")
+        fmt = None
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                raise ValueError(f"{path} has no data chunk.")
+            chunk_id, chunk_size = struct.unpack("<4sI", header)
+            if chunk_id == b"fmt ":
+                fmt = struct.unpack("<HHIIHH", f.read(16))
+                f.seek(chunk_size - 16 + (chunk_size & 1), os.SEEK_CUR)
+            elif chunk_id == b"data":
+                data_offset = f.tell()
+                break
+            else:
+                f.seek(chunk_size + (chunk_size & 1), os.SEEK_CUR)
+    if fmt is None or fmt[0] != 1 or fmt[5] != 16:
+        raise ValueError(f"{path}: only 16-bit PCM WAV is supported.")
+    channels, rate = fmt[1], fmt[2]
+    available = file_size - data_offset
+    # A streamed WAV (see WavStreamWriter / STREAMING_WAV_SIZE) may carry a placeholder size.
+    data_size = available if chunk_size in (0, STREAMING_WAV_SIZE) else min(chunk_size, available)
+    frames = data_size // (2 * channels)
+    if frames == 0:
+        return Pcm(np.zeros((0, channels), dtype=np.int16), rate)
+    return Pcm(np.memmap(path, dtype="<i2", mode="r", offset=data_offset, shape=(frames, channels)), rate)
+
+
+def ffmpeg_path() -> Optional[str]:
+    return shutil.which("ffmpeg")
+
+
+def decode(path, rate: int, channels: int) -> Pcm:
+    """
+    Opens any audio file as PCM at `rate` / `channels`. A WAV already in that shape is mapped
+    directly and any other WAV is resampled here; other formats are converted by ffmpeg. Either
+    conversion goes to a temporary raw file.
+    """
+    path = Path(path)
+    fd, raw_path = tempfile.mkstemp(suffix=".pcm")
+    os.close(fd)
+    raw_path = Path(raw_path)
+    try:
+        if path.suffix.lower() == ".wav":
+            with open_wav(path) as source:
+                if source.rate == rate and source.channels == channels:
+                    raw_path.unlink()
+                    return open_wav(path)
+                with open(raw_path, "wb") as raw:
+                    for block in resampled_blocks(source, rate, channels):
+                        raw.write(to_int16(block))
+        else:
+            ffmpeg = ffmpeg_path()
+            if ffmpeg is None:
+                raise AudioToolMissing(f"ffmpeg is needed to decode {path.name}.")
+            subprocess.run(
+                [ffmpeg, "-v", "error", "-y", "-i", str(path), "-f", "s16le", "-acodec", "pcm_s16le",
+                 "-ar", str(rate), "-ac", str(channels), str(raw_path)],
+                check=True, capture_output=True,
+            )
+    except subprocess.CalledProcessError as e:
+        raw_path.unlink(missing_ok=True)
+        raise RuntimeError(f"ffmpeg could not decode {path.name}: {e.stderr.decode(errors='replace').strip()}") from e
+    except BaseException:
+        raw_path.unlink(missing_ok=True)
+        raise
+    frames = raw_path.stat().st_size // (2 * channels)
+    samples = (np.memmap(raw_path, dtype="<i2", mode="r", shape=(frames, channels))
+               if frames else np.zeros((0, channels), dtype=np.int16))
+    return Pcm(samples, rate, temp_path=raw_path)
+
+
+def encode(wav_path, audio_format: str, bitrate: str = "64k") -> str:
+    """Re-encodes a WAV as "mp3" or "opus" with ffmpeg and removes the WAV; "wav" returns it unchanged."""
+    wav_path = Path(wav_path)
+    if audio_format == "wav":
+        return str(wav_path)
+    ffmpeg = ffmpeg_path()
+    if ffmpeg is None:
+        raise AudioToolMissing(f"ffmpeg is needed to encode {audio_format}.")
+    codec = {"mp3": "libmp3lame", "opus": "libopus"}[audio_format]
+    target = wav_path.with_suffix(".ogg" if audio_format == "opus" else ".mp3")
+    subprocess.run([ffmpeg, "-v", "error", "-y", "-i", str(wav_path), "-c:a", codec, "-b:a", bitrate, str(target)],
+                   check=True, capture_output=True)
+    wav_path.unlink()
+    return str(target)
+
+
+@dataclass
+class LevelStats:
+    rms_dbfs: float
+    peak: float
+    first_loud: int  # first frame above the silence threshold (== frames if none)
+    last_loud: int  # one past the last frame above it (0 if none)
+
+
+def measure(pcm: Pcm, silence_dbfs: float = -50.0) -> LevelStats:
+    """RMS level, peak and the span of non-silent frames, in one pass over the blocks."""
+    threshold = dbfs_to_gain(silence_dbfs)
+    sum_squares, peak = 0.0, 0.0
+    first_loud, last_loud = pcm.frames, 0
+    for offset, block in pcm.blocks():
+        magnitude = np.abs(block).max(axis=1)
+        sum_squares += float(np.square(block, dtype=np.float64).sum())
+        peak = max(peak, float(magnitude.max(initial=0.0)))
+        loud = np.flatnonzero(magnitude > threshold)
+        if loud.size:
+            first_loud = min(first_loud, offset + int(loud[0]))
+            last_loud = offset + int(loud[-1]) + 1
+    samples = pcm.frames * pcm.channels
+    rms = (sum_squares / samples) ** 0.5 if samples else 0.0
+    return LevelStats(gain_to_dbfs(rms), peak, first_loud, last_loud)
+
+
+def rms_dbfs(pcm: Pcm, start: int = 0, stop: Optional[int] = None) -> float:
+    """RMS level of frames [start, stop)."""
+    stop = pcm.frames if stop is None else min(stop, pcm.frames)
+    sum_squares = sum(float(np.square(block, dtype=np.float64).sum()) for _, block in pcm.blocks(start, stop))
+    samples = max(0, stop - start) * pcm.channels
+    return gain_to_dbfs((sum_squares / samples) ** 0.5 if samples else 0.0)
+
+
+def normalization_gain(stats: LevelStats, target_dbfs: float, ceiling_dbfs: float = -1.0) -> float:
+    """Linear gain that brings the RMS level to `target_dbfs` without pushing the peak above `ceiling_dbfs`."""
+    if stats.peak <= 0:
+        return 1.0
+    gain = dbfs_to_gain(target_dbfs - stats.rms_dbfs)
+    return min(gain, dbfs_to_gain(ceiling_dbfs) / stats.peak)
+
+
+def _resample_kernel(distance: np.ndarray, cutoff: float) -> np.ndarray:
+    # Hann-windowed sinc low-pass at `cutoff` (fraction of the input Nyquist rate).
+    window = 0.5 + 0.5 * np.cos(np.pi * np.clip(distance / RESAMPLE_HALF_TAPS, -1.0, 1.0))
+    return cutoff * np.sinc(cutoff * distance) * window
+
+
+def resampled_blocks(pcm: Pcm, rate: int, channels: int, start: int = 0, stop: Optional[int] = None,
+                     gain: float = 1.0) -> Iterator[np.ndarray]:
+    """
+    Yields float32 blocks of frames [start, stop) of `pcm`, scaled by `gain`, converted to `rate`
+    (band-limited windowed-sinc interpolation) and `channels` (mono downmix or upmix).
+    """
+    stop = pcm.frames if stop is None else min(stop, pcm.frames)
+    step = pcm.rate / rate
+    cutoff = min(1.0, rate / pcm.rate)
+    taps = np.arange(-RESAMPLE_HALF_TAPS + 1, RESAMPLE_HALF_TAPS + 1)
+    total = int((stop - start) / step) if stop > start else 0
+    for out_offset in range(0, total, RESAMPLE_BLOCK_FRAMES):
+        positions = start + (out_offset + np.arange(min(RESAMPLE_BLOCK_FRAMES, total - out_offset))) * step
+        if pcm.rate == rate:
+            indices = positions.astype(np.int64)
+            block = pcm.samples[indices[0]:indices[-1] + 1].astype(np.float32) / INT16_SCALE
+        else:
+            base = np.floor(positions).astype(np.int64)
+            lo, hi = base[0] + taps[0], base[-1] + taps[-1] + 1
+            # Input window with zero padding past either end of the track.
+            window = np.zeros((hi - lo, pcm.channels), dtype=np.float32)
+            src_lo, src_hi = max(lo, 0), min(hi, pcm.frames)
+            window[src_lo - lo:src_hi - lo] = pcm.samples[src_lo:src_hi].astype(np.float32) / INT16_SCALE
+            index = (base - lo)[:, None] + taps[None, :]  # (frames, taps) into `window`
+            distance = (positions - base).astype(np.float32)[:, None] - taps[None, :].astype(np.float32)
+            weights = _resample_kernel(distance, np.float32(cutoff))
+            weights /= weights.sum(axis=1, keepdims=True)
+            block = np.einsum("ft,ftc->fc", weights, window[index])
+        if channels != pcm.channels:
+            block = block.mean(axis=1, keepdims=True) if channels == 1 else np.repeat(block.mean(axis=1, keepdims=True), channels, axis=1)
+        yield block * gain if gain != 1.0 else block
+
+
+def to_int16(block: np.ndarray) -> bytes:
+    return np.clip(np.rint(block * INT16_SCALE), -32768, 32767).astype("<i2").tobytes()
+
+
+def process_voice(source, output, rate: int, channels: int = 1, target_dbfs: float = -20.0,
+                  silence_dbfs: float = -50.0, pad_seconds: float = 0.15) -> dict:
+    """
+    Trims leading/trailing silence (keeping `pad_seconds`), normalizes the RMS level to
+    `target_dbfs` and writes a 16-bit WAV at `rate` / `channels` to `output`.
+    Returns {"seconds_in", "seconds_out", "gain_db"}.
+    """
+    with open_wav(source) as pcm:
+        stats = measure(pcm, silence_dbfs)
+        pad = int(pad_seconds * pcm.rate)
+        start, stop = max(0, stats.first_loud - pad), min(pcm.frames, stats.last_loud + pad)
+        # The level that counts is the one of what is written, not of the silence trimmed off.
+        stats = replace(stats, rms_dbfs=rms_dbfs(pcm, start, stop))
+        gain = normalization_gain(stats, target_dbfs)
+        with WavStreamWriter(output, rate, 16, channels) as writer:
+            for block in resampled_blocks(pcm, rate, channels, start, max(start, stop), gain):
+                writer.write(to_int16(block))
+        return {
+            "seconds_in": round(pcm.seconds, 3),
+            "seconds_out": round(max(0, stop - start) / pcm.rate, 3),
+            "gain_db": round(gain_to_dbfs(gain), 2),
+        }
+
+
+def ducking_envelope(voice: Pcm, duck_db: float, silence_dbfs: float = -45.0) -> Tuple[np.ndarray, float]:
+    """
+    Music gain per DUCK_WINDOW_SECONDS window of `voice`: `duck_db` while the voice is audible,
+    0 dB otherwise, ramped over DUCK_RAMP_WINDOWS windows. Returns (linear gains, window seconds).
+    """
+    hop = max(1, int(DUCK_WINDOW_SECONDS * voice.rate))
+    windows = -(-voice.frames // hop)
+    energy = np.zeros(windows, dtype=np.float64)
+    for offset, block in voice.blocks():
+        # BLOCK_FRAMES is not a multiple of hop in general: accumulate per absolute window.
+        first = offset // hop
+        window_index = (offset + np.arange(block.shape[0])) // hop - first
+        sums = np.bincount(window_index, weights=np.square(block, dtype=np.float64).sum(axis=1))
+        energy[first:first + sums.size] += sums
+    counts = np.full(windows, hop * voice.channels, dtype=np.float64)
+    if windows:
+        counts[-1] = (voice.frames - (windows - 1) * hop) * voice.channels
+    active = (np.sqrt(energy / counts) > dbfs_to_gain(silence_dbfs)).astype(np.float64)
+    # Hold the duck across short pauses, then ramp in and out.
+    ramp = np.ones(DUCK_RAMP_WINDOWS) / DUCK_RAMP_WINDOWS
+    held = np.convolve(active, np.ones(2 * DUCK_RAMP_WINDOWS + 1), mode="same") > 0
+    smooth = np.convolve(held.astype(np.float64), ramp, mode="same")
+    return dbfs_to_gain(duck_db) ** np.clip(smooth, 0.0, 1.0), hop / voice.rate
+
+
+def mix_voice_over_music(voice_path, music_path, output, rate: int = 32000, channels: int = 2,
+                         voice_dbfs: float = -18.0, music_dbfs: float = -24.0, duck_db: float = -12.0,
+                         intro_seconds: float = 3.0, outro_seconds: float = 8.0, fade_seconds: float = 4.0) -> dict:
+    """
+    Mixes the monologue over the song into one 16-bit WAV at `rate` / `channels`.
+
+    Both tracks are level-matched (voice at `voice_dbfs`, music at `music_dbfs`), the voice
+    enters after `intro_seconds`, the music is ducked by `duck_db` while the voice speaks, and
+    the song is faded out `outro_seconds` after the voice ends (or where it ends by itself).
+    Returns {"seconds", "voice_gain_db", "music_gain_db"}.
+    """
+    voice = open_wav(voice_path)
+    music = decode(music_path, rate, channels)
+    try:
+        voice_stats, music_stats = measure(voice), measure(music)
+        voice_gain = normalization_gain(voice_stats, voice_dbfs)
+        music_gain = normalization_gain(music_stats, music_dbfs)
+        envelope, window_seconds = ducking_envelope(voice, duck_db)
+
+        voice_start = int(intro_seconds * rate)
+        voice_frames = int(voice.seconds * rate)
+        length = min(music.frames, voice_start + voice_frames + int(outro_seconds * rate))
+        length = max(length, voice_start + voice_frames)
+        fade = int(fade_seconds * rate)
+        voice_blocks = resampled_blocks(voice, rate, channels, gain=voice_gain)
+        pending_voice = np.zeros((0, channels), dtype=np.float32)
+        window_times = (np.arange(envelope.size) + 0.5) * window_seconds
+
+        with WavStreamWriter(output, rate, 16, channels) as writer:
+            for offset in range(0, length, BLOCK_FRAMES):
+                frames = min(BLOCK_FRAMES, length - offset)
+                block = np.zeros((frames, channels), dtype=np.float32)
+                if offset < music.frames:
+                    bed = music.samples[offset:min(offset + frames, music.frames)].astype(np.float32) / INT16_SCALE
+                    # Music gain per frame: the ducking envelope (on the voice's timeline) and the fade-out.
+                    gain = np.full(bed.shape[0], music_gain)
+                    if envelope.size:
+                        times = (offset + np.arange(bed.shape[0]) - voice_start) / rate
+                        gain *= np.interp(times, window_times, envelope, left=1.0, right=1.0)
+                    if length < music.frames:
+                        gain *= np.clip((length - (offset + np.arange(bed.shape[0]))) / max(fade, 1), 0.0, 1.0)
+                    block[:bed.shape[0]] = bed * gain[:, None].astype(np.float32)
+                # Voice frames [offset - voice_start, +frames) of the resampled stream.
+                begin = max(offset, voice_start)
+                end = min(offset + frames, voice_start + voice_frames)
+                while end > begin and pending_voice.shape[0] < end - begin:
+                    chunk = next(voice_blocks, None)
+                    if chunk is None:
+                        break
+                    pending_voice = np.concatenate([pending_voice, chunk])
+                if end > begin:
+                    take = min(end - begin, pending_voice.shape[0])
+                    block[begin - offset:begin - offset + take] += pending_voice[:take]
+                    pending_voice = pending_voice[take:]
+                writer.write(to_int16(block))
+        return {
+            "seconds": round(length / rate, 3),
+            "voice_gain_db": round(gain_to_dbfs(voice_gain), 2),
+            "music_gain_db": round(gain_to_dbfs(music_gain), 2),
+        }
+    finally:
+        voice.close()
+        music.close()
@@ -0,0 +1,152 @@
+# Aroma_Agents/utils/audio_post.py
+
+"""
+Audio post-processing stage (the DSP itself is in utils/audio_dsp.py).
+
+`AudioPostAgent` runs after the mental support and music agents. It turns the raw comfort WAV
+(24 kHz mono, ~2.9 MB per minute) into a trimmed, loudness-normalized delivery file at
+AUDIO_DELIVERY_RATE in AUDIO_DELIVERY_FORMAT (`mental_audio_delivery`) and, when this run
+produced a song, mixes the monologue over it with the music ducked under the voice
+(`mixed_audio`). With the background music tool the song only arrives in the progressive
+follow-up, which mixes it with `mix_with_song()` itself.
+
+Outputs are content-addressed in the audio artifact store, so a repeated request reuses them.
+"""
+
+import asyncio
+import time
+from pathlib import Path
+from typing import AsyncGenerator, Callable, Dict, List, Optional
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+
+from Aroma_Agents.tools.tts_tool import AUDIO_OUTPUT_DIR
+from Aroma_Agents.utils.artifact_store import get_artifact_store
+from Aroma_Agents.utils.config import (
+    AUDIO_DELIVERY_FORMAT,
+    AUDIO_DELIVERY_RATE,
+    AUDIO_DUCK_DB,
+    AUDIO_MIX,
+    AUDIO_MIX_RATE,
+    AUDIO_TARGET_DBFS,
+)
+from Aroma_Agents.utils.metrics import registry as metrics
+
+metrics.describe("aroma_audio_post_seconds", "Time spent post-processing audio, per step (voice, mix).")
+
+
+def _stored(kind: str, sources: List[str], produce: Callable[[Path], dict], **params) -> str:
+    """Runs `produce(wav_path)` once per (sources, params), encodes the WAV and stores the result."""
+    # Imported here: numpy is only needed once there is audio to process.
+    from Aroma_Agents.utils import audio_dsp
+
+    store = get_artifact_store(AUDIO_OUTPUT_DIR)
+    key = store.make_key(kind=kind, sources=[Path(source).as_posix() for source in sources],
+                         format=AUDIO_DELIVERY_FORMAT, **params)
+    with store.claim(key):
+        cached = store.get(key)
+        if cached:
+            return cached[0]
+        started = time.perf_counter()
+        wav_path = store.entry_dir(key) / f"{Path(sources[0]).stem}_{kind}.wav"
+        info = produce(wav_path)
+        path = str(wav_path)
+        if AUDIO_DELIVERY_FORMAT != "wav":
+            try:
+                path = audio_dsp.encode(wav_path, AUDIO_DELIVERY_FORMAT)
+            except audio_dsp.AudioToolMissing as e:
+                print(f"⚠️ {e}; delivering {kind} as WAV.")
+        elapsed = time.perf_counter() - started
+        metrics.observe("aroma_audio_post_seconds", elapsed, step=kind)
+        print(f"🎚️ {kind} ready in {elapsed:.2f}s: {path} {info}")
+        return store.put(key, [path])[0]
+
+
+def process_voice(voice_path: str) -> str:
+    """Delivery version of the comfort audio: trimmed, normalized, resampled, encoded."""
+    from Aroma_Agents.utils import audio_dsp
+
+    params = {"rate": AUDIO_DELIVERY_RATE, "target_dbfs": AUDIO_TARGET_DBFS}
+    return _stored(
+        "voice",
+        [voice_path],
+        lambda output: audio_dsp.process_voice(voice_path, output, AUDIO_DELIVERY_RATE, target_dbfs=AUDIO_TARGET_DBFS),
+        **params,
+    )
+
+
+def mix_with_song(voice_path: str, song_paths: List[str]) -> Optional[str]:
+    """
+    The monologue mixed over the first song, or None if there is no song or it cannot be mixed
+    (MP3 needs ffmpeg; ffmpeg may also fail on a truncated file).
+    """
+    from Aroma_Agents.utils import audio_dsp
+
+    if not song_paths:
+        return None
+    song_path = song_paths[0]
+    params = {"rate": AUDIO_MIX_RATE, "duck_db": AUDIO_DUCK_DB}
+    try:
+        return _stored(
+            "mix",
+            [voice_path, song_path],
+            lambda output: audio_dsp.mix_voice_over_music(voice_path, song_path, output, rate=AUDIO_MIX_RATE, duck_db=AUDIO_DUCK_DB),
+            **params,
+        )
+    except audio_dsp.AudioToolMissing as e:
+        print(f"⚠️ Skipping the voice-over-music mix: {e}")
+        return None
+    except Exception as e:
+        # The song itself is still delivered; the mix is an extra.
+        print(f"❌ Voice-over-music mix failed: {e}")
+        return None
+
+
+def _written_this_run(ctx: InvocationContext, key: str):
+    """The value of `key` if an event of this invocation wrote it; state still holds earlier turns' files."""
+    for event in reversed(ctx.session.events):
+        if event.invocation_id != ctx.invocation_id:
+            break
+        if event.actions and event.actions.state_delta and event.actions.state_delta.get(key):
+            return event.actions.state_delta[key]
+    return None
+
+
+class AudioPostAgent(BaseAgent):
+    """
+    Writes `mental_audio_delivery` (and `mixed_audio` when this run produced a song) from the
+    audio the earlier agents wrote. Runs no LLM; the work happens in a worker thread.
+    """
+
+    # No input_keys: in the DAG pipeline it waits for every agent listed before it.
+    output_keys: List[str] = ["mental_audio_delivery", "mixed_audio"]
+    mix: bool = AUDIO_MIX
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        voice_path = _written_this_run(ctx, "mental_audio")
+        if not voice_path or not Path(voice_path).exists():
+            return
+
+        state_delta: Dict[str, str] = {}
+        try:
+            state_delta["mental_audio_delivery"] = await asyncio.to_thread(process_voice, voice_path)
+            song_paths = _written_this_run(ctx, "music_files") if self.mix else None
+            if song_paths:
+                mixed = await asyncio.to_thread(mix_with_song, voice_path, list(song_paths))
+                if mixed:
+                    state_delta["mixed_audio"] = mixed
+        except Exception as e:
+            # The raw audio is still delivered; post-processing is an improvement, not a stage to fail.
+            print(f"❌ Audio post-processing failed: {e}")
+        if not state_delta:
+            return
+
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            # No content: it would end up in the LLM history of later turns.
+            actions=EventActions(state_delta=state_delta),
+        )
@@ -0,0 +1,119 @@
+# Aroma_Agents/utils/clients.py
+
+"""
+Process-wide registry of API clients.
+
+Building a `genai.Client` or an ADK `Gemini` model is cheap compared to what follows it: each
+one owns its own HTTP connection pool, so a fresh client per call (or per agent) pays a new
+TLS handshake on its first request. The registry hands out one shared instance per API key
+(genai) or model name (LLM), and `prewarm_clients()` can open those connections at startup so
+the first user request does not pay for them.
+"""
+
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional
+
+from google.adk.agents import BaseAgent, LlmAgent
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.registry import LLMRegistry
+
+from Aroma_Agents.utils.config import GOOGLE_API_KEY, SUNO_BASE_URL, TTS_MODEL
+
+_lock = threading.Lock()
+_genai_clients: Dict[Optional[str], Any] = {}
+_llms: Dict[str, BaseLlm] = {}
+
+
+def get_genai_client(api_key: Optional[str] = GOOGLE_API_KEY):
+    """Returns the shared `genai.Client` for `api_key`, creating it on first use."""
+    with _lock:
+        client = _genai_clients.get(api_key)
+        if client is None:
+            from google import genai
+
+            client = _genai_clients[api_key] = genai.Client(api_key=api_key)
+        return client
+
+
+def register_genai_client(client: Any, api_key: Optional[str] = GOOGLE_API_KEY):
+    """Installs `client` as the shared client for `api_key` (e.g. a stand-in for benchmarks)."""
+    with _lock:
+        _genai_clients[api_key] = client
+
+
+def get_llm(model: str) -> BaseLlm:
+    """Returns the shared ADK model object for a model name such as "gemini-2.0-flash"."""
+    with _lock:
+        llm = _llms.get(model)
+        if llm is None:
+            llm = _llms[model] = LLMRegistry.new_llm(model)
+        return llm
+
+
+def share_agent_models(root: BaseAgent) -> int:
+    """
+    Points every LlmAgent under `root` whose model is a name at the shared model object, so
+    agents on the same model reuse one client and connection pool. Returns how many changed.
+    """
+    count = 0
+    stack = [root]
+    while stack:
+        agent = stack.pop()
+        if isinstance(agent, LlmAgent) and isinstance(agent.model, str) and agent.model:
+            agent.model = get_llm(agent.model)
+            count += 1
+        stack.extend(agent.sub_agents)
+    return count
+
+
+def prewarm_clients(models: Iterable[str] = (), suno: bool = True) -> threading.Thread:
+    """
+    Creates the shared clients and opens their connections in a background thread: a model
+    metadata lookup per LLM / TTS model (no generation quota) and a HEAD request to Suno.
+    Returns the thread; failures are only logged.
+    """
+    models = list(models)
+
+    def warm():
+        started = time.perf_counter()
+        for model in models:
+            try:
+                llm = get_llm(model)
+                api_client = getattr(llm, "api_client", None)
+                if api_client is not None:
+                    api_client.models.get(model=model)
+            except Exception as e:
+                print(f"⚠️ Pre-warming {model} failed: {e}")
+        try:
+            get_genai_client().models.get(model=TTS_MODEL)
+        except Exception as e:
+            print(f"⚠️ Pre-warming {TTS_MODEL} failed: {e}")
+        if suno:
+            from Aroma_Agents.utils.http_client import get_http_client
+
+            try:
+                get_http_client().request("HEAD", SUNO_BASE_URL, timeout=5)
+            except Exception as e:
+                print(f"⚠️ Pre-warming the Suno connection failed: {e}")
+        print(f"🔥 Clients pre-warmed in {time.perf_counter() - started:.2f}s")
+
+    thread = threading.Thread(target=warm, name="prewarm-clients", daemon=True)
+    thread.start()
+    return thread
+
+
+def agent_models(root: BaseAgent) -> Iterable[str]:
+    """Names of the models used by the LlmAgents under `root`."""
+    names, stack = set(), [root]
+    while stack:
+        agent = stack.pop()
+        if isinstance(agent, LlmAgent):
+            model = agent.model
+            while hasattr(model, "inner"):
+                model = model.inner
+            name = model if isinstance(model, str) else getattr(model, "model", None)
+            if name:
+                names.add(name)
+        stack.extend(agent.sub_agents)
+    return sorted(names)
@@ -1,3 +1,4 @@
+import json
 import os
 
 COMPOUND_SEARCHER_MODEL = "gemini-2.0-flash"
@@ -5,8 +6,171 @@ INTENT_PARSER_MODEL = "gemini-2.0-flash"
 PLANT_MAPPER_MODEL = "gemini-2.0-flash"
 AROMA_RECOMMENDER_MODEL = "gemini-2.0-flash"
 MENTAL_SUPPORT_MODEL = "gemini-2.0-flash"
+AROMA_FAST_PATH_MODEL = "gemini-2.0-flash"
 MUSIC_AGENT_MODEL = "gemini-2.0-flash"
 TTS_MODEL = "gemini-2.5-flash-preview-tts"
+TTS_VOICE = "Zephyr"
 
 GOOGLE_API_KEY = os.environ.get("GEMINI_API_KEY")
 SUNO_API_KEY = os.environ.get("SUNO_API_KEY")
+# Point at a local stand-in (e.g. the benchmark server in benchmarks/fakes.py) to run offline.
+SUNO_BASE_URL = os.environ.get("SUNO_BASE_URL", "https://apibox.erweima.ai/api/v1")
+
+# Suno completion callbacks (see utils/suno_webhook.py). Setting SUNO_WEBHOOK_PORT starts an
+# embedded receiver ("0" = any free port); SUNO_CALLBACK_URL is the public URL Suno should post
+# to (defaults to the receiver's local address). With the receiver on, status polling only runs
+# every SUNO_WEBHOOK_SAFETY_POLL_SECONDS as a safety net. A forged "complete" callback would make
+# us download any URL, so the receiver only listens on all interfaces when a public URL and
+# SUNO_WEBHOOK_TOKEN are both set, and refuses a non-loopback host without a token.
+SUNO_WEBHOOK_PORT = int(os.environ["SUNO_WEBHOOK_PORT"]) if os.environ.get("SUNO_WEBHOOK_PORT") else None
+SUNO_CALLBACK_URL = os.environ.get("SUNO_CALLBACK_URL")
+SUNO_WEBHOOK_TOKEN = os.environ.get("SUNO_WEBHOOK_TOKEN")
+SUNO_WEBHOOK_HOST = os.environ.get(
+    "SUNO_WEBHOOK_HOST", "0.0.0.0" if SUNO_CALLBACK_URL and SUNO_WEBHOOK_TOKEN else "127.0.0.1"
+)
+SUNO_WEBHOOK_SAFETY_POLL_SECONDS = float(os.environ.get("SUNO_WEBHOOK_SAFETY_POLL_SECONDS", "60"))
+
+# Root pipeline scheduling: "sequential" runs the sub-agents one after another,
+# "dag" starts each sub-agent as soon as the session state it reads is available.
+PIPELINE_MODE = os.environ.get("AROMA_PIPELINE_MODE", "sequential").lower()
+
+# Result delivery (see utils/progressive.py): "progressive" yields each stage's result as its
+# own event as soon as it is ready and delivers the song in a follow-up event, "final" only
+# emits the pipeline's own events.
+DELIVERY_MODE = os.environ.get("AROMA_DELIVERY", "progressive").lower()
+# How long the progressive pipeline waits for a background song before reporting its job id.
+MUSIC_FOLLOW_UP_TIMEOUT = float(os.environ.get("AROMA_MUSIC_FOLLOW_UP_TIMEOUT", "600"))
+
+# Music tool: "blocking" waits for the song inside the tool call, "background" hands back a
+# job id immediately (long-running tool) while the song is generated asynchronously.
+# Defaults to "background" with progressive delivery.
+MUSIC_TOOL_MODE = os.environ.get(
+    "AROMA_MUSIC_TOOL_MODE", "background" if DELIVERY_MODE == "progressive" else "blocking"
+).lower()
+
+# Durable music jobs (see tools/music_jobs.py): Suno tasks are recorded in a SQLite table and
+# finished by a worker pool with batched status checks, so a restart resumes them.
+MUSIC_JOB_QUEUE_ENABLED = os.environ.get("AROMA_MUSIC_JOB_QUEUE", "true").lower() == "true"
+MUSIC_JOB_DB_PATH = os.environ.get("AROMA_MUSIC_JOB_DB", "music_outputs/music_jobs.sqlite3")
+MUSIC_JOB_WORKERS = int(os.environ.get("AROMA_MUSIC_JOB_WORKERS", "4"))
+MUSIC_JOB_STATUS_PARALLEL = int(os.environ.get("AROMA_MUSIC_JOB_STATUS_PARALLEL", "16"))
+MUSIC_JOB_MAX_ATTEMPTS = int(os.environ.get("AROMA_MUSIC_JOB_MAX_ATTEMPTS", "3"))
+
+# Process-wide rate limits (see utils/rate_limiter.py): requests per minute and concurrent
+# requests per Gemini model, TTS model and the Suno API; 0 disables that limit. 429s are
+# retried up to RATE_LIMIT_MAX_RETRIES times after backing off. AROMA_RATE_LIMIT_OVERRIDES
+# takes per-key JSON, e.g. '{"gemini:gemini-2.0-flash": {"rpm": 4000, "max_in_flight": 64}}'.
+RATE_LIMITS_ENABLED = os.environ.get("AROMA_RATE_LIMITS", "true").lower() == "true"
+GEMINI_RPM = float(os.environ.get("AROMA_GEMINI_RPM", "2000"))
+GEMINI_MAX_IN_FLIGHT = int(os.environ.get("AROMA_GEMINI_MAX_IN_FLIGHT", "32"))
+TTS_RPM = float(os.environ.get("AROMA_TTS_RPM", "600"))
+TTS_MAX_IN_FLIGHT = int(os.environ.get("AROMA_TTS_MAX_IN_FLIGHT", "16"))
+SUNO_RPM = float(os.environ.get("AROMA_SUNO_RPM", "120"))
+SUNO_MAX_IN_FLIGHT = int(os.environ.get("AROMA_SUNO_MAX_IN_FLIGHT", "10"))
+RATE_LIMIT_MAX_RETRIES = int(os.environ.get("AROMA_RATE_LIMIT_MAX_RETRIES", "5"))
+RATE_LIMIT_OVERRIDES = json.loads(os.environ.get("AROMA_RATE_LIMIT_OVERRIDES", "{}"))
+
+# Request hedging (see utils/hedging.py) for the idempotent LLM agents in AROMA_HEDGE_AGENTS
+# (comma-separated names; empty = off): a call still unanswered after the HEDGE_PERCENTILE latency
+# of the agent's recent calls (HEDGE_INITIAL_DELAY until HEDGE_MIN_SAMPLES are known, never below
+# HEDGE_MIN_DELAY) is sent again and the first answer wins. At most HEDGE_BUDGET extra calls are
+# sent per call.
+HEDGE_AGENTS = [name.strip() for name in os.environ.get("AROMA_HEDGE_AGENTS", "").split(",") if name.strip()]
+HEDGE_PERCENTILE = float(os.environ.get("AROMA_HEDGE_PERCENTILE", "95"))
+HEDGE_INITIAL_DELAY = float(os.environ.get("AROMA_HEDGE_INITIAL_DELAY", "2.0"))
+HEDGE_MIN_DELAY = float(os.environ.get("AROMA_HEDGE_MIN_DELAY", "0.2"))
+HEDGE_MIN_SAMPLES = int(os.environ.get("AROMA_HEDGE_MIN_SAMPLES", "20"))
+HEDGE_BUDGET = float(os.environ.get("AROMA_HEDGE_BUDGET", "0.1"))
+
+# Open the Gemini / TTS / Suno connections in a background thread at startup (see
+# utils/clients.py), so the first request after a cold start skips the TLS handshakes.
+PREWARM_CLIENTS = os.environ.get("AROMA_PREWARM", "false").lower() == "true"
+
+# Shared HTTP connection pool for the Suno API (see utils/http_client.py).
+SUNO_HTTP_POOL_SIZE = int(os.environ.get("SUNO_HTTP_POOL_SIZE", "20"))
+SUNO_HTTP_POOL_BLOCK = os.environ.get("SUNO_HTTP_POOL_BLOCK", "false").lower() == "true"
+SUNO_HTTP_MAX_RETRIES = int(os.environ.get("SUNO_HTTP_MAX_RETRIES", "3"))
+SUNO_HTTP_BACKOFF_FACTOR = float(os.environ.get("SUNO_HTTP_BACKOFF_FACTOR", "0.5"))
+
+# Mental support audio: "tool" lets the agent call generate_audio_tool with the finished
+# monologue, "sentence" streams the monologue and synthesizes it sentence by sentence.
+MENTAL_SUPPORT_TTS_MODE = os.environ.get("AROMA_MENTAL_SUPPORT_TTS_MODE", "tool").lower()
+SENTENCE_TTS_MAX_PARALLEL = int(os.environ.get("AROMA_SENTENCE_TTS_MAX_PARALLEL", "4"))
+
+# Content-addressed store for generated audio/music (see utils/artifact_store.py).
+ARTIFACT_STORE_MAX_BYTES = int(os.environ.get("AROMA_ARTIFACT_STORE_MAX_MB", "500")) * 1024 * 1024
+ARTIFACT_STORE_MAX_ENTRIES = int(os.environ.get("AROMA_ARTIFACT_STORE_MAX_ENTRIES", "1000"))
+# Also register generated files with ADK's artifact service (tool_context.save_artifact).
+REGISTER_ADK_ARTIFACTS = os.environ.get("AROMA_REGISTER_ADK_ARTIFACTS", "false").lower() == "true"
+
+# Intent parser: "rules" fills the intent from the keyword lexicon (sub_agents/intent_parser/
+# lexicon.py) when its confidence reaches INTENT_RULES_MIN_CONFIDENCE and asks the LLM otherwise,
+# "llm" always asks the model.
+INTENT_PARSER_MODE = os.environ.get("AROMA_INTENT_PARSER_MODE", "rules").lower()
+INTENT_RULES_MIN_CONFIDENCE = float(os.environ.get("AROMA_INTENT_RULES_MIN_CONFIDENCE", "0.75"))
+
+# Plant mapper: "index" maps known compounds from the bundled knowledge base and only asks
+# the LLM about the rest, "llm" sends every compound to the model.
+PLANT_MAPPER_MODE = os.environ.get("AROMA_PLANT_MAPPER_MODE", "index").lower()
+
+# Cache of compound_candidates / matching_plants_or_products / recommendation_result keyed on
+# the normalized intent (see utils/intent_cache.py); fill it with `python -m Aroma_Agents.warmup`.
+INTENT_CACHE_ENABLED = os.environ.get("AROMA_INTENT_CACHE", "true").lower() == "true"
+INTENT_CACHE_PATH = os.environ.get("AROMA_INTENT_CACHE_PATH", "cache/intent_cache.json")
+INTENT_CACHE_TTL_SECONDS = float(os.environ.get("AROMA_INTENT_CACHE_TTL_SECONDS", str(24 * 3600)))
+INTENT_CACHE_MAX_ENTRIES = int(os.environ.get("AROMA_INTENT_CACHE_MAX_ENTRIES", "512"))
+
+# Prompt state injection (see utils/state_render.py): "compact" renders the state a prompt
+# references as deduplicated plain text within PROMPT_STATE_TOKEN_BUDGET tokens, "raw" leaves
+# it to ADK's str() injection.
+STATE_RENDER_MODE = os.environ.get("AROMA_STATE_RENDER", "compact").lower()
+PROMPT_STATE_TOKEN_BUDGET = int(os.environ.get("AROMA_PROMPT_STATE_BUDGET", "400"))
+
+# Aroma chain: "chain" runs compound_searcher -> plant_mapper -> recommender, "fast_path" does all
+# three in one structured LLM call. A request can override it with the `aroma_fast_path` state key.
+AROMA_PATH_MODE = os.environ.get("AROMA_PATH_MODE", "chain").lower()
+
+# Per-stage latency / token / tool-time metrics (see utils/metrics.py). A non-zero port serves
+# them as Prometheus text on /metrics; JSON log lines go to the "Aroma_Agents.metrics" logger.
+METRICS_ENABLED = os.environ.get("AROMA_METRICS", "true").lower() == "true"
+METRICS_PORT = int(os.environ.get("AROMA_METRICS_PORT", "0"))
+
+# Batch runner (python -m Aroma_Agents.batch): sessions processed concurrently.
+BATCH_MAX_IN_FLIGHT = int(os.environ.get("AROMA_BATCH_MAX_IN_FLIGHT", "8"))
+
+# Serving mode (python -m Aroma_Agents.serve): up to SERVE_MAX_CONCURRENT requests run the
+# pipeline, up to SERVE_MAX_QUEUE more wait at most SERVE_QUEUE_TIMEOUT seconds for a slot and
+# the rest get a 503 with Retry-After. AROMA_SERVE_STAGE_LIMITS caps concurrent runs of single
+# agents across requests (JSON, agent name -> limit).
+SERVE_HOST = os.environ.get("AROMA_SERVE_HOST", "0.0.0.0")
+SERVE_PORT = int(os.environ.get("AROMA_SERVE_PORT", "8080"))
+SERVE_MAX_CONCURRENT = int(os.environ.get("AROMA_SERVE_MAX_CONCURRENT", "32"))
+SERVE_MAX_QUEUE = int(os.environ.get("AROMA_SERVE_MAX_QUEUE", "64"))
+SERVE_QUEUE_TIMEOUT = float(os.environ.get("AROMA_SERVE_QUEUE_TIMEOUT", "10"))
+SERVE_STAGE_LIMITS = json.loads(
+    os.environ.get("AROMA_SERVE_STAGE_LIMITS", '{"mental_support_agent": 16, "music_agent": 8}')
+)
+# `GET /files/<path>` (see utils/file_serving.py): bytes per body message when the server has no
+# zero-copy send, and the Cache-Control max-age of served files in seconds.
+SERVE_FILE_CHUNK_BYTES = int(os.environ.get("AROMA_SERVE_FILE_CHUNK_BYTES", str(256 * 1024)))
+SERVE_FILE_MAX_AGE = int(os.environ.get("AROMA_SERVE_FILE_MAX_AGE", "3600"))
+
+# End-to-end latency budget per request (see utils/deadline.py), in seconds; 0 disables it and a
+# request can set its own with the `aroma_budget_s` state key. An agent is skipped when less than
+# its AROMA_STAGE_MIN_BUDGETS entry (JSON, agent name -> seconds) is left.
+REQUEST_BUDGET_SECONDS = float(os.environ.get("AROMA_REQUEST_BUDGET", "300"))
+STAGE_MIN_BUDGETS = json.loads(
+    os.environ.get("AROMA_STAGE_MIN_BUDGETS", '{"mental_support_agent": 5, "music_agent": 15}')
+)
+
+# Audio post-processing (see utils/audio_post.py): the comfort audio is trimmed, normalized to
+# AUDIO_TARGET_DBFS (RMS) and delivered at AUDIO_DELIVERY_RATE as "wav", "mp3" or "opus" (the
+# last two need ffmpeg); with AUDIO_MIX it is also mixed over the song at AUDIO_MIX_RATE, with
+# the music ducked by AUDIO_DUCK_DB while the voice speaks.
+AUDIO_POSTPROCESS = os.environ.get("AROMA_AUDIO_POSTPROCESS", "true").lower() == "true"
+AUDIO_TARGET_DBFS = float(os.environ.get("AROMA_AUDIO_TARGET_DBFS", "-20"))
+AUDIO_DELIVERY_RATE = int(os.environ.get("AROMA_AUDIO_DELIVERY_RATE", "16000"))
+AUDIO_DELIVERY_FORMAT = os.environ.get("AROMA_AUDIO_DELIVERY_FORMAT", "wav").lower()
+AUDIO_MIX = os.environ.get("AROMA_AUDIO_MIX", "true").lower() == "true"
+AUDIO_MIX_RATE = int(os.environ.get("AROMA_AUDIO_MIX_RATE", "32000"))
+AUDIO_DUCK_DB = float(os.environ.get("AROMA_AUDIO_DUCK_DB", "-12"))
@@ -0,0 +1,151 @@
+# Aroma_Agents/utils/dag_agent.py
+
+import asyncio
+import re
+from contextlib import aclosing
+from typing import AsyncGenerator, Dict, List, Optional, Set
+
+from google.adk.agents import BaseAgent, LlmAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event
+from pydantic import Field
+
+# Matches the state placeholders used in our prompts: {key}, {key[field]}, {+key+}, {key?}
+_PLACEHOLDER_RE = re.compile(r"(?<!\{)\{\+?\s*([A-Za-z_][A-Za-z0-9_]*)\s*(?:\[[^\]{}]*\])?\s*\+?\??\}")
+
+
+def state_placeholders(template: str) -> Set[str]:
+    """Returns the root session-state keys referenced by an instruction template."""
+    return set(_PLACEHOLDER_RE.findall(template))
+
+
+def agent_input_keys(agent: BaseAgent) -> Optional[Set[str]]:
+    """
+    Returns the session-state keys an agent reads, or None when they cannot be inferred.
+
+    Custom agents may declare an `input_keys` attribute. For an LlmAgent the keys are
+    taken from the placeholders of its instruction; an instruction provider (callable)
+    can declare them with an `input_keys` attribute on the function.
+    """
+    declared = getattr(agent, "input_keys", None)
+    if declared is not None:
+        return set(declared)
+    if isinstance(agent, LlmAgent):
+        if isinstance(agent.instruction, str):
+            return state_placeholders(agent.instruction)
+        declared = getattr(agent.instruction, "input_keys", None)
+        if declared is not None:
+            return set(declared)
+    return None
+
+
+def agent_output_keys(agent: BaseAgent) -> Set[str]:
+    """Returns the session-state keys an agent writes (`output_keys` attribute or `output_key`)."""
+    declared = getattr(agent, "output_keys", None)
+    if declared is not None:
+        return set(declared)
+    output_key = getattr(agent, "output_key", None)
+    return {output_key} if output_key else set()
+
+
+class DagAgent(BaseAgent):
+    """
+    A shell agent that runs its sub-agents as a dependency graph instead of a fixed sequence.
+
+    Each sub-agent's inputs are worked out from its prompt placeholders and matched against
+    the `output_key`s of its siblings. A sub-agent is started as soon as every key it reads
+    has been written to session state during this invocation (or its producer has finished
+    without writing it), so independent chains run concurrently and the end-to-end latency
+    becomes the longest chain instead of the sum of all stages.
+
+    Sub-agents whose inputs cannot be inferred wait for every sibling listed before them,
+    which keeps the sequential semantics for them. `dependencies` overrides the inferred
+    state keys for a sub-agent by name.
+    """
+
+    dependencies: Dict[str, List[str]] = Field(default_factory=dict)
+
+    def dependency_graph(self) -> Dict[str, Dict[str, str]]:
+        """Maps every sub-agent name to {state_key: producer_agent_name} for the keys it waits on."""
+        producers: Dict[str, str] = {}
+        for agent in self.sub_agents:
+            for key in agent_output_keys(agent):
+                producers.setdefault(key, agent.name)
+
+        graph: Dict[str, Dict[str, str]] = {}
+        for index, agent in enumerate(self.sub_agents):
+            if agent.name in self.dependencies:
+                keys = set(self.dependencies[agent.name])
+            else:
+                keys = agent_input_keys(agent)
+            if keys is None:
+                # Unknown inputs: wait for everything declared before this agent.
+                graph[agent.name] = {f"<{prev.name}>": prev.name for prev in self.sub_agents[:index]}
+                continue
+            graph[agent.name] = {
+                key: producers[key]
+                for key in keys
+                if key in producers and producers[key] != agent.name
+            }
+        return graph
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        if not self.sub_agents:
+            return
+
+        graph = self.dependency_graph()
+        pending = list(self.sub_agents)
+        finished: Set[str] = set()
+        # Only keys written during this invocation count, so stale state from earlier turns
+        # does not release a stage before its producer has re-run.
+        written: Set[str] = set()
+        running: Dict[str, asyncio.Task] = {}
+        queue: asyncio.Queue = asyncio.Queue()
+        done_marker = object()
+
+        async def drive(agent: BaseAgent):
+            try:
+                async with aclosing(agent.run_async(ctx)) as events:
+                    async for event in events:
+                        resume = asyncio.Event()
+                        await queue.put((agent, event, resume))
+                        # Wait until the runner has consumed the event, so the sub-agent
+                        # always sees its own history in the session before continuing.
+                        await resume.wait()
+            finally:
+                await queue.put((agent, done_marker, None))
+
+        def is_ready(agent: BaseAgent) -> bool:
+            return all(key in written or producer in finished for key, producer in graph[agent.name].items())
+
+        def start(agent: BaseAgent):
+            pending.remove(agent)
+            running[agent.name] = asyncio.create_task(drive(agent))
+
+        def start_ready_agents():
+            for agent in list(pending):
+                if is_ready(agent):
+                    start(agent)
+
+        start_ready_agents()
+        try:
+            while running:
+                agent, event, resume = await queue.get()
+                if event is done_marker:
+                    # Re-raises the sub-agent's exception, if any.
+                    await running.pop(agent.name)
+                    finished.add(agent.name)
+                else:
+                    yield event
+                    if event.actions and event.actions.state_delta:
+                        written.update(event.actions.state_delta.keys())
+                    resume.set()
+                start_ready_agents()
+                if not running and pending:
+                    # Only a dependency cycle can leave agents blocked with nothing running:
+                    # break it by starting the first remaining agent in declared order.
+                    start(pending[0])
+        finally:
+            for task in running.values():
+                task.cancel()
+            await asyncio.gather(*running.values(), return_exceptions=True)
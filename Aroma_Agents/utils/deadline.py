@@ -0,0 +1,124 @@
+# Aroma_Agents/utils/deadline.py
+
+"""
+End-to-end latency budgets.
+
+Every run gets a deadline: AROMA_REQUEST_BUDGET seconds after it starts, or the `aroma_budget_s`
+session state key for a single request. The root agent binds it to a context variable, which
+asyncio tasks and `asyncio.to_thread` workers inherit, so every sub-agent and tool sees how much
+of the budget is left and gets at most that:
+
+* an agent is skipped when less than its minimum (AROMA_STAGE_MIN_BUDGETS) is left,
+* an LLM call is not sent once the deadline has passed,
+* the TTS and music tools and the Suno HTTP calls clamp their own timeouts to what is left; a
+  song that is not ready in time keeps being produced as a music job (deferred, not lost).
+
+The rest of the pipeline still runs, so the user gets every result that fit. Skipped stages are
+listed in the `skipped_stages` state key and counted in `aroma_stage_skipped_total{stage,reason}`.
+"""
+
+import contextvars
+import time
+from typing import Optional
+
+from google.adk.agents import BaseAgent, LlmAgent
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+
+from Aroma_Agents.utils.config import REQUEST_BUDGET_SECONDS, STAGE_MIN_BUDGETS
+from Aroma_Agents.utils.metrics import registry as metrics
+
+# Network calls clamped to the budget still get this long, so they fail as timeouts, not as errors.
+MIN_CALL_TIMEOUT = 1.0
+
+metrics.describe("aroma_stage_skipped_total", "Stages skipped or deferred because the request ran out of its latency budget.")
+
+# time.monotonic() value by which the current request has to be answered; None means no budget.
+current_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("aroma_deadline", default=None)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left in the current request's budget (never negative), or None without a budget."""
+    deadline = current_deadline.get()
+    return None if deadline is None else max(0.0, deadline - time.monotonic())
+
+
+def clamp(timeout: Optional[float], floor: float = 0.0) -> Optional[float]:
+    """`timeout` shortened to the time left (but not below `floor`); None stays None without a budget."""
+    left = remaining()
+    if left is None:
+        return timeout
+    left = max(left, floor)
+    return left if timeout is None else min(timeout, left)
+
+
+def record_skip(stage: str, reason: str = "budget", state=None):
+    """Counts a stage skipped (or deferred) for the budget and lists it under `skipped_stages`."""
+    metrics.increment("aroma_stage_skipped_total", stage=stage, reason=reason)
+    if state is not None:
+        state["skipped_stages"] = list(state.get("skipped_stages") or []) + [stage]
+    left = remaining()
+    print(f"⏳ {stage} {'deferred' if reason == 'deferred' else 'skipped'}: {left or 0:.1f}s left of the request budget.")
+
+
+def skip_agent(callback_context: CallbackContext, reason: str = "budget"):
+    """Records the skip and ends the agent's run from its before-callback; the pipeline goes on."""
+    record_skip(callback_context.agent_name, reason, callback_context.state)
+    # Ends this agent's run only: ADK gives every agent its own copy of the invocation context.
+    callback_context._invocation_context.end_invocation = True
+
+
+def _bind_deadline(callback_context: CallbackContext):
+    budget = callback_context.state.get("aroma_budget_s", REQUEST_BUDGET_SECONDS)
+    try:
+        budget = float(budget)
+    except (TypeError, ValueError):
+        budget = REQUEST_BUDGET_SECONDS
+    current_deadline.set(time.monotonic() + budget if budget > 0 else None)
+    if callback_context.state.get("skipped_stages"):
+        callback_context.state["skipped_stages"] = []  # from an earlier turn
+    return None
+
+
+def _check_stage_budget(callback_context: CallbackContext):
+    left = remaining()
+    if left is None:
+        return None
+    needed = STAGE_MIN_BUDGETS.get(callback_context.agent_name, 0.0)
+    if left > needed:
+        return None
+    skip_agent(callback_context)
+    return None
+
+
+def _check_model_budget(callback_context: CallbackContext, llm_request: LlmRequest) -> Optional[LlmResponse]:
+    if remaining() != 0.0:
+        return None
+    record_skip(callback_context.agent_name, "deadline", callback_context.state)
+    return LlmResponse(error_code="DEADLINE_EXCEEDED", error_message="The request ran out of its latency budget.")
+
+
+def _prepend(agent: BaseAgent, field: str, callback):
+    existing = getattr(agent, field)
+    callbacks = existing if isinstance(existing, list) else [existing] if existing is not None else []
+    if callback not in callbacks:
+        setattr(agent, field, [callback] + callbacks)
+
+
+def install_deadlines(root: BaseAgent) -> int:
+    """
+    Binds the request deadline in `root`'s before-callback and adds the budget checks to every
+    agent below it. Returns the number of agents checked; safe to call twice.
+    """
+    _prepend(root, "before_agent_callback", _bind_deadline)
+    count = 0
+    stack = list(root.sub_agents)
+    while stack:
+        agent = stack.pop()
+        _prepend(agent, "before_agent_callback", _check_stage_budget)
+        if isinstance(agent, LlmAgent):
+            _prepend(agent, "before_model_callback", _check_model_budget)
+        count += 1
+        stack.extend(agent.sub_agents)
+    return count
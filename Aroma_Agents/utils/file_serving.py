@@ -0,0 +1,238 @@
+# Aroma_Agents/utils/file_serving.py
+
+"""
+Serving of the generated audio and music files (see serve.py, `GET /files/<path>`).
+
+Files are never read into memory as a whole. When the ASGI server offers the zero-copy
+extensions (`http.response.zerocopysend`, `http.response.pathsend`), the kernel sends the
+bytes with sendfile; otherwise they go out as slices of a memory map, SERVE_FILE_CHUNK_BYTES
+at a time. Single byte ranges (`Range`, `If-Range`) are answered with 206, so seeking in a
+player or resuming a download only transfers what is missing. The ETag is a hash of the
+content, computed once per file version, and `If-None-Match` / `If-Modified-Since` are
+answered with 304.
+"""
+
+import asyncio
+import hashlib
+import mimetypes
+import mmap
+import os
+import re
+import threading
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from starlette.responses import Response
+
+from Aroma_Agents.utils.config import SERVE_FILE_CHUNK_BYTES, SERVE_FILE_MAX_AGE
+from Aroma_Agents.utils.metrics import registry as metrics
+
+# File types that may be served; the stores also hold their JSON index.
+SERVED_SUFFIXES = {".wav", ".mp3", ".ogg", ".opus"}
+# Content hashes kept in memory, keyed by (path, size, mtime).
+MAX_CACHED_ETAGS = 4096
+HASH_BLOCK_BYTES = 1 << 20
+
+metrics.describe("aroma_file_responses_total", "Responses of the file endpoint, per status.")
+metrics.describe("aroma_file_bytes_sent_total", "Bytes of file content sent, per mode (zerocopy, pathsend, mmap).")
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+_etags: "OrderedDict[Tuple[str, int, int], str]" = OrderedDict()
+_etags_lock = threading.Lock()
+
+
+def content_etag(path: Path, stat_result: os.stat_result) -> str:
+    """Strong ETag from the SHA-256 of the file; hashed once per (path, size, mtime)."""
+    key = (str(path), stat_result.st_size, stat_result.st_mtime_ns)
+    with _etags_lock:
+        etag = _etags.get(key)
+        if etag is not None:
+            _etags.move_to_end(key)
+            return etag
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_BYTES), b""):
+            digest.update(block)
+    etag = f'"{digest.hexdigest()[:32]}"'
+    with _etags_lock:
+        _etags[key] = etag
+        while len(_etags) > MAX_CACHED_ETAGS:
+            _etags.popitem(last=False)
+    return etag
+
+
+def resolve_file(relative_path: str, roots: Iterable[str]) -> Optional[Path]:
+    """
+    Maps a result path such as "audio_outputs/ab/<key>/x.wav" to the file, or None when it is
+    not a servable file inside one of `roots`.
+    """
+    path = Path(relative_path)
+    if path.is_absolute() or path.suffix.lower() not in SERVED_SUFFIXES:
+        return None
+    resolved = path.resolve()
+    for root in roots:
+        if resolved.is_relative_to(Path(root).resolve()) and resolved.is_file():
+            return resolved
+    return None
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    # Weak comparison, as If-None-Match requires.
+    candidates = [item.strip() for item in header.split(",")]
+    return "*" in candidates or any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+
+def _not_modified_since(header: Optional[str], mtime: float) -> bool:
+    if not header:
+        return False
+    try:
+        return int(mtime) <= parsedate_to_datetime(header).timestamp()
+    except (TypeError, ValueError):
+        return False
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    (start, end exclusive) of a single "bytes=" range, None when the header is to be ignored
+    (multiple ranges or another unit: the whole file is sent). Raises ValueError when the range
+    cannot be satisfied.
+    """
+    match = _RANGE_RE.match(header.replace(" ", ""))
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes.
+        length = int(last)
+        if length == 0:
+            raise ValueError("empty suffix range")
+        return max(0, size - length), size
+    start = int(first)
+    end = min(size, int(last) + 1) if last else size
+    if start >= size or start >= end:
+        raise ValueError("range starts past the end of the file")
+    return start, end
+
+
+async def _wait_for_disconnect(receive):
+    while (await receive())["type"] != "http.disconnect":
+        pass
+
+
+class FileRangeResponse(Response):
+    """
+    Response for one file: full (200), ranged (206), not modified (304) or an unsatisfiable
+    range (416). HEAD requests get the headers only. Status and headers are worked out when
+    the response is sent, from the request's conditional and range headers.
+    """
+
+    def __init__(self, path: Path, chunk_size: int = SERVE_FILE_CHUNK_BYTES, max_age: int = SERVE_FILE_MAX_AGE):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.max_age = max_age
+        self.status_code = 200
+        self.background = None
+        self.init_headers()
+
+    def _headers(self, stat_result: os.stat_result, etag: str) -> Dict[str, str]:
+        return {
+            "accept-ranges": "bytes",
+            "etag": etag,
+            "last-modified": formatdate(stat_result.st_mtime, usegmt=True),
+            "cache-control": f"public, max-age={self.max_age}",
+        }
+
+    async def __call__(self, scope, receive, send):
+        request_headers = {key.decode("latin-1"): value.decode("latin-1") for key, value in scope["headers"]}
+        try:
+            stat_result = await asyncio.to_thread(os.stat, self.path)
+        except FileNotFoundError:
+            # Evicted from the artifact store between resolving and sending.
+            await self._send_status(send, 404, {})
+            return
+        etag = await asyncio.to_thread(content_etag, self.path, stat_result)
+        headers = self._headers(stat_result, etag)
+        size = stat_result.st_size
+
+        if_none_match = request_headers.get("if-none-match")
+        if (_etag_matches(if_none_match, etag) if if_none_match is not None
+                else _not_modified_since(request_headers.get("if-modified-since"), stat_result.st_mtime)):
+            await self._send_status(send, 304, headers)
+            return
+
+        byte_range = None
+        range_header = request_headers.get("range")
+        if_range = request_headers.get("if-range")
+        # A stale If-Range (the file changed) means: send the whole new file instead of a piece.
+        if range_header and (if_range is None or if_range in (etag, headers["last-modified"])):
+            try:
+                byte_range = parse_range(range_header, size)
+            except ValueError:
+                await self._send_status(send, 416, {**headers, "content-range": f"bytes */{size}"})
+                return
+
+        start, end = byte_range or (0, size)
+        headers["content-type"] = mimetypes.guess_type(self.path.name)[0] or "application/octet-stream"
+        headers["content-length"] = str(end - start)
+        status = 200
+        if byte_range is not None:
+            status = 206
+            headers["content-range"] = f"bytes {start}-{end - 1}/{size}"
+        metrics.increment("aroma_file_responses_total", status=status)
+        await send({"type": "http.response.start", "status": status, "headers": _raw(headers)})
+        if scope["method"] == "HEAD" or end == start:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+        await self._send_body(scope, receive, send, start, end, size)
+
+    async def _send_body(self, scope, receive, send, start: int, end: int, size: int):
+        extensions = scope.get("extensions") or {}
+        if "http.response.zerocopysend" in extensions:
+            with open(self.path, "rb") as f:
+                await send({"type": "http.response.zerocopysend", "file": f.fileno(), "offset": start, "count": end - start})
+            metrics.increment("aroma_file_bytes_sent_total", end - start, mode="zerocopy")
+            return
+        if "http.response.pathsend" in extensions and (start, end) == (0, size):
+            await send({"type": "http.response.pathsend", "path": str(self.path)})
+            metrics.increment("aroma_file_bytes_sent_total", end - start, mode="pathsend")
+            return
+
+        # The server may silently drop writes after a disconnect; stop mapping pages for nobody.
+        disconnected = asyncio.create_task(_wait_for_disconnect(receive))
+        sent = 0
+        try:
+            with open(self.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                if hasattr(mapped, "madvise"):
+                    mapped.madvise(mmap.MADV_SEQUENTIAL, 0, len(mapped))
+                view = memoryview(mapped)
+                try:
+                    for offset in range(start, end, self.chunk_size):
+                        # Yield to the loop: send() does not suspend while the socket keeps up.
+                        await asyncio.sleep(0)
+                        if disconnected.done():
+                            break
+                        chunk_end = min(offset + self.chunk_size, end)
+                        await send({"type": "http.response.body", "body": bytes(view[offset:chunk_end]), "more_body": chunk_end < end})
+                        sent += chunk_end - offset
+                finally:
+                    view.release()
+        finally:
+            disconnected.cancel()
+            metrics.increment("aroma_file_bytes_sent_total", sent, mode="mmap")
+
+    @staticmethod
+    async def _send_status(send, status: int, headers: Dict[str, str]):
+        metrics.increment("aroma_file_responses_total", status=status)
+        if status != 304:
+            headers = {**headers, "content-length": "0"}
+        await send({"type": "http.response.start", "status": status, "headers": _raw(headers)})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+def _raw(headers: Dict[str, str]) -> List[Tuple[bytes, bytes]]:
+    return [(key.encode("latin-1"), value.encode("latin-1")) for key, value in headers.items()]
@@ -3,18 +3,91 @@
 import mimetypes
 import os
 import struct
+import threading
+import time
 from pathlib import Path
-from google import genai
+from typing import AsyncIterator, Iterator, Optional, Tuple
 from google.genai import types
+from Aroma_Agents.utils.clients import get_genai_client
+from Aroma_Agents.utils.config import RATE_LIMIT_MAX_RETRIES
+from Aroma_Agents.utils.metrics import registry as metrics
+from Aroma_Agents.utils.rate_limiter import get_rate_limiter, is_rate_limited, retry_after_seconds
+
+# RIFF/data sizes written into the header of a WAV whose length is not known yet (live
+# streaming). Players treat them as "read until end of stream".
+STREAMING_WAV_SIZE = 0xFFFFFFFF
+
+
+class SynthesisCancelled(Exception):
+    """Raised by the blocking TTS calls when their `cancel` event is set mid-stream."""
+
+
+def wav_header(data_size: int, rate: int, bits_per_sample: int, num_channels: int = 1) -> bytes:
+    """Builds a 44-byte PCM WAV header for `data_size` bytes of audio data."""
+    bytes_per_sample = bits_per_sample // 8
+    block_align = num_channels * bytes_per_sample
+    byte_rate = rate * block_align
+    chunk_size = STREAMING_WAV_SIZE if data_size == STREAMING_WAV_SIZE else 36 + data_size
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF",
+        chunk_size,
+        b"WAVE",
+        b"fmt ",
+        16,
+        1,
+        num_channels,
+        rate,
+        byte_rate,
+        block_align,
+        bits_per_sample,
+        b"data",
+        data_size,
+    )
+
+
+class WavStreamWriter:
+    """
+    Appends PCM chunks to a single WAV file as they arrive.
+
+    A placeholder header is written first; `close()` patches the RIFF and data chunk sizes
+    once the total length is known, so no chunk is ever copied into a bigger buffer.
+    """
+
+    def __init__(self, path, rate: int = 24000, bits_per_sample: int = 16, num_channels: int = 1):
+        self.path = Path(path)
+        self.data_size = 0
+        self._file = open(self.path, "wb")
+        self._file.write(wav_header(0, rate, bits_per_sample, num_channels))
+
+    def write(self, pcm: bytes):
+        self._file.write(pcm)
+        self.data_size += len(pcm)
+
+    def close(self):
+        if self._file.closed:
+            return
+        self._file.seek(4)
+        self._file.write(struct.pack("<I", 36 + self.data_size))
+        self._file.seek(40)
+        self._file.write(struct.pack("<I", self.data_size))
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
 
 
 class GeminiTTSGenerator:
-    def __init__(self, api_key: str, voice: str = "Zephyr", model: str = "gemini-2.5-flash-preview-tts"):
-        self.client = genai.Client(api_key=api_key)
+    def __init__(self, api_key: str, voice: str = "Zephyr", model: str = "gemini-2.5-flash-preview-tts", client=None):
+        # Shared per API key, so every call reuses the same connection pool.
+        self.client = client or get_genai_client(api_key)
         self.model = model
         self.voice_name = voice
 
-    def generate_audio(self, text: str, output_path: str = "output", base_filename: str = "tts_audio") -> str:
+    def _request(self, text: str):
         contents = [
             types.Content(
                 role="user",
@@ -33,68 +106,162 @@ class GeminiTTSGenerator:
                 )
             ),
         )
+        return contents, config
 
+    @staticmethod
+    def _inline_audio(chunk) -> Optional[Tuple[bytes, str]]:
+        parts = chunk.candidates[0].content.parts if chunk.candidates and chunk.candidates[0].content else None
+        if parts and parts[0].inline_data and parts[0].inline_data.data:
+            inline_data = parts[0].inline_data
+            return inline_data.data, inline_data.mime_type or "audio/mpeg"
+        return None
+
+    def iter_audio(self, text: str, cancel: Optional[threading.Event] = None) -> Iterator[Tuple[bytes, str]]:
+        """
+        Yields (audio bytes, mime type) for every chunk as soon as the stream delivers it.
+        The request goes through the model's rate limiter; a 429 before the first chunk is
+        retried after backing off. Setting `cancel` (e.g. from the event loop when the caller
+        went away) closes the stream at the next chunk and raises SynthesisCancelled.
+        """
+        contents, config = self._request(text)
+        limiter = get_rate_limiter(f"tts:{self.model}")
+        started = time.perf_counter()
+        first_chunk = True
+        for attempt in range(RATE_LIMIT_MAX_RETRIES + 1):
+            try:
+                with limiter.slot():
+                    stream = self.client.models.generate_content_stream(
+                        model=self.model,
+                        contents=contents,
+                        config=config,
+                    )
+                    for chunk in stream:
+                        if cancel is not None and cancel.is_set():
+                            getattr(stream, "close", lambda: None)()
+                            raise SynthesisCancelled("TTS stream cancelled by the caller.")
+                        audio = self._inline_audio(chunk)
+                        if audio:
+                            if first_chunk:
+                                metrics.observe("aroma_tts_first_chunk_seconds", time.perf_counter() - started, model=self.model)
+                                first_chunk = False
+                            yield audio
+                limiter.succeeded()
+                break
+            except Exception as e:
+                if not first_chunk or attempt == RATE_LIMIT_MAX_RETRIES or not is_rate_limited(e):
+                    raise
+                limiter.throttled(retry_after_seconds(e))
+        metrics.observe("aroma_tts_stream_seconds", time.perf_counter() - started, model=self.model)
+
+    async def aiter_audio(self, text: str) -> AsyncIterator[Tuple[bytes, str]]:
+        """Async version of `iter_audio`, using the client's asyncio API."""
+        contents, config = self._request(text)
+        limiter = get_rate_limiter(f"tts:{self.model}")
+        started = time.perf_counter()
+        first_chunk = True
+        for attempt in range(RATE_LIMIT_MAX_RETRIES + 1):
+            try:
+                async with limiter.aslot():
+                    stream = await self.client.aio.models.generate_content_stream(
+                        model=self.model,
+                        contents=contents,
+                        config=config,
+                    )
+                    async for chunk in stream:
+                        audio = self._inline_audio(chunk)
+                        if audio:
+                            if first_chunk:
+                                metrics.observe("aroma_tts_first_chunk_seconds", time.perf_counter() - started, model=self.model)
+                                first_chunk = False
+                            yield audio
+                limiter.succeeded()
+                break
+            except Exception as e:
+                if not first_chunk or attempt == RATE_LIMIT_MAX_RETRIES or not is_rate_limited(e):
+                    raise
+                limiter.throttled(retry_after_seconds(e))
+        metrics.observe("aroma_tts_stream_seconds", time.perf_counter() - started, model=self.model)
+
+    async def asynthesize_pcm(self, text: str) -> Tuple[bytes, dict]:
+        """
+        Synthesizes `text` and returns (raw PCM bytes, {"bits_per_sample", "rate"}).
+        Raises ValueError if the model answers with an encoded format instead of PCM.
+        """
+        pcm = bytearray()
+        params = None
+        async for data, mime in self.aiter_audio(text):
+            if not mime.startswith("audio/L"):
+                raise ValueError(f"Expected raw PCM audio, got '{mime}'.")
+            params = params or self.parse_audio_mime_type(mime)
+            pcm += data
+        return bytes(pcm), params or self.parse_audio_mime_type("audio/L16")
+
+    def stream_wav(self, text: str) -> Iterator[bytes]:
+        """
+        Yields a playable byte stream while synthesis is still running: a WAV header with
+        streaming sizes followed by raw PCM for L16 audio, or the encoded bytes otherwise.
+        """
+        header_sent = False
+        for data, mime in self.iter_audio(text):
+            if mime.startswith("audio/L") and not header_sent:
+                params = self.parse_audio_mime_type(mime)
+                yield wav_header(STREAMING_WAV_SIZE, params["rate"], params["bits_per_sample"])
+            header_sent = True
+            yield data
+
+    async def astream_wav(self, text: str) -> AsyncIterator[bytes]:
+        """Async version of `stream_wav`."""
+        header_sent = False
+        async for data, mime in self.aiter_audio(text):
+            if mime.startswith("audio/L") and not header_sent:
+                params = self.parse_audio_mime_type(mime)
+                yield wav_header(STREAMING_WAV_SIZE, params["rate"], params["bits_per_sample"])
+            header_sent = True
+            yield data
+
+    def generate_audio(self, text: str, output_path: str = "output", base_filename: str = "tts_audio",
+                       cancel: Optional[threading.Event] = None) -> str:
         output_dir = Path(output_path)
         output_dir.mkdir(parents=True, exist_ok=True)
 
-        file_index = 0
+        writer = None
+        raw_file = None
         output_file_path = None
-
-        for chunk in self.client.models.generate_content_stream(
-            model=self.model,
-            contents=contents,
-            config=config,
-        ):
-            parts = chunk.candidates[0].content.parts if chunk.candidates else None
-            if parts and parts[0].inline_data and parts[0].inline_data.data:
-                inline_data = parts[0].inline_data
-                mime = inline_data.mime_type or "audio/mpeg"
-                extension = mimetypes.guess_extension(mime) or ".mp3"
-                data = inline_data.data
-
-                # Only convert to WAV if it's raw PCM data (e.g., audio/L16)
+        completed = False
+        try:
+            for data, mime in self.iter_audio(text, cancel):
+                # Raw PCM (e.g. audio/L16) is appended to one WAV; other formats are appended as-is.
                 if mime.startswith("audio/L"):
-                    data = self.convert_to_wav(data, mime)
-                    extension = ".wav"
-
-                filename = output_dir / f"{base_filename}_{file_index}{extension}"
-                with open(filename, "wb") as f:
-                    f.write(data)
-                    print(f"✅ Saved audio to: {filename}")
-                output_file_path = str(filename)
-                file_index += 1
+                    if writer is None:
+                        params = self.parse_audio_mime_type(mime)
+                        output_file_path = output_dir / f"{base_filename}.wav"
+                        writer = WavStreamWriter(output_file_path, params["rate"], params["bits_per_sample"])
+                    writer.write(data)
+                else:
+                    if raw_file is None:
+                        extension = mimetypes.guess_extension(mime) or ".mp3"
+                        output_file_path = output_dir / f"{base_filename}{extension}"
+                        raw_file = open(output_file_path, "wb")
+                    raw_file.write(data)
+            completed = True
+        finally:
+            if writer is not None:
+                writer.close()
+            if raw_file is not None:
+                raw_file.close()
+            if not completed and output_file_path is not None:
+                # Do not leave a truncated file behind (e.g. after SynthesisCancelled).
+                output_file_path.unlink(missing_ok=True)
 
-        return output_file_path
+        if output_file_path is not None:
+            print(f"✅ Saved audio to: {output_file_path}")
+            return str(output_file_path)
+        return None
 
     @staticmethod
     def convert_to_wav(audio_data: bytes, mime_type: str) -> bytes:
         params = GeminiTTSGenerator.parse_audio_mime_type(mime_type)
-        bits_per_sample = params["bits_per_sample"]
-        rate = params["rate"]
-        num_channels = 1
-        data_size = len(audio_data)
-        bytes_per_sample = bits_per_sample // 8
-        block_align = num_channels * bytes_per_sample
-        byte_rate = rate * block_align
-        chunk_size = 36 + data_size
-
-        header = struct.pack(
-            "<4sI4s4sIHHIIHH4sI",
-            b"RIFF",
-            chunk_size,
-            b"WAVE",
-            b"fmt ",
-            16,
-            1,
-            num_channels,
-            rate,
-            byte_rate,
-            block_align,
-            bits_per_sample,
-            b"data",
-            data_size,
-        )
-        return header + audio_data
+        return wav_header(len(audio_data), params["rate"], params["bits_per_sample"]) + audio_data
 
     @staticmethod
     def parse_audio_mime_type(mime_type: str) -> dict:
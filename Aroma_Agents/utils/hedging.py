@@ -0,0 +1,223 @@
+# Aroma_Agents/utils/hedging.py
+
+"""
+Hedged LLM calls for idempotent stages (AROMA_HEDGE_AGENTS, off by default).
+
+A call that has not answered after the HEDGE_PERCENTILE latency of its stage's recent calls is
+sent a second time, and whichever attempt answers first wins; the other one is cancelled. The
+threshold adapts to each stage (HEDGE_INITIAL_DELAY until HEDGE_MIN_SAMPLES calls are known,
+never below HEDGE_MIN_DELAY), so only the slow tail is duplicated. A process-wide budget caps
+the extra calls at HEDGE_BUDGET per call (plus a small burst), so hedging cannot multiply our
+quota use when the model is slow for everyone.
+
+`HedgedLlm` sits outside `GovernedLlm`: every attempt waits for the rate limiter on its own.
+Only stages whose calls can safely run twice should be hedged (structured extraction, no side
+effects in the model call itself).
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from contextlib import aclosing
+from typing import AsyncGenerator, Deque, Dict, List, Optional
+
+from google.adk.agents import BaseAgent, LlmAgent
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+
+from Aroma_Agents.utils.config import (
+    HEDGE_AGENTS,
+    HEDGE_BUDGET,
+    HEDGE_INITIAL_DELAY,
+    HEDGE_MIN_DELAY,
+    HEDGE_MIN_SAMPLES,
+    HEDGE_PERCENTILE,
+)
+from Aroma_Agents.utils.metrics import registry as metrics
+
+# Recent first-response latencies kept per stage for the threshold.
+HEDGE_WINDOW = 500
+# Hedges that may be sent at once before the budget has built up.
+HEDGE_BURST = 5.0
+
+metrics.describe("aroma_llm_hedges_total", "Hedged LLM calls per agent and outcome (sent, won, lost, no_budget).")
+metrics.describe("aroma_llm_hedge_delay_seconds", "Delay after which a slow LLM call was hedged, per agent.")
+
+_DONE = object()
+
+
+class HedgeBudget:
+    """Token bucket that earns `ratio` hedges per call, up to `burst`."""
+
+    def __init__(self, ratio: float = HEDGE_BUDGET, burst: float = HEDGE_BURST):
+        self.ratio = ratio
+        self.burst = burst
+        self._lock = threading.Lock()
+        self._tokens = burst
+
+    def record_call(self):
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            if self._tokens < 1.0:
+                return False
+            self._tokens -= 1.0
+            return True
+
+
+class HedgePolicy:
+    """Adaptive hedging delay for one stage: a percentile of its recent first-response latencies."""
+
+    def __init__(self, percentile: float = HEDGE_PERCENTILE, initial_delay: float = HEDGE_INITIAL_DELAY,
+                 min_delay: float = HEDGE_MIN_DELAY, min_samples: int = HEDGE_MIN_SAMPLES):
+        self.percentile = percentile
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self._lock = threading.Lock()
+        self._latencies: Deque[float] = deque(maxlen=HEDGE_WINDOW)
+
+    def observe(self, seconds: float):
+        with self._lock:
+            self._latencies.append(seconds)
+
+    def delay(self) -> float:
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return self.initial_delay
+            ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, round(self.percentile / 100 * (len(ordered) - 1)))
+        return max(self.min_delay, ordered[index])
+
+
+budget = HedgeBudget()
+_policies: Dict[str, HedgePolicy] = {}
+_policies_lock = threading.Lock()
+
+
+def get_hedge_policy(agent_name: str) -> HedgePolicy:
+    with _policies_lock:
+        if agent_name not in _policies:
+            _policies[agent_name] = HedgePolicy()
+        return _policies[agent_name]
+
+
+class _Attempt:
+    """One call of the wrapped model, pumped into a queue by its own task."""
+
+    def __init__(self, llm: BaseLlm, llm_request: LlmRequest, stream: bool, hedge: bool):
+        self.hedge = hedge
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.task = asyncio.create_task(self._pump(llm, llm_request, stream))
+
+    async def _pump(self, llm: BaseLlm, llm_request: LlmRequest, stream: bool):
+        try:
+            async with aclosing(llm.generate_content_async(llm_request, stream=stream)) as responses:
+                async for response in responses:
+                    self.queue.put_nowait(response)
+        except Exception as e:
+            self.queue.put_nowait(e)
+        self.queue.put_nowait(_DONE)
+
+
+class HedgedLlm(BaseLlm):
+    """
+    Wraps an agent's model: a call still unanswered after the stage's hedging delay is sent
+    again (budget permitting) and the first attempt to answer is streamed to the agent.
+    """
+
+    inner: BaseLlm
+    agent_name: str
+
+    async def _first_response(self, attempts: List[_Attempt], llm_request: LlmRequest, stream: bool, delay: float):
+        """Waits for the first attempt to answer, hedging once after `delay`; returns (attempt, response)."""
+        hedge_at: Optional[float] = time.monotonic() + delay
+        getters: Dict[asyncio.Task, _Attempt] = {}
+        try:
+            while True:
+                for attempt in attempts:
+                    if attempt not in getters.values():
+                        getters[asyncio.create_task(attempt.queue.get())] = attempt
+                timeout = None if hedge_at is None else max(0.0, hedge_at - time.monotonic())
+                done, _ = await asyncio.wait(getters, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    hedge_at = None
+                    if budget.try_spend():
+                        metrics.increment("aroma_llm_hedges_total", agent=self.agent_name, outcome="sent")
+                        metrics.observe("aroma_llm_hedge_delay_seconds", delay, agent=self.agent_name)
+                        attempts.append(_Attempt(self.inner, llm_request, stream, hedge=True))
+                    else:
+                        metrics.increment("aroma_llm_hedges_total", agent=self.agent_name, outcome="no_budget")
+                    continue
+                for getter in done:
+                    attempt, item = getters.pop(getter), getter.result()
+                    if isinstance(item, LlmResponse):
+                        return attempt, item
+                    # Failed (or ended) without an answer: the other attempt may still answer.
+                    attempts.remove(attempt)
+                    if not attempts:
+                        if isinstance(item, Exception):
+                            raise item
+                        return attempt, None
+                    # No point hedging once the only attempt left is the one we would duplicate.
+                    hedge_at = None
+        finally:
+            for getter in getters:
+                getter.cancel()
+
+    async def generate_content_async(self, llm_request: LlmRequest, stream: bool = False) -> AsyncGenerator[LlmResponse, None]:
+        policy = get_hedge_policy(self.agent_name)
+        budget.record_call()
+        started = time.monotonic()
+        attempts = [_Attempt(self.inner, llm_request, stream, hedge=False)]
+        try:
+            winner, response = await self._first_response(attempts, llm_request, stream, policy.delay())
+            policy.observe(time.monotonic() - started)
+            if len(attempts) > 1:
+                outcome = "won" if winner.hedge else "lost"
+                metrics.increment("aroma_llm_hedges_total", agent=self.agent_name, outcome=outcome)
+                print(f"🏁 {self.agent_name}: hedged call {outcome} after {time.monotonic() - started:.2f}s")
+            for attempt in attempts:
+                if attempt is not winner:
+                    attempt.task.cancel()
+            if response is None:
+                return
+            yield response
+            while True:
+                item = await winner.queue.get()
+                if item is _DONE:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            for attempt in attempts:
+                attempt.task.cancel()
+            await asyncio.gather(*(attempt.task for attempt in attempts), return_exceptions=True)
+
+    def connect(self, llm_request: LlmRequest):
+        return self.inner.connect(llm_request)
+
+
+def hedge_agent_tree(root: BaseAgent, agent_names: List[str] = HEDGE_AGENTS) -> int:
+    """
+    Routes through `HedgedLlm` the model of every LlmAgent under `root` that is named in
+    `agent_names` or sits below an agent that is (e.g. the fallback LLM of the indexed
+    plant_mapper_agent). Call after `govern_agent_tree`. Returns the number of wrapped models;
+    safe to call twice.
+    """
+    count = 0
+    stack = [(root, False)]
+    while stack:
+        agent, hedged = stack.pop()
+        hedged = hedged or agent.name in agent_names
+        if hedged and isinstance(agent, LlmAgent) and not isinstance(agent.model, HedgedLlm):
+            inner = agent.canonical_model
+            agent.model = HedgedLlm(model=inner.model, inner=inner, agent_name=agent.name)
+            count += 1
+        stack.extend((sub_agent, hedged) for sub_agent in agent.sub_agents)
+    return count
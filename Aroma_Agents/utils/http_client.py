@@ -0,0 +1,194 @@
+# Aroma_Agents/utils/http_client.py
+
+import contextvars
+import threading
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from Aroma_Agents.utils.config import (
+    SUNO_HTTP_BACKOFF_FACTOR,
+    SUNO_HTTP_MAX_RETRIES,
+    SUNO_HTTP_POOL_BLOCK,
+    SUNO_HTTP_POOL_SIZE,
+)
+from Aroma_Agents.utils.metrics import registry as metrics
+from Aroma_Agents.utils.rate_limiter import get_rate_limiter, parse_retry_after
+
+# Only these methods are retried after the request may have reached the server.
+# Connection errors (request never sent) are retried for every method, POST included.
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+# Limiter of the request being sent, so transport-level 429 retries slow it down too.
+_current_limiter: contextvars.ContextVar = contextvars.ContextVar("aroma_http_limiter", default=None)
+
+
+class _RetryCounter:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def add(self):
+        with self._lock:
+            self.count += 1
+
+
+class _CountingRetry(Retry):
+    """urllib3 Retry that reports every retry attempt to a shared counter."""
+
+    def __init__(self, *args, counter: Optional[_RetryCounter] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.counter = counter or _RetryCounter()
+
+    def new(self, **kw):
+        retry = super().new(**kw)
+        retry.counter = self.counter
+        return retry
+
+    def increment(self, *args, **kwargs):
+        retry = super().increment(*args, **kwargs)
+        # Only reached when urllib3 decided to retry (otherwise increment raises).
+        self.counter.add()
+        metrics.increment("aroma_http_retries_total", method=kwargs.get("method") or (args[0] if args else ""))
+        response = kwargs.get("response")
+        limiter = _current_limiter.get()
+        if limiter is not None and response is not None and response.status == 429:
+            limiter.throttled(parse_retry_after(response.headers.get("Retry-After")))
+        return retry
+
+
+class PooledHttpClient:
+    """
+    A thread-safe HTTP client that reuses keep-alive connections across calls and threads.
+
+    All threads share one urllib3 connection pool (which is thread-safe); each thread gets its
+    own lightweight `requests.Session` mounted on it, so no cookie or header state is shared
+    between concurrent requests. Retries happen at the transport level and respect
+    `Retry-After`; non-idempotent requests are only retried when the connection failed.
+    """
+
+    def __init__(
+        self,
+        pool_size: int = SUNO_HTTP_POOL_SIZE,
+        max_retries: int = SUNO_HTTP_MAX_RETRIES,
+        backoff_factor: float = SUNO_HTTP_BACKOFF_FACTOR,
+        pool_block: bool = SUNO_HTTP_POOL_BLOCK,
+    ):
+        self.pool_size = pool_size
+        self._retry_counter = _RetryCounter()
+        retry = _CountingRetry(
+            total=max_retries,
+            connect=max_retries,
+            read=max_retries,
+            status=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=IDEMPOTENT_METHODS,
+            respect_retry_after_header=True,
+            raise_on_status=False,
+            counter=self._retry_counter,
+        )
+        self._adapter = HTTPAdapter(
+            pool_connections=4,  # number of distinct hosts kept in the pool manager
+            pool_maxsize=pool_size,
+            max_retries=retry,
+            pool_block=pool_block,
+        )
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._errors = 0
+
+    def _session(self) -> requests.Session:
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.mount("https://", self._adapter)
+            session.mount("http://", self._adapter)
+            self._local.session = session
+        return session
+
+    def request(self, method: str, url: str, rate_limit: Optional[str] = None, **kwargs) -> requests.Response:
+        """
+        Sends a request over the shared pool. With `rate_limit` (a limiter key such as "suno")
+        the request waits for that limiter first and reports a final 429 back to it.
+        """
+        if rate_limit is None:
+            return self._send(method, url, **kwargs)
+        limiter = get_rate_limiter(rate_limit)
+        token = _current_limiter.set(limiter)
+        try:
+            with limiter.slot():
+                response = self._send(method, url, **kwargs)
+        finally:
+            _current_limiter.reset(token)
+        if response.status_code == 429:
+            limiter.throttled(parse_retry_after(response.headers.get("Retry-After")))
+        else:
+            limiter.succeeded()
+        return response
+
+    def _send(self, method: str, url: str, **kwargs) -> requests.Response:
+        with self._lock:
+            self._requests += 1
+        try:
+            return self._session().request(method, url, **kwargs)
+        except requests.exceptions.RequestException:
+            with self._lock:
+                self._errors += 1
+            raise
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """Returns request/retry counters and per-host connection pool usage."""
+        hosts = []
+        pools = self._adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            idle = sum(1 for conn in list(pool.pool.queue) if conn is not None) if pool.pool else 0
+            hosts.append({
+                "host": f"{pool.scheme}://{pool.host}:{pool.port}",
+                "maxsize": pool.pool.maxsize if pool.pool else 0,
+                "connections_opened": pool.num_connections,
+                "requests": pool.num_requests,
+                "idle_connections": idle,
+            })
+        with self._lock:
+            return {
+                "pool_size": self.pool_size,
+                "requests": self._requests,
+                "errors": self._errors,
+                "retries": self._retry_counter.count,
+                "hosts": hosts,
+            }
+
+    def close(self):
+        self._adapter.close()
+
+
+_default_client: Optional[PooledHttpClient] = None
+_default_client_lock = threading.Lock()
+
+
+def get_http_client() -> PooledHttpClient:
+    """Returns the process-wide pooled client used for the Suno API."""
+    global _default_client
+    if _default_client is None:
+        with _default_client_lock:
+            if _default_client is None:
+                _default_client = PooledHttpClient()
+    return _default_client
+
+
+def pool_stats() -> Dict[str, Any]:
+    return get_http_client().pool_stats()
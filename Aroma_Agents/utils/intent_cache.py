@@ -0,0 +1,205 @@
+# Aroma_Agents/utils/intent_cache.py
+
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from contextlib import aclosing
+from pathlib import Path
+from typing import AsyncGenerator, Dict, List, Optional
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.genai import types
+
+from Aroma_Agents.utils.config import (
+    INTENT_CACHE_ENABLED,
+    INTENT_CACHE_MAX_ENTRIES,
+    INTENT_CACHE_PATH,
+    INTENT_CACHE_TTL_SECONDS,
+)
+
+INTENT_FIELDS = ("mood", "context", "preferences")
+# State keys produced by compound_searcher -> plant_mapper -> recommender.
+AROMA_RESULT_KEYS = ["compound_candidates", "matching_plants_or_products", "recommendation_result"]
+
+
+def _normalize_text(value) -> str:
+    text = re.sub(r"[^\w\s,]", " ", str(value or "").lower())
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def normalize_intent(intent) -> Dict[str, str]:
+    """
+    Reduces an IntentOutput (dict, model or JSON string) to the form used as cache key.
+
+    Case, punctuation and whitespace are folded, and comma-separated preferences are sorted,
+    so "Tea, diffuser" and "diffuser , tea" hit the same entry.
+    """
+    if isinstance(intent, str):
+        try:
+            intent = json.loads(intent)
+        except ValueError:
+            intent = {"mood": intent}
+    if hasattr(intent, "model_dump"):
+        intent = intent.model_dump()
+    intent = intent if isinstance(intent, dict) else {}
+
+    normalized = {field: _normalize_text(intent.get(field)) for field in INTENT_FIELDS}
+    preferences = [item.strip() for item in normalized["preferences"].split(",") if item.strip()]
+    normalized["preferences"] = ", ".join(sorted(set(preferences)))
+    return normalized
+
+
+class IntentCache:
+    """
+    TTL + LRU cache from a normalized intent to the aroma chain results.
+
+    Entries are persisted to a JSON file so a warmup run at deploy time (see `warmup.py`)
+    fills the cache for the serving processes.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = INTENT_CACHE_PATH,
+        ttl_seconds: float = INTENT_CACHE_TTL_SECONDS,
+        max_entries: int = INTENT_CACHE_MAX_ENTRIES,
+    ):
+        self.path = Path(path) if path else None
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    @staticmethod
+    def make_key(intent, namespace: str = "") -> str:
+        """`namespace` separates the results of different pipelines (e.g. the fused fast path)."""
+        key = normalize_intent(intent)
+        if namespace:
+            key["namespace"] = namespace
+        return json.dumps(key, sort_keys=True, ensure_ascii=False)
+
+    def get(self, intent, namespace: str = "") -> Optional[dict]:
+        """Returns the cached state values for `intent`, or None on a miss or an expired entry."""
+        key = self.make_key(intent, namespace)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.time() - entry["created"] > self.ttl_seconds:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry["values"]
+
+    def put(self, intent, values: dict, namespace: str = ""):
+        key = self.make_key(intent, namespace)
+        with self._lock:
+            self._entries[key] = {"created": time.time(), "values": values}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._save()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._save()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    def _load(self):
+        if self.path is None or not self.path.exists():
+            return
+        try:
+            entries = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        now = time.time()
+        for key, entry in sorted(entries.items(), key=lambda item: item[1].get("created", 0)):
+            if now - entry.get("created", 0) <= self.ttl_seconds:
+                self._entries[key] = entry
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _save(self):
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_text(json.dumps(self._entries, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp_path, self.path)
+
+
+_default_cache: Optional[IntentCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_intent_cache() -> IntentCache:
+    """Returns the process-wide cache backed by INTENT_CACHE_PATH."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = IntentCache()
+        return _default_cache
+
+
+class IntentCacheAgent(BaseAgent):
+    """
+    Wraps the aroma chain (its single sub-agent) with the intent cache. Wrappers around
+    different pipelines use different `namespace`s so their results are kept apart.
+
+    On a hit the cached `compound_candidates`, `matching_plants_or_products` and
+    `recommendation_result` are written to state in one event and the chain is skipped, so
+    no LLM is called. On a miss the chain runs and its results are stored for next time.
+    """
+
+    input_keys: List[str] = ["intent"]
+    output_keys: List[str] = AROMA_RESULT_KEYS
+    enabled: bool = INTENT_CACHE_ENABLED
+    namespace: str = ""
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        chain = self.sub_agents[0]
+        intent = ctx.session.state.get("intent")
+        cache = get_intent_cache() if self.enabled and intent else None
+
+        cached = cache.get(intent, self.namespace) if cache else None
+        if cached is not None:
+            print(f"⚡ Intent cache hit for mood: {normalize_intent(intent)['mood'] or '-'}")
+            yield Event(
+                invocation_id=ctx.invocation_id,
+                author=self.name,
+                branch=ctx.branch,
+                content=types.Content(
+                    role="model",
+                    parts=[types.Part(text=json.dumps(cached.get("recommendation_result"), ensure_ascii=False))],
+                ),
+                actions=EventActions(state_delta=dict(cached)),
+            )
+            return
+
+        async with aclosing(chain.run_async(ctx)) as events:
+            async for event in events:
+                yield event
+
+        if cache:
+            values = {key: ctx.session.state.get(key) for key in self.output_keys}
+            if all(values.values()):
+                cache.put(intent, values, self.namespace)
@@ -0,0 +1,22 @@
+# Aroma_Agents/utils/lazy.py
+
+import importlib
+import types
+
+
+class LazyModule(types.ModuleType):
+    """
+    Stand-in for a module that is only imported on first attribute access, so optional or
+    heavy backends (e.g. `requests` for the Suno client) stay off the startup path.
+    """
+
+    def __getattr__(self, attribute: str):
+        # Only called for attributes not copied in yet; importlib's locks make this thread-safe.
+        module = importlib.import_module(self.__name__)
+        self.__dict__.update(module.__dict__)
+        return getattr(module, attribute)
+
+
+def lazy_module(name: str) -> types.ModuleType:
+    """Returns `name` lazily: the real import happens when an attribute is first used."""
+    return LazyModule(name)
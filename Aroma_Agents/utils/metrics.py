@@ -0,0 +1,367 @@
+# Aroma_Agents/utils/metrics.py
+
+import json
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+from weakref import WeakSet
+
+from google.adk.agents import BaseAgent, LlmAgent
+
+logger = logging.getLogger("Aroma_Agents.metrics")
+
+# Seconds; LLM calls are ~0.5-5s, Suno jobs can take minutes.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+QUANTILES = (0.5, 0.95, 0.99)
+# Recent samples kept per series for the p50/p95/p99 estimates.
+RESERVOIR_SIZE = 2048
+
+LabelSet = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Dict[str, object]) -> LabelSet:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(labels: LabelSet, **extra) -> str:
+    items = list(labels) + [(key, str(value)) for key, value in extra.items()]
+    if not items:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in items)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(items, escaped)) + "}"
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(q * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class _Histogram:
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.samples: Deque[float] = deque(maxlen=RESERVOIR_SIZE)
+
+    def observe(self, value: float):
+        self.count += 1
+        self.sum += value
+        self.samples.append(value)
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+
+
+class MetricsRegistry:
+    """
+    Thread-safe counters and histograms with a Prometheus text exposition.
+
+    Histograms also keep a window of recent samples so `percentiles()` and the exported
+    `<name>_quantile` gauges can report p50/p95/p99 per label set.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelSet, float]] = {}
+        self._histograms: Dict[str, Dict[LabelSet, _Histogram]] = {}
+        self._help: Dict[str, str] = {}
+
+    def describe(self, name: str, help_text: str):
+        self._help[name] = help_text
+
+    def increment(self, name: str, amount: float = 1, **labels):
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            key = _labels(labels)
+            series[key] = series.get(key, 0) + amount
+
+    def observe(self, name: str, value: float, **labels):
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            key = _labels(labels)
+            if key not in series:
+                series[key] = _Histogram(self.buckets)
+            series[key].observe(value)
+
+    @contextmanager
+    def timer(self, name: str, **labels) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def counter_value(self, name: str, **labels) -> float:
+        with self._lock:
+            return self._counters.get(name, {}).get(_labels(labels), 0)
+
+    def percentiles(self, name: str, **labels) -> Dict[str, float]:
+        """Returns {"count", "p50", "p95", "p99"} for one histogram series."""
+        with self._lock:
+            histogram = self._histograms.get(name, {}).get(_labels(labels))
+            samples = sorted(histogram.samples) if histogram else []
+            count = histogram.count if histogram else 0
+        result = {"count": count}
+        result.update({f"p{int(q * 100)}": _percentile(samples, q) for q in QUANTILES})
+        return result
+
+    def snapshot(self) -> dict:
+        """All series as plain data: counters by label set, histograms with count/sum/percentiles."""
+        with self._lock:
+            counters = {
+                name: [{"labels": dict(key), "value": value} for key, value in series.items()]
+                for name, series in self._counters.items()
+            }
+            histograms = {}
+            for name, series in self._histograms.items():
+                histograms[name] = []
+                for key, histogram in series.items():
+                    samples = sorted(histogram.samples)
+                    entry = {"labels": dict(key), "count": histogram.count, "sum": histogram.sum}
+                    entry.update({f"p{int(q * 100)}": _percentile(samples, q) for q in QUANTILES})
+                    histograms[name].append(entry)
+        return {"counters": counters, "histograms": histograms}
+
+    def render_prometheus(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} counter")
+                for key, value in series.items():
+                    lines.append(f"{name}{_format_labels(key)} {value:g}")
+
+            for name, series in sorted(self._histograms.items()):
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} histogram")
+                quantile_lines = []
+                for key, histogram in series.items():
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        lines.append(f"{name}_bucket{_format_labels(key, le=f'{bound:g}')} {count}")
+                    lines.append(f"{name}_bucket{_format_labels(key, le='+Inf')} {histogram.count}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {histogram.sum:.6f}")
+                    lines.append(f"{name}_count{_format_labels(key)} {histogram.count}")
+                    samples = sorted(histogram.samples)
+                    for q in QUANTILES:
+                        quantile_lines.append(
+                            f"{name}_quantile{_format_labels(key, quantile=f'{q:g}')} {_percentile(samples, q):.6f}"
+                        )
+                lines.append(f"# TYPE {name}_quantile gauge")
+                lines.extend(quantile_lines)
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+
+registry = MetricsRegistry()
+registry.describe("aroma_agent_duration_seconds", "Wall time of each agent run.")
+registry.describe("aroma_agent_queue_seconds", "Time from the start of the invocation until the agent started.")
+registry.describe("aroma_model_duration_seconds", "Wall time of each LLM call, per agent.")
+registry.describe("aroma_model_tokens_total", "Prompt / response tokens reported by the model, per agent.")
+registry.describe("aroma_tool_duration_seconds", "Wall time of each tool call.")
+registry.describe("aroma_tool_errors_total", "Tool calls that raised.")
+registry.describe("aroma_tts_first_chunk_seconds", "Time until the TTS stream delivered its first audio chunk.")
+registry.describe("aroma_tts_stream_seconds", "Wall time of a whole TTS stream.")
+registry.describe("aroma_suno_polls_total", "Suno record-info status checks.")
+registry.describe("aroma_http_retries_total", "Transport-level HTTP retries of the pooled client.")
+
+
+def log_event(kind: str, **fields):
+    """Writes one structured JSON log line (logger "Aroma_Agents.metrics")."""
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(json.dumps({"event": kind, "ts": time.time(), **fields}, ensure_ascii=False, default=str))
+
+
+class PipelineInstrumentation:
+    """
+    ADK callbacks that time every agent, LLM call and tool in an agent tree.
+
+    Install with `instrument_agent_tree(root_agent)`. Queue time is measured from the moment
+    the root agent of the invocation started, so in the DAG pipeline it shows how long a
+    stage waited for its inputs. A run that raises or is cancelled never reaches the root's
+    after-callback; whoever runs it calls `forget_invocations()` when it ends.
+    """
+
+    def __init__(self, metrics: MetricsRegistry = registry):
+        self.metrics = metrics
+        self._lock = threading.Lock()
+        self._invocation_start: Dict[str, float] = {}
+        self._agent_start: Dict[Tuple[str, str], float] = {}
+        self._model_start: Dict[Tuple[str, str], float] = {}
+        self._tool_start: Dict[Tuple[str, str], float] = {}
+        self.root_name: Optional[str] = None
+        _instrumentations.add(self)
+
+    def forget(self, invocation_id: str):
+        """Drops the start times an interrupted run of this invocation left behind."""
+        with self._lock:
+            self._invocation_start.pop(invocation_id, None)
+            for store in (self._agent_start, self._model_start, self._tool_start):
+                for key in [key for key in store if key[0] == invocation_id]:
+                    del store[key]
+
+    # --- agents ---
+    def before_agent(self, callback_context):
+        now = time.perf_counter()
+        invocation_id, agent = callback_context.invocation_id, callback_context.agent_name
+        with self._lock:
+            started = self._invocation_start.setdefault(invocation_id, now)
+            self._agent_start[(invocation_id, agent)] = now
+        queue_seconds = now - started
+        self.metrics.observe("aroma_agent_queue_seconds", queue_seconds, agent=agent)
+        log_event("agent_start", invocation_id=invocation_id, agent=agent, queue_seconds=round(queue_seconds, 6))
+        return None
+
+    def after_agent(self, callback_context):
+        now = time.perf_counter()
+        invocation_id, agent = callback_context.invocation_id, callback_context.agent_name
+        with self._lock:
+            started = self._agent_start.pop((invocation_id, agent), None)
+        if agent == self.root_name:
+            self.forget(invocation_id)
+        if started is not None:
+            seconds = now - started
+            self.metrics.observe("aroma_agent_duration_seconds", seconds, agent=agent)
+            log_event("agent_end", invocation_id=invocation_id, agent=agent, seconds=round(seconds, 6))
+        return None
+
+    # --- LLM calls ---
+    def before_model(self, callback_context, llm_request):
+        with self._lock:
+            self._model_start[(callback_context.invocation_id, callback_context.agent_name)] = time.perf_counter()
+        return None
+
+    def after_model(self, callback_context, llm_response):
+        if llm_response.partial:
+            return None
+        now = time.perf_counter()
+        invocation_id, agent = callback_context.invocation_id, callback_context.agent_name
+        with self._lock:
+            started = self._model_start.pop((invocation_id, agent), None)
+        fields = {"invocation_id": invocation_id, "agent": agent}
+        if started is not None:
+            fields["seconds"] = round(now - started, 6)
+            self.metrics.observe("aroma_model_duration_seconds", now - started, agent=agent)
+        usage = llm_response.usage_metadata
+        if usage is not None:
+            fields["prompt_tokens"] = usage.prompt_token_count or 0
+            fields["response_tokens"] = usage.candidates_token_count or 0
+            self.metrics.increment("aroma_model_tokens_total", fields["prompt_tokens"], agent=agent, kind="prompt")
+            self.metrics.increment("aroma_model_tokens_total", fields["response_tokens"], agent=agent, kind="response")
+        log_event("model_call", **fields)
+        return None
+
+    # --- tools ---
+    @staticmethod
+    def _tool_key(tool_context) -> Tuple[str, str]:
+        return tool_context.invocation_id, tool_context.function_call_id or ""
+
+    def before_tool(self, tool, args, tool_context):
+        with self._lock:
+            self._tool_start[self._tool_key(tool_context)] = time.perf_counter()
+        return None
+
+    def _finish_tool(self, tool, tool_context, error: Optional[Exception] = None):
+        now = time.perf_counter()
+        with self._lock:
+            started = self._tool_start.pop(self._tool_key(tool_context), None)
+        seconds = now - started if started is not None else 0.0
+        self.metrics.observe("aroma_tool_duration_seconds", seconds, tool=tool.name)
+        fields = {"invocation_id": tool_context.invocation_id, "agent": tool_context.agent_name, "tool": tool.name}
+        if error is not None:
+            self.metrics.increment("aroma_tool_errors_total", tool=tool.name)
+            fields["error"] = repr(error)
+        log_event("tool_call", seconds=round(seconds, 6), **fields)
+
+    def after_tool(self, tool, args, tool_context, tool_response):
+        self._finish_tool(tool, tool_context)
+        return None
+
+    def on_tool_error(self, tool, args, tool_context, error):
+        self._finish_tool(tool, tool_context, error)
+        return None
+
+
+_instrumentations: "WeakSet[PipelineInstrumentation]" = WeakSet()
+
+
+def forget_invocations(invocation_ids: Iterable[str]):
+    """Drops what every instrumentation still holds for these invocations; call it when a run ends, however it ended."""
+    for invocation_id in set(invocation_ids):
+        for instrumentation in list(_instrumentations):
+            instrumentation.forget(invocation_id)
+
+
+def _add_callback(agent: BaseAgent, field: str, callback):
+    existing = getattr(agent, field)
+    callbacks = existing if isinstance(existing, list) else [existing] if existing is not None else []
+    if any(isinstance(getattr(cb, "__self__", None), PipelineInstrumentation) for cb in callbacks):
+        return  # already instrumented
+    setattr(agent, field, [callback] + callbacks if callbacks else callback)
+
+
+def instrument_agent_tree(root: BaseAgent, instrumentation: Optional[PipelineInstrumentation] = None) -> PipelineInstrumentation:
+    """Adds the timing callbacks to `root` and every agent below it (idempotent)."""
+    instrumentation = instrumentation or PipelineInstrumentation()
+    instrumentation.root_name = root.name
+    stack = [root]
+    while stack:
+        agent = stack.pop()
+        _add_callback(agent, "before_agent_callback", instrumentation.before_agent)
+        _add_callback(agent, "after_agent_callback", instrumentation.after_agent)
+        if isinstance(agent, LlmAgent):
+            _add_callback(agent, "before_model_callback", instrumentation.before_model)
+            _add_callback(agent, "after_model_callback", instrumentation.after_model)
+            _add_callback(agent, "before_tool_callback", instrumentation.before_tool)
+            _add_callback(agent, "after_tool_callback", instrumentation.after_tool)
+            _add_callback(agent, "on_tool_error_callback", instrumentation.on_tool_error)
+        stack.extend(agent.sub_agents)
+    return instrumentation
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] == "/metrics":
+            body = registry.render_prometheus().encode("utf-8")
+            content_type = "text/plain; version=0.0.4; charset=utf-8"
+        elif self.path.split("?")[0] == "/metrics.json":
+            body = json.dumps(registry.snapshot()).encode("utf-8")
+            content_type = "application/json"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server: Optional[ThreadingHTTPServer] = None
+
+
+def start_metrics_server(port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """Serves `/metrics` (Prometheus text) and `/metrics.json` from a daemon thread."""
+    global _server
+    if _server is None:
+        _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        _server.daemon_threads = True
+        threading.Thread(target=_server.serve_forever, name="aroma-metrics", daemon=True).start()
+        print(f"📈 Metrics available at http://{host}:{_server.server_address[1]}/metrics")
+    return _server
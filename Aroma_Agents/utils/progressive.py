@@ -0,0 +1,171 @@
+# Aroma_Agents/utils/progressive.py
+
+"""
+Progressive result delivery.
+
+`ProgressiveDeliveryAgent` wraps the pipeline and, next to the pipeline's own events, yields
+one short "stage result" event as soon as each result lands in session state: the intent,
+the aroma recommendation, the comforting message and its audio. Clients read them from
+`event.custom_metadata` ({"aroma_stage", "text", "elapsed_s"}), so nobody has to wait for
+the song to see the recommendation. These events have no `content`: ADK would otherwise add
+them to the LLM history of every agent that runs after them.
+
+With the background music tool the song is only started inside the pipeline; once everything
+else is delivered the agent waits (up to MUSIC_FOLLOW_UP_TIMEOUT) for the job and yields a
+follow-up "music" event with the files, or a "music_pending" event with the job id if the song
+is still being produced. The song event also carries the comfort message mixed over the song
+(see utils/audio_post.py). If the run is abandoned before that (the client disconnected), the
+song started by this run is cancelled instead of being produced for nobody.
+"""
+
+import asyncio
+import time
+from contextlib import aclosing
+from typing import Any, AsyncGenerator, Dict, Optional
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.genai import types
+
+from Aroma_Agents.utils import deadline
+from Aroma_Agents.utils.artifact_store import save_adk_artifact
+from Aroma_Agents.utils.config import AUDIO_MIX, AUDIO_POSTPROCESS, MUSIC_FOLLOW_UP_TIMEOUT, REGISTER_ADK_ARTIFACTS
+from Aroma_Agents.utils.metrics import registry as metrics
+
+# state key -> stage reported to the client, in pipeline order
+STAGE_KEYS: Dict[str, str] = {
+    "intent": "intent",
+    "recommendation_result": "recommendation",
+    "mental": "comfort",
+    "mental_audio": "audio",
+    "music_job_id": "music_started",
+    "music_files": "music",
+    "mental_audio_delivery": "voice",
+    "mixed_audio": "mix",
+}
+
+
+def _unwrap(value: Any, key: str) -> Any:
+    if isinstance(value, dict) and list(value) == [key]:
+        return value[key]
+    return value
+
+
+def stage_text(stage: str, value: Any) -> str:
+    """Short user-facing text for one stage result."""
+    value = _unwrap(value, {"recommendation": "recommendation_result"}.get(stage, stage))
+    if stage == "intent" and isinstance(value, dict):
+        details = ", ".join(str(value[field]) for field in ("context", "preferences") if value.get(field))
+        return f"🧭 Mood: {value.get('mood') or 'unknown'}" + (f" ({details})" if details else "")
+    if stage == "recommendation" and isinstance(value, dict):
+        lines = [f"🌿 {value['recommended_use']}"] if value.get("recommended_use") else []
+        lines += [f"{label}: {value[field]}" for field, label in (("scent_profile", "Scent"), ("explanation", "Why")) if value.get(field)]
+        return "\n".join(lines) or f"🌿 {value}"
+    if stage == "audio":
+        return f"🔊 Audio: {value}"
+    if stage == "voice":
+        return f"🔊 Audio (compact): {value}"
+    if stage == "mix":
+        return f"🎧 Your message over the song: {value}"
+    if stage == "music_started":
+        return f"🎵 Your song is being produced (job {value}); it will follow when it is ready."
+    if stage == "music":
+        return "🎵 Your song is ready: " + ", ".join(value if isinstance(value, list) else [str(value)])
+    return str(value)
+
+
+class ProgressiveDeliveryAgent(BaseAgent):
+    """
+    Runs its single sub-agent (the pipeline) and yields a stage-result event for every result
+    as soon as it is written, then a follow-up event for a song started in the background.
+    """
+
+    follow_up_timeout: float = MUSIC_FOLLOW_UP_TIMEOUT
+
+    def _stage_event(self, ctx: InvocationContext, stage: str, text: str, started: float,
+                     actions: Optional[EventActions] = None, final: bool = False) -> Event:
+        elapsed = time.perf_counter() - started
+        metrics.observe("aroma_stage_delivery_seconds", elapsed, stage=stage)
+        print(f"📬 {stage} delivered after {elapsed:.2f}s")
+        return Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            # Only the last event of the run carries content; nothing is left to be prompted with it.
+            content=types.Content(role="model", parts=[types.Part(text=text)]) if final else None,
+            actions=actions or EventActions(),
+            custom_metadata={"aroma_stage": stage, "text": text, "elapsed_s": round(elapsed, 3)},
+        )
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        started = time.perf_counter()
+        delivered: Dict[str, Any] = {}
+        finished = False
+        try:
+            async with aclosing(self.sub_agents[0].run_async(ctx)) as events:
+                async for event in events:
+                    yield event
+                    if event.partial or not event.actions.state_delta:
+                        continue
+                    for key, value in event.actions.state_delta.items():
+                        stage = STAGE_KEYS.get(key)
+                        if stage is not None and stage not in delivered and value:
+                            delivered[stage] = value
+                            yield self._stage_event(ctx, stage, stage_text(stage, value), started)
+
+            # Only a song started during this run; state still holds the job ids of earlier turns.
+            if "music_started" in delivered and "music" not in delivered:
+                yield await self._music_follow_up(ctx, delivered["music_started"], started, delivered.get("audio"))
+            finished = True
+        finally:
+            if not finished and "music_started" in delivered and "music" not in delivered:
+                from Aroma_Agents.tools import music_tool
+
+                music_tool.cancel_music_job(delivered["music_started"])
+
+    async def _music_follow_up(self, ctx: InvocationContext, job_id: str, started: float,
+                               voice_path: Optional[str] = None) -> Event:
+        # Imported here: the music tool pulls in the job queue and the HTTP stack.
+        from Aroma_Agents.tools import music_tool
+
+        task = music_tool.get_music_job(job_id)
+        # The follow-up waits at most for the rest of the request's budget.
+        timeout = deadline.clamp(self.follow_up_timeout)
+        if task is not None and not task.done():
+            try:
+                await asyncio.wait_for(asyncio.shield(task), timeout)
+            except asyncio.TimeoutError:
+                pass
+        status = music_tool.music_job_status(job_id)
+        if status["status"] == "pending":
+            if timeout < self.follow_up_timeout:
+                deadline.record_skip("music", "deferred")
+            return self._stage_event(ctx, "music_pending", f"🎵 {status['message']} (job {job_id})", started, final=True)
+        if status["status"] != "completed":
+            return self._stage_event(ctx, "music_failed", f"🎵 {status['message']}", started, final=True)
+
+        files = status.get("files") or []
+        state_delta = {"music_files": files}
+        text = stage_text("music", files)
+        # The pipeline's audio post-processing ran before the song existed; mix it in here, with
+        # this run's monologue only (state may still hold an earlier turn's).
+        if AUDIO_POSTPROCESS and AUDIO_MIX and voice_path and files:
+            from Aroma_Agents.utils import audio_post
+
+            try:
+                mixed = await asyncio.to_thread(audio_post.mix_with_song, voice_path, files)
+            except Exception as e:
+                # The song is delivered without the mix rather than not at all.
+                print(f"❌ Voice-over-music mix failed: {e}")
+                mixed = None
+            if mixed:
+                state_delta["mixed_audio"] = mixed
+                text += "\n" + stage_text("mix", mixed)
+        actions = EventActions(state_delta=state_delta)
+        if REGISTER_ADK_ARTIFACTS:
+            callback_context = CallbackContext(ctx, event_actions=actions)
+            for path in files + ([state_delta["mixed_audio"]] if "mixed_audio" in state_delta else []):
+                await save_adk_artifact(callback_context, path)
+        return self._stage_event(ctx, "music", text, started, actions, final=True)
@@ -0,0 +1,348 @@
+# Aroma_Agents/utils/rate_limiter.py
+
+"""
+Process-wide rate limiting for Gemini (LLM and TTS) and Suno calls.
+
+One `RateLimiter` per model / endpoint combines
+
+* a token bucket (requests per minute, with a burst allowance),
+* a cap on concurrent requests whose free slots are handed out round-robin across sessions,
+  so one chatty session cannot starve the others, and
+* 429 handling: a throttled call blocks the limiter for the server's Retry-After (or an
+  exponential backoff) and halves its rate, which then creeps back up with every success.
+
+Under quota pressure requests therefore queue and slow down instead of failing in bursts.
+"""
+
+import asyncio
+import contextvars
+import json
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncGenerator, AsyncIterator, Deque, Dict, Iterator, Optional
+
+from google.adk.agents import BaseAgent, LlmAgent
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+
+from Aroma_Agents.utils.config import (
+    GEMINI_MAX_IN_FLIGHT,
+    GEMINI_RPM,
+    RATE_LIMIT_MAX_RETRIES,
+    RATE_LIMIT_OVERRIDES,
+    RATE_LIMITS_ENABLED,
+    SUNO_MAX_IN_FLIGHT,
+    SUNO_RPM,
+    TTS_MAX_IN_FLIGHT,
+    TTS_RPM,
+)
+from Aroma_Agents.utils.metrics import registry as metrics
+
+# Default limits per kind of limiter key ("<kind>:<model or endpoint>").
+DEFAULT_LIMITS = {
+    "gemini": {"rpm": GEMINI_RPM, "max_in_flight": GEMINI_MAX_IN_FLIGHT},
+    "tts": {"rpm": TTS_RPM, "max_in_flight": TTS_MAX_IN_FLIGHT},
+    "suno": {"rpm": SUNO_RPM, "max_in_flight": SUNO_MAX_IN_FLIGHT},
+}
+# After a 429 the rate is halved, but never below this share of the configured rate; every
+# success gives back this share until the configured rate is reached again.
+MIN_RATE_FRACTION = 0.1
+RECOVERY_FRACTION = 0.05
+# Backoff when a 429 carries no Retry-After: doubles per consecutive 429, capped.
+THROTTLE_BACKOFF_INITIAL = 1.0
+THROTTLE_BACKOFF_MAX = 60.0
+
+# The session a call is made for; requests of different sessions are served round-robin.
+current_session: contextvars.ContextVar[str] = contextvars.ContextVar("aroma_rate_limit_session", default="")
+
+
+class _Waiter:
+    """A queued request: woken through a threading.Event (sync callers) or a future (async)."""
+
+    def __init__(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.loop = loop
+        self.future = loop.create_future() if loop else None
+        self.event = None if loop else threading.Event()
+        self.granted = False
+        self.cancelled = False
+
+    def grant(self):
+        self.granted = True
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(_set_granted, self.future)
+        else:
+            self.event.set()
+
+
+def _set_granted(future: asyncio.Future):
+    if not future.done():
+        future.set_result(None)
+
+
+class RateLimiter:
+    """Token bucket + fair concurrency limit + 429 backoff for one model or endpoint."""
+
+    def __init__(self, name: str, rpm: float = 0, max_in_flight: int = 0, burst: Optional[float] = None):
+        self.name = name
+        self.rpm = rpm
+        self.max_in_flight = max_in_flight
+        # Ten seconds' worth of requests may go out at once.
+        self.burst = burst if burst is not None else max(1.0, rpm / 6)
+        self._lock = threading.Lock()
+        self._rate = rpm / 60.0
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._consecutive_throttles = 0
+        self._in_flight = 0
+        self._queues: "OrderedDict[str, Deque[_Waiter]]" = OrderedDict()
+        self._throttled = 0
+
+    # --- concurrency slots ---
+    def _take_slot(self, waiter_factory) -> Optional[_Waiter]:
+        """Takes a slot right away (returns None) or queues a waiter for the current session."""
+        with self._lock:
+            if not self._queues and (not self.max_in_flight or self._in_flight < self.max_in_flight):
+                self._in_flight += 1
+                return None
+            waiter = waiter_factory()
+            self._queues.setdefault(current_session.get(), deque()).append(waiter)
+            return waiter
+
+    def _release_slot(self):
+        with self._lock:
+            self._in_flight -= 1
+            while self._queues and (not self.max_in_flight or self._in_flight < self.max_in_flight):
+                session, queue = next(iter(self._queues.items()))
+                waiter = queue.popleft()
+                if queue:
+                    self._queues.move_to_end(session)  # round-robin: this session goes last
+                else:
+                    del self._queues[session]
+                if waiter.cancelled:
+                    continue
+                self._in_flight += 1
+                waiter.grant()
+
+    # --- token bucket ---
+    def _reserve_token(self) -> float:
+        """Takes one token (possibly on credit) and returns how long to wait before sending."""
+        with self._lock:
+            now = time.monotonic()
+            wait = max(0.0, self._blocked_until - now)
+            if self._rate <= 0:
+                return wait
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self._rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens < 0:
+                wait = max(wait, -self._tokens / self._rate)
+            return wait
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        """Blocks the calling thread until the request may be sent, and holds a slot while it runs."""
+        started = time.monotonic()
+        waiter = self._take_slot(_Waiter)
+        if waiter is not None:
+            waiter.event.wait()
+        try:
+            time.sleep(self._reserve_token())
+            metrics.observe("aroma_rate_limit_wait_seconds", time.monotonic() - started, limiter=self.name)
+            yield
+        finally:
+            self._release_slot()
+
+    @asynccontextmanager
+    async def aslot(self) -> AsyncIterator[None]:
+        """Async version of `slot()`; waiting never blocks the event loop."""
+        started = time.monotonic()
+        loop = asyncio.get_running_loop()
+        waiter = self._take_slot(lambda: _Waiter(loop))
+        if waiter is not None:
+            try:
+                await waiter.future
+            except asyncio.CancelledError:
+                with self._lock:
+                    waiter.cancelled = True
+                    granted = waiter.granted
+                if granted:
+                    self._release_slot()
+                raise
+        try:
+            await asyncio.sleep(self._reserve_token())
+            metrics.observe("aroma_rate_limit_wait_seconds", time.monotonic() - started, limiter=self.name)
+            yield
+        finally:
+            self._release_slot()
+
+    # --- feedback ---
+    def throttled(self, retry_after: Optional[float] = None):
+        """Records a 429: pauses the limiter and halves its rate."""
+        with self._lock:
+            self._consecutive_throttles += 1
+            self._throttled += 1
+            if retry_after is None:
+                retry_after = min(THROTTLE_BACKOFF_MAX, THROTTLE_BACKOFF_INITIAL * 2 ** (self._consecutive_throttles - 1))
+            self._blocked_until = max(self._blocked_until, time.monotonic() + retry_after)
+            if self.rpm:
+                self._rate = max(self._rate / 2, self.rpm / 60.0 * MIN_RATE_FRACTION)
+                self._tokens = min(self._tokens, 0.0)
+        metrics.increment("aroma_rate_limit_throttled_total", limiter=self.name)
+        print(f"🚦 {self.name} throttled (429); pausing {retry_after:.1f}s and slowing down.")
+
+    def succeeded(self):
+        """Records a successful call: the rate recovers step by step after throttling."""
+        with self._lock:
+            self._consecutive_throttles = 0
+            if self.rpm:
+                configured = self.rpm / 60.0
+                self._rate = min(configured, self._rate + configured * RECOVERY_FRACTION)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "name": self.name,
+                "rpm_configured": self.rpm,
+                "rpm_current": round(self._rate * 60, 1),
+                "max_in_flight": self.max_in_flight,
+                "in_flight": self._in_flight,
+                "queued": sum(len(queue) for queue in self._queues.values()),
+                "queued_sessions": len(self._queues),
+                "throttled": self._throttled,
+                "blocked_for_s": round(max(0.0, self._blocked_until - time.monotonic()), 2),
+            }
+
+
+class _NoLimit:
+    """Stand-in used when rate limiting is disabled."""
+
+    name = "off"
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        yield
+
+    @asynccontextmanager
+    async def aslot(self) -> AsyncIterator[None]:
+        yield
+
+    def throttled(self, retry_after: Optional[float] = None):
+        pass
+
+    def succeeded(self):
+        pass
+
+
+_limiters: Dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(key: str):
+    """
+    Returns the process-wide limiter for `key` ("gemini:<model>", "tts:<model>" or "suno"),
+    configured from DEFAULT_LIMITS for its kind and AROMA_RATE_LIMITS overrides for the key.
+    """
+    if not RATE_LIMITS_ENABLED:
+        return _NoLimit()
+    with _limiters_lock:
+        limiter = _limiters.get(key)
+        if limiter is None:
+            limits = dict(DEFAULT_LIMITS.get(key.split(":", 1)[0], {}))
+            limits.update(RATE_LIMIT_OVERRIDES.get(key, {}))
+            limiter = _limiters[key] = RateLimiter(key, **limits)
+        return limiter
+
+
+def limiter_stats() -> Dict[str, Dict[str, Any]]:
+    with _limiters_lock:
+        return {key: limiter.stats() for key, limiter in _limiters.items()}
+
+
+# --- 429 detection ---
+def is_rate_limited(error: BaseException) -> bool:
+    """True for quota errors from google-genai (429 / RESOURCE_EXHAUSTED)."""
+    return getattr(error, "code", None) == 429 or getattr(error, "status", None) == "RESOURCE_EXHAUSTED"
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """Reads the server's retry hint: google.rpc.RetryInfo's retryDelay or a Retry-After header."""
+    details = json.dumps(getattr(error, "details", None) or {})
+    match = re.search(r'"retryDelay":\s*"([\d.]+)s"', details)
+    if match:
+        return float(match.group(1))
+    response = getattr(error, "response", None)
+    header = getattr(response, "headers", {}).get("Retry-After") if response is not None else None
+    return parse_retry_after(header)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parses a Retry-After header given in seconds (HTTP dates are ignored)."""
+    try:
+        return max(0.0, float(value)) if value else None
+    except ValueError:
+        return None
+
+
+# --- LLM agents ---
+class GovernedLlm(BaseLlm):
+    """
+    Wraps an agent's model so every call goes through the model's limiter and 429s are
+    retried (up to RATE_LIMIT_MAX_RETRIES) after the limiter's backoff instead of failing
+    the agent.
+    """
+
+    inner: BaseLlm
+
+    async def generate_content_async(self, llm_request: LlmRequest, stream: bool = False) -> AsyncGenerator[LlmResponse, None]:
+        limiter = get_rate_limiter(f"gemini:{self.inner.model}")
+        for attempt in range(RATE_LIMIT_MAX_RETRIES + 1):
+            started_streaming = False
+            try:
+                async with limiter.aslot():
+                    async for response in self.inner.generate_content_async(llm_request, stream=stream):
+                        started_streaming = True
+                        yield response
+                limiter.succeeded()
+                return
+            except Exception as e:
+                # Partial output was already delivered, so a retry would duplicate it.
+                if started_streaming or attempt == RATE_LIMIT_MAX_RETRIES or not is_rate_limited(e):
+                    raise
+                limiter.throttled(retry_after_seconds(e))
+
+    def connect(self, llm_request: LlmRequest):
+        return self.inner.connect(llm_request)
+
+
+def _bind_session(callback_context: CallbackContext):
+    current_session.set(callback_context._invocation_context.session.id)
+    return None
+
+
+def govern_agent_tree(root: BaseAgent) -> int:
+    """
+    Routes the model of every LlmAgent under `root` through `GovernedLlm` and tags calls with
+    their session for fair queuing. Returns the number of wrapped models; safe to call twice.
+    """
+    if not RATE_LIMITS_ENABLED:
+        return 0
+    callbacks = root.before_agent_callback
+    callbacks = [] if callbacks is None else callbacks if isinstance(callbacks, list) else [callbacks]
+    if _bind_session not in callbacks:
+        root.before_agent_callback = [_bind_session] + callbacks
+    count = 0
+    stack = [root]
+    while stack:
+        agent = stack.pop()
+        if isinstance(agent, LlmAgent) and not isinstance(agent.model, GovernedLlm):
+            inner = agent.canonical_model
+            agent.model = GovernedLlm(model=inner.model, inner=inner)
+            count += 1
+        stack.extend(agent.sub_agents)
+    return count
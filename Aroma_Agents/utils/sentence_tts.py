@@ -0,0 +1,125 @@
+# Aroma_Agents/utils/sentence_tts.py
+
+import asyncio
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from Aroma_Agents.utils.gemini_tts_generator import GeminiTTSGenerator, WavStreamWriter
+
+# A sentence ends at . ! ? (followed by whitespace) or at CJK 。！？ (no space needed),
+# optionally followed by closing quotes/brackets; blank lines always end a sentence.
+_SENTENCE_END_RE = re.compile(r"(?:[.!?…]+[\"'”’)\]]*\s+|[。！？]+[”’」』）]*|\n\s*\n)")
+
+
+class SentenceSplitter:
+    """
+    Incrementally cuts streamed text into sentences.
+
+    Very short sentences are merged with the following one (up to `min_chars`) so the TTS
+    engine gets enough context for natural prosody and we do not pay per-call overhead for
+    fragments like "Oh." or "Breathe.".
+    """
+
+    def __init__(self, min_chars: int = 40):
+        self.min_chars = min_chars
+        self._buffer = ""
+        self._carry = ""
+
+    def feed(self, text: str) -> List[str]:
+        """Adds streamed text and returns the sentences completed by it."""
+        self._buffer += text
+        sentences = []
+        while True:
+            match = _SENTENCE_END_RE.search(self._buffer)
+            if not match:
+                break
+            sentence = self._buffer[: match.end()].strip()
+            self._buffer = self._buffer[match.end():]
+            sentence = f"{self._carry} {sentence}".strip() if self._carry else sentence
+            if len(sentence) < self.min_chars:
+                self._carry = sentence
+                continue
+            self._carry = ""
+            sentences.append(sentence)
+        return sentences
+
+    def flush(self) -> List[str]:
+        """Returns whatever text is left once the stream has ended."""
+        rest = f"{self._carry} {self._buffer.strip()}".strip()
+        self._carry = ""
+        self._buffer = ""
+        return [rest] if rest else []
+
+
+class SentenceTTSPipeline:
+    """
+    Synthesizes sentences concurrently (at most `max_parallel` TTS calls in flight) and
+    stitches the PCM segments back into one WAV in their original order.
+
+    Segments are appended to the file as soon as every earlier sentence is done, so the
+    output grows while later sentences are still being synthesized.
+    """
+
+    def __init__(
+        self,
+        tts: GeminiTTSGenerator,
+        output_file: Path,
+        max_parallel: int = 4,
+        pause_seconds: float = 0.2,
+    ):
+        self.tts = tts
+        self.output_file = Path(output_file)
+        self.pause_seconds = pause_seconds
+        self._semaphore = asyncio.Semaphore(max_parallel)
+        self._tasks: List[asyncio.Task] = []
+        self._done: Dict[int, Tuple[bytes, dict]] = {}
+        self._next_index = 0
+        self._writer: Optional[WavStreamWriter] = None
+        self._silence = b""
+        self._write_lock = asyncio.Lock()
+
+    def submit(self, sentence: str):
+        """Starts synthesizing the next sentence in the background."""
+        index = len(self._tasks)
+        self._tasks.append(asyncio.create_task(self._synthesize(index, sentence)))
+
+    async def _synthesize(self, index: int, sentence: str):
+        async with self._semaphore:
+            self._done[index] = await self.tts.asynthesize_pcm(sentence)
+        await self._write_ready_segments()
+
+    async def _write_ready_segments(self):
+        async with self._write_lock:
+            while self._next_index in self._done:
+                pcm, params = self._done.pop(self._next_index)
+                if self._writer is None:
+                    self.output_file.parent.mkdir(parents=True, exist_ok=True)
+                    self._writer = WavStreamWriter(self.output_file, params["rate"], params["bits_per_sample"])
+                    self._silence = bytes(int(params["rate"] * self.pause_seconds) * (params["bits_per_sample"] // 8))
+                elif self._silence:
+                    self._writer.write(self._silence)
+                self._writer.write(pcm)
+                self._next_index += 1
+
+    def cancel(self):
+        """Stops all pending synthesis calls and deletes the partial output file."""
+        for task in self._tasks:
+            task.cancel()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+            # Never handed to the artifact store: nothing else would ever clean it up.
+            self.output_file.unlink(missing_ok=True)
+
+    async def finish(self) -> Optional[str]:
+        """Waits for every submitted sentence and returns the WAV path (None if nothing was synthesized)."""
+        try:
+            await asyncio.gather(*self._tasks)
+        except BaseException:
+            self.cancel()
+            raise
+        if self._writer is not None:
+            self._writer.close()
+            return str(self.output_file)
+        return None
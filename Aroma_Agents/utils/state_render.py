@@ -0,0 +1,184 @@
+# Aroma_Agents/utils/state_render.py
+
+"""
+Compact rendering of session state into agent instructions.
+
+ADK injects `{key}` placeholders as the `str()` of the state value: Python reprs of
+`output_schema` dicts, with the wrapper key, every quote and every verbose `additional_info`
+sentence, and leaves `{intent[mood]}`-style placeholders untouched. `compact_instruction()`
+turns a prompt template into an instruction provider that instead renders each referenced
+value as short plain text:
+
+* single-key `output_schema` wrappers are unwrapped and empty fields dropped,
+* lists are deduplicated; lists of records become one header line plus one row per record,
+* if the rendered state exceeds the prompt's token budget, long text fields are cut to their
+  first sentence, then dropped, then the values are truncated.
+
+Every render records the tokens the raw injection would have used and the tokens actually
+sent (`aroma_prompt_state_tokens_total{agent,kind}`); `savings_report()` summarizes them.
+"""
+
+import json
+import re
+from typing import Any, Dict, List, Optional, Union
+
+from google.adk.agents.readonly_context import ReadonlyContext
+
+from Aroma_Agents.utils.config import PROMPT_STATE_TOKEN_BUDGET, STATE_RENDER_MODE
+from Aroma_Agents.utils.dag_agent import state_placeholders
+from Aroma_Agents.utils.metrics import registry as metrics
+
+# Rough size of a token for English prose and JSON; good enough for budgeting.
+CHARS_PER_TOKEN = 4
+# Strings longer than this inside records count as "long text" for the budget levels.
+LONG_TEXT_CHARS = 60
+# Compaction levels tried in order until the rendered state fits the budget.
+LEVEL_COMPACT, LEVEL_FIRST_SENTENCE, LEVEL_NO_LONG_TEXT = 0, 1, 2
+
+_PLACEHOLDER_RE = re.compile(r"(?<!\{)\{\+?\s*([A-Za-z_][A-Za-z0-9_]*)\s*(?:\[([^\]{}]*)\])?\s*\+?(\??)\}")
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?。！？])\s")
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _is_empty(value: Any) -> bool:
+    return value is None or value == "" or value == [] or value == {}
+
+
+def _text(value: Any, level: int) -> str:
+    text = " ".join(str(value).split())
+    if level >= LEVEL_FIRST_SENTENCE and len(text) > LONG_TEXT_CHARS:
+        text = _SENTENCE_END_RE.split(text, maxsplit=1)[0]
+    return text
+
+
+def _dedupe(items: List[Any]) -> List[Any]:
+    seen, unique = set(), []
+    for item in items:
+        marker = json.dumps(item, sort_keys=True, default=str).lower()
+        if marker not in seen:
+            seen.add(marker)
+            unique.append(item)
+    return unique
+
+
+def _render_records(records: List[Dict[str, Any]], level: int) -> str:
+    columns = []
+    for record in records:
+        for column, value in record.items():
+            if column in columns or _is_empty(value):
+                continue
+            if level >= LEVEL_NO_LONG_TEXT and isinstance(value, str) and len(value) > LONG_TEXT_CHARS:
+                continue
+            columns.append(column)
+    lines = [" | ".join(columns)]
+    for record in records:
+        lines.append(" | ".join(_text(record.get(column, ""), level) if not _is_empty(record.get(column)) else "-" for column in columns))
+    return "\n".join(lines)
+
+
+def render_value(value: Any, key: Optional[str] = None, level: int = LEVEL_COMPACT) -> str:
+    """Renders one state value as compact text (see the module docstring for the rules)."""
+    if isinstance(value, dict) and key is not None and list(value) == [key]:
+        value = value[key]  # output_schema wrapper, e.g. {"compound_candidates": [...]}
+    if isinstance(value, dict):
+        return "\n".join(
+            f"{field}: {render_value(item, level=level)}" for field, item in value.items() if not _is_empty(item)
+        )
+    if isinstance(value, (list, tuple)):
+        items = _dedupe([item for item in value if not _is_empty(item)])
+        if items and all(isinstance(item, dict) for item in items):
+            return _render_records(items, level)
+        return ", ".join(render_value(item, level=level) for item in items)
+    return _text(value, level)
+
+
+def _raw_value(value: Any, field: Optional[str]) -> str:
+    # The str() injection ADK does for a `{key}` placeholder, applied to the referenced value.
+    if field is not None:
+        return str(value.get(field, "")) if isinstance(value, dict) else str(value)
+    return str(value)
+
+
+def render_template(template: str, state: Dict[str, Any], budget_tokens: int = PROMPT_STATE_TOKEN_BUDGET) -> Dict[str, Any]:
+    """
+    Fills the placeholders of `template` from `state`.
+
+    Returns {"text", "raw_tokens", "compact_tokens", "level"}: the instruction and the state
+    tokens of the raw vs. compact rendering. Missing keys render as empty text.
+    """
+    matches = list(_PLACEHOLDER_RE.finditer(template))
+
+    def lookup(match) -> Any:
+        key, field = match.group(1), match.group(2)
+        value = state.get(key)
+        if field is not None and isinstance(value, dict):
+            value = value.get(field.strip("'\""))
+        return value
+
+    raw_tokens = sum(
+        estimate_tokens(_raw_value(state[m.group(1)], m.group(2))) for m in matches if m.group(1) in state
+    )
+    for level in (LEVEL_COMPACT, LEVEL_FIRST_SENTENCE, LEVEL_NO_LONG_TEXT):
+        rendered = [render_value(lookup(m), m.group(1), level) if lookup(m) is not None else "" for m in matches]
+        compact_tokens = sum(estimate_tokens(text) for text in rendered)
+        if compact_tokens <= budget_tokens:
+            break
+    else:
+        # Still too long: give every placeholder an equal share of the budget.
+        share = max(1, budget_tokens // max(1, len(rendered))) * CHARS_PER_TOKEN
+        rendered = [text if len(text) <= share else text[: share - 1] + "…" for text in rendered]
+        compact_tokens = sum(estimate_tokens(text) for text in rendered)
+
+    pieces, position = [], 0
+    for match, text in zip(matches, rendered):
+        pieces.append(template[position:match.start()])
+        pieces.append(text)
+        position = match.end()
+    pieces.append(template[position:])
+    return {"text": "".join(pieces), "raw_tokens": raw_tokens, "compact_tokens": compact_tokens, "level": level}
+
+
+class CompactInstruction:
+    """
+    Instruction provider rendering a prompt template with `render_template`.
+
+    `input_keys` lists the state keys it reads, so `DagAgent` can still schedule the agent.
+    """
+
+    def __init__(self, template: str, budget_tokens: int = PROMPT_STATE_TOKEN_BUDGET):
+        self.template = template
+        self.budget_tokens = budget_tokens
+        self.input_keys = sorted(state_placeholders(template))
+
+    def __call__(self, context: ReadonlyContext) -> str:
+        result = render_template(self.template, dict(context.state), self.budget_tokens)
+        agent = context.agent_name
+        metrics.increment("aroma_prompt_state_tokens_total", result["raw_tokens"], agent=agent, kind="raw")
+        metrics.increment("aroma_prompt_state_tokens_total", result["compact_tokens"], agent=agent, kind="compact")
+        metrics.increment("aroma_prompt_state_renders_total", agent=agent)
+        return result["text"]
+
+
+def compact_instruction(template: str, budget_tokens: int = PROMPT_STATE_TOKEN_BUDGET) -> Union[str, CompactInstruction]:
+    """Returns a `CompactInstruction` for `template`, or the template itself when AROMA_STATE_RENDER=raw."""
+    if STATE_RENDER_MODE == "raw":
+        return template
+    return CompactInstruction(template, budget_tokens)
+
+
+def savings_report() -> Dict[str, Dict[str, Any]]:
+    """Per agent: renders, state tokens the raw injection would send, tokens sent, and the saving."""
+    counters = metrics.snapshot()["counters"]
+    renders = {entry["labels"]["agent"]: entry["value"] for entry in counters.get("aroma_prompt_state_renders_total", [])}
+    report: Dict[str, Dict[str, Any]] = {}
+    for entry in counters.get("aroma_prompt_state_tokens_total", []):
+        labels = entry["labels"]
+        stage = report.setdefault(labels["agent"], {"renders": int(renders.get(labels["agent"], 0)), "raw_tokens": 0, "compact_tokens": 0})
+        stage[f"{labels['kind']}_tokens"] = int(entry["value"])
+    for stage in report.values():
+        stage["saved_tokens"] = stage["raw_tokens"] - stage["compact_tokens"]
+        stage["saved_pct"] = round(100 * stage["saved_tokens"] / stage["raw_tokens"], 1) if stage["raw_tokens"] else 0.0
+    return report
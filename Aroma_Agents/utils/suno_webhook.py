@@ -0,0 +1,188 @@
+# Aroma_Agents/utils/suno_webhook.py
+
+import asyncio
+import hmac
+import ipaddress
+import json
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from Aroma_Agents.utils.config import SUNO_CALLBACK_URL, SUNO_WEBHOOK_HOST, SUNO_WEBHOOK_PORT, SUNO_WEBHOOK_TOKEN
+from Aroma_Agents.utils.metrics import registry as metrics
+
+CALLBACK_PATH = "/suno/callback"
+# Callbacks that arrive before anyone waits for the task are kept this long (and at most this many).
+EARLY_RESULT_TTL_SECONDS = 900.0
+MAX_EARLY_RESULTS = 1000
+
+
+def parse_callback(body: Dict[str, Any]) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+    """
+    Turns a Suno callback body into (task id, status dict in the `check_music_generation_status`
+    format). The status is None for intermediate callbacks ("text", "first").
+    """
+    data = body.get("data") or {}
+    task_id = data.get("task_id") or data.get("taskId")
+    callback_type = (data.get("callbackType") or "").lower()
+    if body.get("code") not in (200, None) or callback_type == "error":
+        return task_id, {"status": "failed", "message": body.get("msg") or "Suno reported an error.", "audio_urls": None}
+    if callback_type != "complete":
+        return task_id, None
+
+    songs = data.get("data") or []
+    audio_urls = [song.get("audio_url") or song.get("audioUrl") for song in songs]
+    audio_urls = [url for url in audio_urls if url]
+    if not audio_urls:
+        return task_id, {"status": "failed", "message": "Callback reported completion without audio URLs.", "audio_urls": None}
+    return task_id, {"status": "completed", "message": "Task completed successfully.", "audio_urls": audio_urls}
+
+
+class CallbackRegistry:
+    """
+    Hands callback results (received on the HTTP thread) to the coroutines waiting for them.
+
+    Results that arrive before the waiter registers, e.g. for a very fast job, are kept for a
+    while so `wait()` still sees them.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._waiters: Dict[str, List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]]] = {}
+        self._early: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+    def future_for(self, task_id: str) -> asyncio.Future:
+        """Returns a future (on the running loop) that resolves with the task's final status."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self._lock:
+            early = self._early.pop(task_id, None)
+            if early is not None and time.monotonic() - early[0] <= EARLY_RESULT_TTL_SECONDS:
+                future.set_result(early[1])
+            else:
+                self._waiters.setdefault(task_id, []).append((loop, future))
+        return future
+
+    def discard(self, task_id: str, future: asyncio.Future):
+        with self._lock:
+            waiters = [item for item in self._waiters.get(task_id, []) if item[1] is not future]
+            if waiters:
+                self._waiters[task_id] = waiters
+            else:
+                self._waiters.pop(task_id, None)
+
+    def resolve(self, task_id: str, status: Dict[str, Any]):
+        """Completes every waiter of `task_id`; called from any thread."""
+        with self._lock:
+            waiters = self._waiters.pop(task_id, [])
+            if not waiters:
+                self._early[task_id] = (time.monotonic(), status)
+                while len(self._early) > MAX_EARLY_RESULTS:
+                    self._early.popitem(last=False)
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(_set_result, future, status)
+
+
+def _set_result(future: asyncio.Future, status: Dict[str, Any]):
+    if not future.done():
+        future.set_result(status)
+
+
+class _CallbackHandler(BaseHTTPRequestHandler):
+    server: "SunoWebhookReceiver"
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != CALLBACK_PATH:
+            self.send_error(404)
+            return
+        token = self.server.token
+        if token and not hmac.compare_digest(parse_qs(url.query).get("token", [""])[0], token):
+            self.send_error(403)
+            return
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+            task_id, status = parse_callback(body)
+        except (ValueError, AttributeError):
+            self.send_error(400)
+            return
+
+        callback_type = ((body.get("data") or {}).get("callbackType") or "unknown").lower()
+        metrics.increment("aroma_suno_callbacks_total", type=callback_type)
+        if task_id and status is not None:
+            print(f"📬 Suno callback for task {task_id}: {status['status']}")
+            self.server.callbacks.resolve(task_id, status)
+        payload = b'{"code": 200, "msg": "ok"}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _is_loopback(host: str) -> bool:
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+class SunoWebhookReceiver(ThreadingHTTPServer):
+    """Embedded HTTP server that receives Suno's `callBackUrl` posts on `CALLBACK_PATH`."""
+
+    daemon_threads = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, token: Optional[str] = None, public_url: Optional[str] = None):
+        if not token and not _is_loopback(host):
+            # Anyone reaching the port could post a "complete" callback naming any audio URL.
+            raise ValueError(f"Refusing to expose the Suno webhook receiver on {host!r} without SUNO_WEBHOOK_TOKEN.")
+        super().__init__((host, port), _CallbackHandler)
+        self.token = token
+        self.public_url = public_url
+        self.callbacks = CallbackRegistry()
+
+    @property
+    def callback_url(self) -> str:
+        """The URL to send as `callBackUrl` (the configured public URL, else this server's local address)."""
+        if self.public_url:
+            url = self.public_url
+        else:
+            host = self.server_address[0]
+            host = "127.0.0.1" if host in ("0.0.0.0", "") else host
+            url = f"http://{host}:{self.server_address[1]}{CALLBACK_PATH}"
+        if self.token:
+            url += ("&" if "?" in url else "?") + f"token={self.token}"
+        return url
+
+    def start(self) -> "SunoWebhookReceiver":
+        threading.Thread(target=self.serve_forever, name="suno-webhook", daemon=True).start()
+        print(f"📮 Suno webhook receiver listening on {self.server_address[0]}:{self.server_address[1]}{CALLBACK_PATH}")
+        return self
+
+
+_receiver: Optional[SunoWebhookReceiver] = None
+_receiver_lock = threading.Lock()
+
+
+def get_webhook_receiver() -> Optional[SunoWebhookReceiver]:
+    """Starts the receiver on first use when SUNO_WEBHOOK_PORT is set; None when webhooks are off."""
+    global _receiver
+    if SUNO_WEBHOOK_PORT is None:
+        return None
+    with _receiver_lock:
+        if _receiver is None:
+            _receiver = SunoWebhookReceiver(
+                host=SUNO_WEBHOOK_HOST,
+                port=SUNO_WEBHOOK_PORT,
+                token=SUNO_WEBHOOK_TOKEN,
+                public_url=SUNO_CALLBACK_URL,
+            ).start()
+        return _receiver
@@ -0,0 +1,79 @@
+# Aroma_Agents/warmup.py
+
+"""
+Pre-fills the intent cache at deploy time.
+
+    python -m Aroma_Agents.warmup                      # uses Aroma_Agents/common_intents.json
+    python -m Aroma_Agents.warmup my_intents.json --refresh --concurrency 2
+    python -m Aroma_Agents.warmup --path fast_path     # warm the fused fast path instead
+
+The input is a JSON list of IntentOutput objects ({"mood", "context", "preferences"}).
+"""
+
+import argparse
+import asyncio
+import json
+from pathlib import Path
+from typing import List
+
+from google.adk.runners import InMemoryRunner
+from google.genai import types
+
+from Aroma_Agents.agent import aroma_chain_agent, aroma_fast_path_cache_agent, aroma_router_agent
+from Aroma_Agents.utils.intent_cache import get_intent_cache, normalize_intent
+
+DEFAULT_INTENTS_FILE = Path(__file__).with_name("common_intents.json")
+
+
+async def warm_intent_cache(
+    intents: List[dict], refresh: bool = False, concurrency: int = 4, path: str = "chain"
+) -> int:
+    """Runs the aroma chain (or fast path) for every intent not yet cached and returns the number of new entries."""
+    cache = get_intent_cache()
+    cache_agent = aroma_fast_path_cache_agent if path == "fast_path" else aroma_chain_agent
+    cache_agent.enabled = True
+    runner = InMemoryRunner(agent=aroma_router_agent, app_name="aroma_warmup")
+    semaphore = asyncio.Semaphore(concurrency)
+
+    # Identical intents after normalization only need to run once.
+    unique = {cache.make_key(intent): intent for intent in intents}
+    if refresh:
+        cache.clear()
+
+    async def warm(intent: dict) -> bool:
+        if cache.get(intent, cache_agent.namespace) is not None:
+            return False
+        async with semaphore:
+            session = await runner.session_service.create_session(
+                app_name="aroma_warmup", user_id="warmup", state={"intent": intent, "aroma_fast_path": path == "fast_path"}
+            )
+            message = types.Content(role="user", parts=[types.Part(text=json.dumps(intent, ensure_ascii=False))])
+            try:
+                async for _ in runner.run_async(user_id="warmup", session_id=session.id, new_message=message):
+                    pass
+            except Exception as e:
+                print(f"❌ Warmup failed for {normalize_intent(intent)}: {e}")
+                return False
+        cached = cache.get(intent, cache_agent.namespace) is not None
+        print(f"{'✅' if cached else '⚠️'} {normalize_intent(intent)}")
+        return cached
+
+    results = await asyncio.gather(*(warm(intent) for intent in unique.values()))
+    return sum(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-fill the intent cache of the aroma chain.")
+    parser.add_argument("intents_file", nargs="?", default=str(DEFAULT_INTENTS_FILE))
+    parser.add_argument("--refresh", action="store_true", help="drop the existing cache entries first")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--path", choices=["chain", "fast_path"], default=aroma_router_agent.default_path)
+    args = parser.parse_args()
+
+    intents = json.loads(Path(args.intents_file).read_text(encoding="utf-8"))
+    added = asyncio.run(warm_intent_cache(intents, refresh=args.refresh, concurrency=args.concurrency, path=args.path))
+    print(f"🔥 Intent cache warmed: {added} new entries, {get_intent_cache().stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,455 @@
+# benchmarks/fakes.py
+
+"""
+Local stand-ins for Gemini (LLM + TTS) and the Suno API, with configurable latency and
+failure rates, so the whole pipeline can be benchmarked offline without spending quota.
+"""
+
+import asyncio
+import hashlib
+import inspect
+import json
+import math
+import random
+import threading
+import time
+import urllib.request
+import uuid
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import AsyncGenerator, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+from google.adk.agents import BaseAgent, LlmAgent
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import errors, types
+
+
+@dataclass
+class LatencyModel:
+    """Log-normal latency: `median` seconds, spread `sigma` (0 = fixed)."""
+
+    median: float = 0.0
+    sigma: float = 0.0
+
+    @classmethod
+    def parse(cls, spec: str) -> "LatencyModel":
+        """Parses "median" or "median,sigma" (seconds)."""
+        parts = [float(part) for part in spec.split(",")]
+        return cls(parts[0], parts[1] if len(parts) > 1 else 0.0)
+
+    def sample(self, rng: random.Random) -> float:
+        if self.median <= 0:
+            return 0.0
+        return self.median * math.exp(rng.gauss(0.0, self.sigma)) if self.sigma else self.median
+
+
+class StandInFailure(RuntimeError):
+    """Raised by a stand-in to simulate an upstream error."""
+
+
+class QuotaWindow:
+    """Shared requests-per-second quota; calls beyond it get a 429 like the real API."""
+
+    def __init__(self, requests_per_second: float, retry_delay: float = 1.0):
+        self.requests_per_second = requests_per_second
+        self.retry_delay = retry_delay
+        self.rejected = 0
+        self._lock = threading.Lock()
+        self._calls: List[float] = []
+
+    def check(self):
+        now = time.monotonic()
+        with self._lock:
+            self._calls = [t for t in self._calls if now - t < 1.0]
+            if len(self._calls) < self.requests_per_second:
+                self._calls.append(now)
+                return
+            self.rejected += 1
+        raise errors.ClientError(429, {"error": {
+            "code": 429,
+            "status": "RESOURCE_EXHAUSTED",
+            "message": "Quota exceeded (stand-in).",
+            "details": [{"@type": "type.googleapis.com/google.rpc.RetryInfo", "retryDelay": f"{self.retry_delay}s"}],
+        }})
+
+
+_rng_lock = threading.Lock()
+rng = random.Random(1234)
+
+
+def sample(latency: LatencyModel) -> float:
+    with _rng_lock:
+        return latency.sample(rng)
+
+
+def fails(rate: float) -> bool:
+    with _rng_lock:
+        return rate > 0 and rng.random() < rate
+
+
+# --- Scripted LLM ---
+
+MONOLOGUE = (
+    "I hear how heavy today has felt, and it makes sense that you are tired. "
+    "You have been carrying a lot, and you are still here, still trying. "
+    "Let's take one slow breath together and let your shoulders drop a little. "
+    "Nothing needs to be solved right this minute. You are doing better than you think."
+)
+LYRICS = (
+    "[Verse]\nSoft light on the window, the day is letting go\n"
+    "[Chorus]\nBreathe in, breathe out, you don't have to run\n"
+)
+
+_STRUCTURED_ANSWERS = {
+    "compound_searcher_agent": {"compound_candidates": ["Linalool", "Limonene", "alpha-Pinene", "Geraniol", "Sclareolide"]},
+    "plant_mapper_agent": {"matching_plants_or_products": [
+        {"plant_name": "Lavender", "part_used": "Flowering tops", "additional_info": "Calming linalool."},
+        {"plant_name": "Sweet Orange", "part_used": "Fruit peel", "additional_info": "Uplifting limonene."},
+    ]},
+    "plant_mapper_fallback_agent": {"matching_plants_or_products": [
+        {"plant_name": "Clary Sage", "part_used": "Flowering tops", "additional_info": "Sclareolide is derived from clary sage."},
+    ]},
+    "recommender_agent": {
+        "recommended_use": "Diffuse lavender and sweet orange in the evening, or drink a chamomile tea.",
+        "scent_profile": "Soft floral with a bright citrus top note.",
+        "explanation": "Linalool and limonene are associated with lower anxiety and a lifted mood.",
+    },
+}
+_STRUCTURED_ANSWERS["aroma_fast_path_llm"] = {
+    "compound_candidates": _STRUCTURED_ANSWERS["compound_searcher_agent"]["compound_candidates"],
+    "matching_plants_or_products": _STRUCTURED_ANSWERS["plant_mapper_agent"]["matching_plants_or_products"],
+    "recommendation_result": _STRUCTURED_ANSWERS["recommender_agent"],
+}
+
+INTENTS = [
+    {"mood": "anxious", "context": "exam stress", "preferences": "tea"},
+    {"mood": "tired", "context": "work", "preferences": "diffuser"},
+    {"mood": "sleepless", "context": "insomnia", "preferences": "bath"},
+    {"mood": "sad", "context": "loneliness", "preferences": "music"},
+    {"mood": "overwhelmed", "context": "postpartum", "preferences": "massage"},
+]
+
+
+def _user_text(llm_request: LlmRequest) -> str:
+    for content in llm_request.contents:
+        if content.role == "user" and content.parts and content.parts[0].text:
+            return content.parts[0].text
+    return ""
+
+
+def _tool_args(tool, session_token: str) -> Dict[str, str]:
+    """Fills a tool's string parameters with plausible values."""
+    args = {}
+    for name in inspect.signature(tool.func).parameters:
+        if name == "tool_context":
+            continue
+        if name == "text":
+            args[name] = f"{MONOLOGUE} ({session_token})"
+        elif name == "lyrics":
+            args[name] = f"{LYRICS}[Outro]\n{session_token}\n"
+        elif name == "filename":
+            args[name] = f"bench_{session_token}"
+        else:
+            args[name] = session_token
+    return args
+
+
+class ScriptedLlm(BaseLlm):
+    """
+    Answers like the real agent would: a tool call first if the agent has tools, the JSON
+    of its output schema if it has one, otherwise free text (streamed when asked).
+    """
+
+    agent_name: str
+    latency: LatencyModel = LatencyModel()
+    failure_rate: float = 0.0
+    # Share of calls answered after `slow_latency` instead, e.g. a stuck backend replica.
+    slow_rate: float = 0.0
+    slow_latency: LatencyModel = LatencyModel()
+    quota: Optional[QuotaWindow] = None
+    stream_chunk_chars: int = 40
+
+    def _answer(self, llm_request: LlmRequest):
+        session_token = hashlib.sha1(_user_text(llm_request).encode("utf-8")).hexdigest()[:10]
+        last = llm_request.contents[-1] if llm_request.contents else None
+        answered_tool = last is not None and any(part.function_response for part in last.parts or [])
+        if llm_request.tools_dict and not answered_tool:
+            tool = next(iter(llm_request.tools_dict.values()))
+            return types.Part(function_call=types.FunctionCall(
+                id=f"call-{uuid.uuid4().hex[:8]}", name=tool.name, args=_tool_args(tool, session_token)
+            ))
+        if self.agent_name in ("intent_parser_agent", "intent_parser_fallback_agent"):
+            return types.Part(text=json.dumps(INTENTS[int(session_token, 16) % len(INTENTS)]))
+        if self.agent_name in _STRUCTURED_ANSWERS:
+            return types.Part(text=json.dumps(_STRUCTURED_ANSWERS[self.agent_name]))
+        if answered_tool:
+            return types.Part(text="Your audio is ready.")
+        return types.Part(text=MONOLOGUE)
+
+    async def generate_content_async(self, llm_request: LlmRequest, stream: bool = False) -> AsyncGenerator[LlmResponse, None]:
+        if self.quota is not None:
+            self.quota.check()
+        await asyncio.sleep(sample(self.slow_latency if fails(self.slow_rate) else self.latency))
+        if fails(self.failure_rate):
+            raise StandInFailure(f"scripted LLM failure for {self.agent_name}")
+        part = self._answer(llm_request)
+        usage = types.GenerateContentResponseUsageMetadata(
+            prompt_token_count=sum(len(str(content)) for content in llm_request.contents) // 4,
+            candidates_token_count=len(part.text or "") // 4 + 1,
+        )
+        if stream and part.text and not llm_request.config.response_schema:
+            text = part.text
+            for start in range(0, len(text), self.stream_chunk_chars):
+                await asyncio.sleep(0.01)
+                chunk = text[start:start + self.stream_chunk_chars]
+                yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text=chunk)]), partial=True)
+        yield LlmResponse(content=types.Content(role="model", parts=[part]), usage_metadata=usage)
+
+
+def install_scripted_llms(
+    root: BaseAgent, latency: LatencyModel, failure_rate: float = 0.0, quota: Optional[QuotaWindow] = None,
+    slow_rate: float = 0.0, slow_latency: LatencyModel = LatencyModel(),
+) -> int:
+    """
+    Replaces the model of every LlmAgent in the tree with a ScriptedLlm; returns how many.
+    A wrapped model (GovernedLlm, HedgedLlm) keeps its wrappers and only gets a scripted innermost model.
+    """
+    count = 0
+    stack = [root]
+    while stack:
+        agent = stack.pop()
+        if isinstance(agent, LlmAgent):
+            model_name = agent.model.model if isinstance(agent.model, BaseLlm) else agent.model
+            scripted = ScriptedLlm(model=model_name, agent_name=agent.name, latency=latency, failure_rate=failure_rate,
+                                   slow_rate=slow_rate, slow_latency=slow_latency, quota=quota)
+            if hasattr(agent.model, "inner"):
+                wrapper = agent.model
+                while hasattr(wrapper.inner, "inner"):
+                    wrapper = wrapper.inner
+                wrapper.inner = scripted
+            else:
+                agent.model = scripted
+            count += 1
+        stack.extend(agent.sub_agents)
+    return count
+
+
+# --- Fake genai client for TTS ---
+
+class FakeGenaiClient:
+    """
+    Mimics `genai.Client(...).models.generate_content_stream` (and `.aio.models`) for TTS:
+    emits L16 PCM chunks, about one second of audio per `chars_per_second` characters.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        first_chunk: LatencyModel = LatencyModel(),
+        chunk_interval: float = 0.02,
+        failure_rate: float = 0.0,
+        chars_per_second: int = 15,
+        rate: int = 24000,
+        chunks: int = 8,
+    ):
+        self.first_chunk = first_chunk
+        self.chunk_interval = chunk_interval
+        self.failure_rate = failure_rate
+        self.chars_per_second = chars_per_second
+        self.rate = rate
+        self.chunks = chunks
+        self.models = _FakeModels(self)
+        self.aio = _FakeAio(self)
+
+    def _chunks(self, contents):
+        text = "".join(part.text or "" for content in contents for part in content.parts or [])
+        total = max(1, int(len(text) / self.chars_per_second * self.rate)) * 2
+        size = -(-total // self.chunks)
+        mime_type = f"audio/L16;codec=pcm;rate={self.rate}"
+        for start in range(0, total, size):
+            data = bytes(min(size, total - start))
+            yield types.GenerateContentResponse(candidates=[types.Candidate(content=types.Content(
+                role="model", parts=[types.Part(inline_data=types.Blob(data=data, mime_type=mime_type))]
+            ))])
+
+
+class _FakeModels:
+    def __init__(self, client: FakeGenaiClient):
+        self.client = client
+
+    def generate_content_stream(self, model, contents, config=None):
+        time.sleep(sample(self.client.first_chunk))
+        if fails(self.client.failure_rate):
+            raise StandInFailure("fake TTS failure")
+        for index, chunk in enumerate(self.client._chunks(contents)):
+            if index:
+                time.sleep(self.client.chunk_interval)
+            yield chunk
+
+
+class _FakeAsyncModels:
+    def __init__(self, client: FakeGenaiClient):
+        self.client = client
+
+    async def generate_content_stream(self, model, contents, config=None):
+        client = self.client
+
+        async def stream():
+            await asyncio.sleep(sample(client.first_chunk))
+            if fails(client.failure_rate):
+                raise StandInFailure("fake TTS failure")
+            for index, chunk in enumerate(client._chunks(contents)):
+                if index:
+                    await asyncio.sleep(client.chunk_interval)
+                yield chunk
+
+        return stream()
+
+
+class _FakeAio:
+    def __init__(self, client: FakeGenaiClient):
+        self.models = _FakeAsyncModels(client)
+
+
+# --- Fake Suno API ---
+
+class FakeSunoServer(ThreadingHTTPServer):
+    """
+    Serves `/api/v1/generate`, `/api/v1/generate/record-info` and the generated MP3s.
+
+    A task turns SUCCESS `render` seconds after it was submitted. Submits and status checks
+    fail with 503 at `failure_rate`. When the submitted `callBackUrl` points at this machine,
+    the "complete" callback is posted to it as soon as the song is ready (and dropped at
+    `callback_loss_rate`, to exercise the polling safety net).
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        port: int = 0,
+        render: LatencyModel = LatencyModel(1.0, 0.3),
+        request_latency: LatencyModel = LatencyModel(0.02),
+        failure_rate: float = 0.0,
+        mp3_bytes: int = 256 * 1024,
+        callback_loss_rate: float = 0.0,
+    ):
+        super().__init__(("127.0.0.1", port), _SunoHandler)
+        self.render = render
+        self.request_latency = request_latency
+        self.failure_rate = failure_rate
+        self.mp3_bytes = mp3_bytes
+        self.callback_loss_rate = callback_loss_rate
+        self.tasks: Dict[str, float] = {}
+        self.lock = threading.Lock()
+        self.counts = {"generate": 0, "record_info": 0, "download": 0, "callbacks": 0, "failures": 0}
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/api/v1"
+
+    def start(self) -> "FakeSunoServer":
+        threading.Thread(target=self.serve_forever, name="fake-suno", daemon=True).start()
+        return self
+
+    def count(self, key: str):
+        with self.lock:
+            self.counts[key] += 1
+
+    def songs(self, task_id: str) -> List[dict]:
+        host = f"http://127.0.0.1:{self.server_address[1]}"
+        return [{"audioUrl": f"{host}/audio/{task_id}_{index}.mp3"} for index in range(2)]
+
+    def schedule_callback(self, callback_url: str, task_id: str, delay: float):
+        if urlparse(callback_url).hostname not in ("127.0.0.1", "localhost") or fails(self.callback_loss_rate):
+            return
+
+        def post():
+            songs = [{"id": song["audioUrl"].rsplit("/", 1)[-1], "audio_url": song["audioUrl"]} for song in self.songs(task_id)]
+            body = {"code": 200, "msg": "All generated successfully.", "data": {
+                "callbackType": "complete", "task_id": task_id, "data": songs,
+            }}
+            request = urllib.request.Request(
+                callback_url, data=json.dumps(body).encode("utf-8"), headers={"Content-Type": "application/json"}
+            )
+            try:
+                urllib.request.urlopen(request, timeout=5).read()
+                self.count("callbacks")
+            except OSError:
+                pass
+
+        timer = threading.Timer(delay, post)
+        timer.daemon = True
+        timer.start()
+
+
+class _SunoHandler(BaseHTTPRequestHandler):
+    server: FakeSunoServer
+    protocol_version = "HTTP/1.1"
+
+    def _send_json(self, status: int, body: dict):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _maybe_fail(self) -> bool:
+        time.sleep(sample(self.server.request_latency))
+        if fails(self.server.failure_rate):
+            self.server.count("failures")
+            self._send_json(503, {"code": 503, "msg": "stand-in overloaded"})
+            return True
+        return False
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        if not self.path.endswith("/generate"):
+            self._send_json(404, {"code": 404, "msg": "not found"})
+            return
+        self.server.count("generate")
+        if self._maybe_fail():
+            return
+        task_id = uuid.uuid4().hex
+        render = sample(self.server.render)
+        with self.server.lock:
+            self.server.tasks[task_id] = time.monotonic() + render
+        if payload.get("callBackUrl"):
+            self.server.schedule_callback(payload["callBackUrl"], task_id, render)
+        self._send_json(200, {"code": 200, "msg": "success", "data": {"taskId": task_id}})
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path.endswith("/generate/record-info"):
+            self.server.count("record_info")
+            if self._maybe_fail():
+                return
+            task_id = parse_qs(url.query).get("taskId", [""])[0]
+            with self.server.lock:
+                ready_at = self.server.tasks.get(task_id)
+            if ready_at is None:
+                self._send_json(200, {"code": 404, "msg": "task not found"})
+            elif time.monotonic() < ready_at:
+                self._send_json(200, {"code": 200, "data": {"taskId": task_id, "status": "PENDING"}})
+            else:
+                songs = self.server.songs(task_id)
+                self._send_json(200, {"code": 200, "data": {
+                    "taskId": task_id, "status": "SUCCESS", "response": {"sunoData": songs},
+                }})
+        elif url.path.startswith("/audio/"):
+            self.server.count("download")
+            self.send_response(200)
+            self.send_header("Content-Type", "audio/mpeg")
+            self.send_header("Content-Length", str(self.server.mp3_bytes))
+            self.end_headers()
+            self.wfile.write(bytes(self.server.mp3_bytes))
+        else:
+            self._send_json(404, {"code": 404, "msg": "not found"})
+
+    def log_message(self, format, *args):
+        pass
@@ -0,0 +1,276 @@
+# benchmarks/run_benchmark.py
+
+"""
+Offline benchmark of `root_agent` against the stand-ins in `fakes.py`.
+
+    python -m benchmarks.run_benchmark --sessions 50 --concurrency 10
+    python -m benchmarks.run_benchmark --pipeline-mode dag --scenario dag
+    python -m benchmarks.run_benchmark --llm-slow 0.05 --hedge intent_parser_agent,compound_searcher_agent,plant_mapper_agent
+    python -m benchmarks.run_benchmark --update-baseline      # record benchmarks/baselines/<scenario>.json
+
+Reports end-to-end and per-stage latency, throughput and peak memory. When a baseline
+for the scenario exists, a result worse than `--tolerance` exits with status 1.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Dict, List
+
+from benchmarks.fakes import FakeGenaiClient, FakeSunoServer, LatencyModel, QuotaWindow, install_scripted_llms
+
+BASELINE_DIR = Path(__file__).with_name("baselines")
+# Summary keys compared against the baseline: higher is worse unless listed in HIGHER_IS_BETTER.
+COMPARED_KEYS = ["e2e_p50_s", "e2e_p95_s", "first_result_p50_s", "throughput_sessions_per_s", "peak_traced_mb"]
+HIGHER_IS_BETTER = {"throughput_sessions_per_s"}
+
+
+def _percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(q * (len(ordered) - 1)))]
+
+
+def _configure_environment(args, suno: FakeSunoServer, workdir: str):
+    """Must run before Aroma_Agents is imported: the config module reads these at import time."""
+    os.environ["SUNO_BASE_URL"] = suno.base_url
+    os.environ.setdefault("SUNO_API_KEY", "benchmark")
+    os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+    os.environ["AROMA_PIPELINE_MODE"] = args.pipeline_mode
+    os.environ["AROMA_PATH_MODE"] = args.path_mode
+    os.environ["AROMA_INTENT_PARSER_MODE"] = args.intent_mode
+    os.environ["AROMA_MENTAL_SUPPORT_TTS_MODE"] = args.tts_mode
+    os.environ["AROMA_MUSIC_TOOL_MODE"] = args.music_mode
+    os.environ["AROMA_DELIVERY"] = args.delivery
+    os.environ["AROMA_REQUEST_BUDGET"] = str(args.budget)
+    os.environ["AROMA_INTENT_CACHE"] = "true" if args.with_cache else "false"
+    os.environ["AROMA_INTENT_CACHE_PATH"] = os.path.join(workdir, "intent_cache.json")
+    os.environ["AROMA_METRICS"] = "true"
+    os.environ["AROMA_RATE_LIMITS"] = "false" if args.no_rate_limits else "true"
+    os.environ["AROMA_HEDGE_AGENTS"] = args.hedge
+    if args.gemini_rpm is not None:
+        os.environ["AROMA_GEMINI_RPM"] = str(args.gemini_rpm)
+    # The stand-in is polled far faster than the real API, so its production rate limit does not apply.
+    os.environ["AROMA_SUNO_RPM"] = str(args.suno_rpm)
+    if args.webhook:
+        os.environ["SUNO_WEBHOOK_PORT"] = "0"
+        os.environ["SUNO_WEBHOOK_HOST"] = "127.0.0.1"
+
+
+async def _run_sessions(root_agent, sessions: int, concurrency: int) -> Dict[str, object]:
+    from google.adk.runners import InMemoryRunner
+    from google.genai import types
+
+    runner = InMemoryRunner(agent=root_agent, app_name="aroma_benchmark")
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    first_results: List[float] = []
+    errors: List[str] = []
+
+    async def one_session(index: int):
+        async with semaphore:
+            session = await runner.session_service.create_session(app_name="aroma_benchmark", user_id=f"user-{index}")
+            message = types.Content(role="user", parts=[types.Part(text=f"session {index}: I feel stressed and can't sleep.")])
+            started = time.perf_counter()
+            first_result = None
+            try:
+                async for event in runner.run_async(user_id=f"user-{index}", session_id=session.id, new_message=message):
+                    # With progressive delivery: the first stage result after the intent.
+                    if first_result is None and (event.custom_metadata or {}).get("aroma_stage", "intent") != "intent":
+                        first_result = time.perf_counter() - started
+                latencies.append(time.perf_counter() - started)
+                first_results.append(latencies[-1] if first_result is None else first_result)
+            except Exception as e:
+                errors.append(repr(e))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one_session(index) for index in range(sessions)))
+    wall = time.perf_counter() - started
+    return {"latencies": latencies, "first_results": first_results, "errors": errors, "wall": wall}
+
+
+def run_benchmark(args) -> dict:
+    suno = FakeSunoServer(
+        render=LatencyModel.parse(args.suno_render),
+        request_latency=LatencyModel.parse(args.suno_latency),
+        failure_rate=args.suno_fail,
+        callback_loss_rate=args.callback_loss,
+    ).start()
+    workdir = tempfile.mkdtemp(prefix="aroma_bench_")
+    _configure_environment(args, suno, workdir)
+    # Generated audio/music lands in the temp dir, not in the repository.
+    os.chdir(workdir)
+
+    from Aroma_Agents.agent import root_agent
+    from Aroma_Agents.tools import music_tool
+    from Aroma_Agents.utils.clients import register_genai_client
+    from Aroma_Agents.utils.metrics import registry
+    from Aroma_Agents.utils.state_render import savings_report
+
+    quota = QuotaWindow(args.llm_quota) if args.llm_quota else None
+    install_scripted_llms(root_agent, LatencyModel.parse(args.llm_latency), args.llm_fail, quota,
+                          slow_rate=args.llm_slow, slow_latency=LatencyModel.parse(args.llm_slow_latency))
+    tts_latency = LatencyModel.parse(args.tts_latency)
+    register_genai_client(FakeGenaiClient(first_chunk=tts_latency, failure_rate=args.tts_fail))
+    music_tool.POLL_INITIAL_DELAY = args.poll_delay
+    music_tool.POLL_MAX_DELAY = args.poll_delay * 4
+    music_tool.SAFETY_POLL_SECONDS = args.safety_poll
+    registry.reset()
+
+    tracemalloc.start()
+    output = io.StringIO()
+    redirect = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(output)
+    with redirect:
+        result = asyncio.run(_run_sessions(root_agent, args.sessions, args.concurrency))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    suno.shutdown()
+
+    latencies = result["latencies"]
+    snapshot = registry.snapshot()["histograms"]
+    stages = {
+        entry["labels"]["agent"]: {key: round(entry[key], 4) for key in ("p50", "p95", "p99")}
+        for entry in snapshot.get("aroma_agent_duration_seconds", [])
+    }
+    delivery = {
+        entry["labels"]["stage"]: round(entry["p50"], 4)
+        for entry in snapshot.get("aroma_stage_delivery_seconds", [])
+    }
+    queue = {
+        entry["labels"]["agent"]: round(entry["p50"], 4)
+        for entry in snapshot.get("aroma_agent_queue_seconds", [])
+    }
+    return {
+        "scenario": args.scenario,
+        "config": {
+            key: getattr(args, key)
+            for key in ("sessions", "concurrency", "pipeline_mode", "path_mode", "intent_mode", "tts_mode", "music_mode", "delivery", "budget", "with_cache", "webhook",
+                        "llm_latency", "tts_latency", "suno_render", "llm_fail", "tts_fail", "suno_fail", "llm_quota",
+                        "llm_slow", "llm_slow_latency", "hedge")
+        },
+        "summary": {
+            "completed": len(latencies),
+            "errors": len(result["errors"]),
+            "e2e_p50_s": round(_percentile(latencies, 0.5), 4),
+            "e2e_p95_s": round(_percentile(latencies, 0.95), 4),
+            "e2e_p99_s": round(_percentile(latencies, 0.99), 4),
+            "first_result_p50_s": round(_percentile(result["first_results"], 0.5), 4),
+            "first_result_p95_s": round(_percentile(result["first_results"], 0.95), 4),
+            "throughput_sessions_per_s": round(len(latencies) / result["wall"], 3) if result["wall"] else 0.0,
+            "peak_traced_mb": round(peak / 1024 / 1024, 2),
+            "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        },
+        "stages_s": stages,
+        "queue_p50_s": queue,
+        "delivery_p50_s": delivery,
+        "skipped_stages": {
+            f"{entry['labels']['stage']}:{entry['labels']['reason']}": int(entry["value"])
+            for entry in registry.snapshot()["counters"].get("aroma_stage_skipped_total", [])
+        },
+        "suno_requests": dict(suno.counts),
+        "llm_429s": quota.rejected if quota else 0,
+        "llm_hedges": {
+            f"{entry['labels']['agent']}:{entry['labels']['outcome']}": int(entry["value"])
+            for entry in registry.snapshot()["counters"].get("aroma_llm_hedges_total", [])
+        },
+        "prompt_state_tokens": savings_report(),
+        "error_samples": result["errors"][:5],
+    }
+
+
+def compare_with_baseline(
+    report: dict, baseline: dict, tolerance: float, keys: List[str] = COMPARED_KEYS, higher_is_better=HIGHER_IS_BETTER
+) -> List[str]:
+    """Returns one message per summary metric that is worse than the baseline by more than `tolerance`."""
+    regressions = []
+    for key in keys:
+        current, reference = report["summary"].get(key), baseline["summary"].get(key)
+        if not current or not reference:
+            continue
+        if key in higher_is_better:
+            worse = current < reference * (1 - tolerance)
+        else:
+            worse = current > reference * (1 + tolerance)
+        if worse:
+            regressions.append(f"{key}: {current} vs baseline {reference} (tolerance {tolerance:.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Aroma_Agents pipeline against local stand-ins.")
+    parser.add_argument("--scenario", default="default", help="baseline name (benchmarks/baselines/<scenario>.json)")
+    parser.add_argument("--sessions", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--pipeline-mode", choices=["sequential", "dag"], default="sequential")
+    parser.add_argument("--path-mode", choices=["chain", "fast_path"], default="chain")
+    parser.add_argument("--intent-mode", choices=["rules", "llm"], default="rules")
+    parser.add_argument("--tts-mode", choices=["tool", "sentence"], default="tool")
+    parser.add_argument("--music-mode", choices=["blocking", "background"], default="blocking")
+    parser.add_argument("--delivery", choices=["progressive", "final"], default="progressive")
+    parser.add_argument("--budget", type=float, default=300.0, help="per-request latency budget in seconds (0 = none)")
+    parser.add_argument("--with-cache", action="store_true", help="keep the intent cache enabled")
+    parser.add_argument("--webhook", action="store_true", help="complete Suno jobs through the webhook receiver")
+    parser.add_argument("--callback-loss", type=float, default=0.0, help="share of Suno callbacks the stand-in drops")
+    parser.add_argument("--safety-poll", type=float, default=2.0, help="safety-net poll interval with --webhook (seconds)")
+    parser.add_argument("--llm-latency", default="0.3,0.3", help="median[,sigma] seconds per LLM call")
+    parser.add_argument("--tts-latency", default="0.2,0.3", help="median[,sigma] seconds to the first TTS chunk")
+    parser.add_argument("--suno-render", default="1.0,0.3", help="median[,sigma] seconds until a song is ready")
+    parser.add_argument("--suno-latency", default="0.02", help="median[,sigma] seconds per Suno HTTP request")
+    parser.add_argument("--poll-delay", type=float, default=0.1, help="initial Suno poll delay (seconds)")
+    parser.add_argument("--llm-fail", type=float, default=0.0, help="failure rate of LLM calls")
+    parser.add_argument("--llm-slow", type=float, default=0.0, help="share of LLM calls answered after --llm-slow-latency instead")
+    parser.add_argument("--llm-slow-latency", default="5.0", help="median[,sigma] seconds of a slow LLM call")
+    parser.add_argument("--hedge", default="", help="AROMA_HEDGE_AGENTS for the run (comma-separated agent names)")
+    parser.add_argument("--llm-quota", type=float, default=0.0, help="LLM requests per second before the stand-in answers 429 (0 = unlimited)")
+    parser.add_argument("--gemini-rpm", type=float, default=None, help="override AROMA_GEMINI_RPM for the run")
+    parser.add_argument("--suno-rpm", type=float, default=0, help="AROMA_SUNO_RPM for the run (0 = no request rate limit)")
+    parser.add_argument("--no-rate-limits", action="store_true", help="disable the shared rate limiter")
+    parser.add_argument("--tts-fail", type=float, default=0.0, help="failure rate of TTS streams")
+    parser.add_argument("--suno-fail", type=float, default=0.0, help="503 rate of Suno requests")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--output", help="also write the report to this JSON file")
+    parser.add_argument("--verbose", action="store_true", help="show the pipeline's own output")
+    args = parser.parse_args()
+
+    baseline_path = (BASELINE_DIR / f"{args.scenario}.json").resolve()
+    output_path = Path(args.output).resolve() if args.output else None
+    report = run_benchmark(args)
+    print(json.dumps(report, indent=2))
+    if output_path:
+        output_path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+    if args.update_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+        print(f"📌 Baseline written to {baseline_path}")
+        return
+    if not baseline_path.exists():
+        print(f"ℹ️ No baseline at {baseline_path}; run with --update-baseline to record one.")
+        return
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+    if baseline.get("config") != report["config"]:
+        print("⚠️ Baseline was recorded with a different configuration; comparing anyway.")
+    regressions = compare_with_baseline(report, baseline, args.tolerance)
+    if report["summary"]["errors"] > baseline["summary"].get("errors", 0):
+        regressions.append(f"errors: {report['summary']['errors']} vs baseline {baseline['summary'].get('errors', 0)}")
+    if regressions:
+        print("❌ PERFORMANCE REGRESSION against baseline:")
+        for line in regressions:
+            print(f"   - {line}")
+        sys.exit(1)
+    print(f"✅ Within {args.tolerance:.0%} of baseline '{args.scenario}'.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+# benchmarks/startup.py
+
+"""
+Cold-start benchmark: import time of `Aroma_Agents.agent` and the latency of the first and
+second session in fresh processes, the way a newly scaled-up container sees them.
+
+    python -m benchmarks.startup --runs 5
+    python -m benchmarks.startup --update-baseline      # record benchmarks/baselines/startup.json
+
+Every run is a new interpreter (`--child`) talking to one shared fake Suno server; LLM and TTS
+calls go to the stand-ins in `fakes.py`, so the first-session overhead is our own lazy loading
+and client setup, not the network.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Nothing that imports ADK may be imported at module level: the child measures that import.
+STARTUP_KEYS = ["process_s", "import_s", "first_session_s", "first_session_overhead_s"]
+
+
+def _child(args):
+    """Runs inside the fresh process; prints one JSON line with its timings."""
+    os.chdir(tempfile.mkdtemp(prefix="aroma_startup_"))
+    started = time.perf_counter()
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        from Aroma_Agents.agent import root_agent
+    imported = time.perf_counter()
+    modules = len(sys.modules)
+    backends = {name: name in sys.modules for name in ("requests", "urllib3")}
+
+    from benchmarks.fakes import FakeGenaiClient, LatencyModel, install_scripted_llms
+    from benchmarks.run_benchmark import _run_sessions
+    from Aroma_Agents.tools import music_tool
+    from Aroma_Agents.utils.clients import register_genai_client
+
+    install_scripted_llms(root_agent, LatencyModel.parse(args.llm_latency))
+    register_genai_client(FakeGenaiClient(first_chunk=LatencyModel.parse(args.tts_latency)))
+    music_tool.POLL_INITIAL_DELAY = music_tool.POLL_MAX_DELAY = args.poll_delay
+    sessions = []
+    with contextlib.redirect_stdout(output):
+        for _ in range(2):
+            result = asyncio.run(_run_sessions(root_agent, 1, 1))
+            if result["errors"]:
+                raise SystemExit(f"session failed: {result['errors'][0]}")
+            sessions.append(result["latencies"][0])
+    print(json.dumps({
+        "import_s": imported - started,
+        "first_session_s": sessions[0],
+        "second_session_s": sessions[1],
+        "modules_after_import": modules,
+        "loaded_at_import": backends,
+    }))
+
+
+def run_startup(args) -> dict:
+    from benchmarks.fakes import FakeSunoServer, LatencyModel
+    from benchmarks.run_benchmark import _percentile
+
+    suno = FakeSunoServer(render=LatencyModel.parse(args.suno_render)).start()
+    env = dict(
+        os.environ,
+        SUNO_BASE_URL=suno.base_url,
+        SUNO_API_KEY=os.environ.get("SUNO_API_KEY", "benchmark"),
+        GEMINI_API_KEY=os.environ.get("GEMINI_API_KEY", "benchmark"),
+        AROMA_INTENT_CACHE="false",
+        AROMA_SUNO_RPM="0",
+        PYTHONPATH=os.pathsep.join(filter(None, [str(Path(__file__).resolve().parent.parent), os.environ.get("PYTHONPATH")])),
+    )
+    command = [sys.executable, "-m", "benchmarks.startup", "--child",
+               "--llm-latency", args.llm_latency, "--tts-latency", args.tts_latency, "--poll-delay", str(args.poll_delay)]
+    runs = []
+    try:
+        for _ in range(args.runs):
+            started = time.perf_counter()
+            completed = subprocess.run(command, env=env, capture_output=True, text=True, check=True)
+            run = json.loads(completed.stdout.strip().splitlines()[-1])
+            # Interpreter start-up plus everything up to the first request being ready to run.
+            run["process_s"] = time.perf_counter() - started - run["first_session_s"] - run["second_session_s"]
+            run["first_session_overhead_s"] = max(0.0, run["first_session_s"] - run["second_session_s"])
+            runs.append(run)
+    finally:
+        suno.shutdown()
+
+    summary = {
+        key: round(_percentile([run[key] for run in runs], 0.5), 4)
+        for key in STARTUP_KEYS + ["second_session_s"]
+    }
+    summary["modules_after_import"] = runs[-1]["modules_after_import"]
+    return {
+        "scenario": "startup",
+        "config": {key: getattr(args, key) for key in ("runs", "llm_latency", "tts_latency", "suno_render", "poll_delay")},
+        "summary": summary,
+        "loaded_at_import": runs[-1]["loaded_at_import"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure import and first-request latency of Aroma_Agents in fresh processes.")
+    parser.add_argument("--runs", type=int, default=5, help="fresh processes to start; p50 values are reported")
+    parser.add_argument("--llm-latency", default="0.05", help="median[,sigma] seconds per LLM call")
+    parser.add_argument("--tts-latency", default="0.05", help="median[,sigma] seconds to the first TTS chunk")
+    parser.add_argument("--suno-render", default="0.2", help="median[,sigma] seconds until a song is ready")
+    parser.add_argument("--poll-delay", type=float, default=0.05, help="Suno poll delay (seconds)")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--output", help="also write the report to this JSON file")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        _child(args)
+        return
+
+    from benchmarks.run_benchmark import BASELINE_DIR, compare_with_baseline
+
+    baseline_path = (BASELINE_DIR / "startup.json").resolve()
+    report = run_startup(args)
+    print(json.dumps(report, indent=2))
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+    if args.update_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+        print(f"📌 Baseline written to {baseline_path}")
+        return
+    if not baseline_path.exists():
+        print(f"ℹ️ No baseline at {baseline_path}; run with --update-baseline to record one.")
+        return
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+    regressions = compare_with_baseline(report, baseline, args.tolerance, keys=STARTUP_KEYS, higher_is_better=set())
+    if regressions:
+        print("❌ STARTUP REGRESSION against baseline:")
+        for line in regressions:
+            print(f"   - {line}")
+        sys.exit(1)
+    print(f"✅ Within {args.tolerance:.0%} of the startup baseline.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+
+from Aroma_Agents.utils import admission
+from Aroma_Agents.utils.admission import AdmissionController, Overloaded
+
+
+@pytest.fixture(autouse=True)
+def fast_disconnect_poll(monkeypatch):
+    monkeypatch.setattr(admission, "DISCONNECT_POLL_SECONDS", 0.01)
+
+
+def test_queued_requests_are_admitted_in_arrival_order():
+    async def scenario():
+        controller = AdmissionController(max_concurrent=1, max_queue=3, queue_timeout=5)
+        assert await controller.admit()
+        order = []
+
+        async def request(name):
+            await controller.admit()
+            order.append(name)
+            controller.release()
+
+        tasks = []
+        for name in ("a", "b", "c"):
+            tasks.append(asyncio.create_task(request(name)))
+            await asyncio.sleep(0.02)
+        assert controller.stats()["waiting"] == 3
+        controller.release()
+        await asyncio.gather(*tasks)
+        return order, controller.stats()
+
+    order, stats = asyncio.run(scenario())
+    assert order == ["a", "b", "c"]
+    assert stats["active"] == stats["waiting"] == 0
+
+
+def test_full_queue_is_shed_right_away():
+    async def scenario():
+        controller = AdmissionController(max_concurrent=1, max_queue=1, queue_timeout=5)
+        await controller.admit()
+        waiter = asyncio.create_task(controller.admit())
+        await asyncio.sleep(0.02)
+        with pytest.raises(Overloaded) as excinfo:
+            await controller.admit()
+        controller.release()
+        assert await waiter
+        return excinfo.value
+
+    error = asyncio.run(scenario())
+    assert error.reason == "queue_full"
+    assert error.retry_after >= 1
+
+
+def test_wait_past_queue_timeout_is_shed_and_frees_its_place():
+    async def scenario():
+        controller = AdmissionController(max_concurrent=1, max_queue=1, queue_timeout=0.05)
+        await controller.admit()
+        with pytest.raises(Overloaded) as excinfo:
+            await controller.admit()
+        waiting_after_timeout = controller.stats()["waiting"]
+        controller.release()
+        # The timed-out waiter must not have kept the slot.
+        assert await asyncio.wait_for(controller.admit(), 1)
+        return excinfo.value.reason, waiting_after_timeout
+
+    reason, waiting = asyncio.run(scenario())
+    assert reason == "queue_timeout"
+    assert waiting == 0
+
+
+def test_disconnected_client_leaves_the_queue():
+    async def scenario():
+        controller = AdmissionController(max_concurrent=1, max_queue=2, queue_timeout=5)
+        await controller.admit()
+        gone = asyncio.Event()
+
+        async def is_disconnected():
+            return gone.is_set()
+
+        waiter = asyncio.create_task(controller.admit(is_disconnected))
+        await asyncio.sleep(0.02)
+        gone.set()
+        admitted = await asyncio.wait_for(waiter, 1)
+        stats = controller.stats()
+        controller.release()
+        assert await asyncio.wait_for(controller.admit(), 1)
+        return admitted, stats
+
+    admitted, stats = asyncio.run(scenario())
+    assert admitted is False
+    assert stats == {"active": 1, "waiting": 0, "max_concurrent": 1, "max_queue": 2}
@@ -0,0 +1,86 @@
+import asyncio
+import json
+from typing import AsyncGenerator
+
+from google.adk.agents import BaseAgent
+from google.adk.events import Event, EventActions
+
+from Aroma_Agents.batch import BatchCheckpoint, read_inputs, run_batch
+
+
+class EchoAgent(BaseAgent):
+    """Writes the user input back as the intent, without any model call."""
+
+    async def _run_async_impl(self, ctx) -> AsyncGenerator[Event, None]:
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            actions=EventActions(state_delta={"intent": ctx.session.state["user_input"]}),
+        )
+
+
+def _results(path):
+    return sorted((json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()), key=lambda r: r["line"])
+
+
+def test_read_inputs_normalizes_records(tmp_path):
+    path = tmp_path / "in.jsonl"
+    path.write_text('{"user_input": "hi"}\n"plain"\n123\n[1, 2]\nnull\n\n{bad\n', encoding="utf-8")
+    records = dict(read_inputs(path))
+    assert records[0] == {"user_input": "hi"}
+    assert records[1] == {"user_input": "plain"}
+    assert records[2] == records[3] == records[4] == {"_error": "expected an object"}
+    assert records[5] is None
+    assert records[6]["_error"].startswith("invalid JSON")
+
+
+def test_mixed_file_is_processed_past_bad_lines(tmp_path):
+    input_path, output_path = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    input_path.write_text('{"user_input": "hi"}\n123\n{"user_input": "yo"}\n', encoding="utf-8")
+
+    counts = asyncio.run(run_batch(str(input_path), str(output_path), max_in_flight=2, agent=EchoAgent(name="echo")))
+
+    assert counts == {"processed": 2, "failed": 1, "skipped": 0}
+    results = _results(output_path)
+    assert [r["line"] for r in results] == [0, 1, 2]
+    assert results[1]["error"] == "expected an object"
+    assert results[2]["intent"] == "yo"
+    checkpoint = json.loads(output_path.with_name("out.jsonl.checkpoint").read_text(encoding="utf-8"))
+    assert checkpoint["next_line"] == 3
+
+
+def test_rerun_skips_finished_lines(tmp_path):
+    input_path, output_path = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    input_path.write_text('{"user_input": "a"}\n{"user_input": "b"}\n', encoding="utf-8")
+    asyncio.run(run_batch(str(input_path), str(output_path), agent=EchoAgent(name="echo")))
+
+    counts = asyncio.run(run_batch(str(input_path), str(output_path), agent=EchoAgent(name="echo")))
+
+    assert counts == {"processed": 0, "failed": 0, "skipped": 0}
+    assert len(_results(output_path)) == 2
+
+
+def test_checkpoint_watermark_and_recovery(tmp_path):
+    input_path, output_path = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    checkpoint = BatchCheckpoint(tmp_path / "ckpt", input_path)
+    # Lines 0-4 read, 1 and 3 still in flight: the watermark stops at the oldest pending line.
+    checkpoint.advance({1, 3}, read_next=5)
+    assert checkpoint.next_line == 1
+    checkpoint.advance(set(), read_next=5)
+    assert checkpoint.next_line == 5
+    checkpoint.save(force=True)
+
+    # Lines finished above the watermark before a crash are recovered from the output file.
+    output_path.write_text('{"line": 2}\n{"line": 6}\n{"line": 7\n', encoding="utf-8")
+    restored = BatchCheckpoint(tmp_path / "ckpt", input_path)
+    restored.load(output_path)
+    assert restored.next_line == 5
+    assert restored.is_done(2) and restored.is_done(6)
+    assert not restored.is_done(7)
+
+
+def test_checkpoint_of_another_input_is_ignored(tmp_path):
+    (tmp_path / "ckpt").write_text(json.dumps({"input": "/elsewhere.jsonl", "next_line": 9}), encoding="utf-8")
+    checkpoint = BatchCheckpoint(tmp_path / "ckpt", tmp_path / "in.jsonl")
+    checkpoint.load(tmp_path / "missing.jsonl")
+    assert checkpoint.next_line == 0
@@ -0,0 +1,115 @@
+import asyncio
+
+import pytest
+
+from Aroma_Agents.utils.file_serving import FileRangeResponse, parse_range
+
+CONTENT = bytes(range(256)) * 4
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-99", (0, 100)),
+    ("bytes=100-", (100, 1024)),
+    ("bytes=-24", (1000, 1024)),
+    ("bytes=-5000", (0, 1024)),
+    ("bytes=1000-5000", (1000, 1024)),
+    ("bytes=0-1,5-9", None),
+    ("items=0-9", None),
+    ("bytes=-", None),
+])
+def test_parse_range(header, expected):
+    assert parse_range(header, 1024) == expected
+
+
+@pytest.mark.parametrize("header", ["bytes=1024-", "bytes=10-5", "bytes=-0"])
+def test_parse_range_unsatisfiable(header):
+    with pytest.raises(ValueError):
+        parse_range(header, 1024)
+
+
+def _serve(path, headers=None, method="GET"):
+    scope = {
+        "type": "http",
+        "method": method,
+        "headers": [(key.encode("latin-1"), value.encode("latin-1")) for key, value in (headers or {}).items()],
+    }
+    messages = []
+
+    async def receive():
+        await asyncio.Event().wait()
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(FileRangeResponse(path, chunk_size=300)(scope, receive, send))
+    start = messages[0]
+    response_headers = {key.decode("latin-1"): value.decode("latin-1") for key, value in start["headers"]}
+    body = b"".join(message.get("body", b"") for message in messages[1:])
+    return start["status"], response_headers, body
+
+
+@pytest.fixture
+def audio_file(tmp_path):
+    path = tmp_path / "clip.wav"
+    path.write_bytes(CONTENT)
+    return path
+
+
+def test_full_response(audio_file):
+    status, headers, body = _serve(audio_file)
+    assert status == 200
+    assert body == CONTENT
+    assert headers["content-length"] == "1024"
+    assert headers["accept-ranges"] == "bytes"
+    assert headers["content-type"].startswith("audio/")
+
+
+def test_range_response(audio_file):
+    status, headers, body = _serve(audio_file, {"range": "bytes=100-499"})
+    assert status == 206
+    assert body == CONTENT[100:500]
+    assert headers["content-range"] == "bytes 100-499/1024"
+    assert headers["content-length"] == "400"
+
+
+def test_unsatisfiable_range(audio_file):
+    status, headers, body = _serve(audio_file, {"range": "bytes=2000-"})
+    assert status == 416
+    assert headers["content-range"] == "bytes */1024"
+    assert body == b""
+
+
+def test_matching_etag_is_not_modified(audio_file):
+    _, headers, _ = _serve(audio_file)
+    status, not_modified_headers, body = _serve(audio_file, {"if-none-match": f'W/{headers["etag"]}'})
+    assert status == 304
+    assert body == b""
+    assert not_modified_headers["etag"] == headers["etag"]
+
+
+def test_unchanged_since_last_modified_is_not_modified(audio_file):
+    _, headers, _ = _serve(audio_file)
+    status, _, _ = _serve(audio_file, {"if-modified-since": headers["last-modified"]})
+    assert status == 304
+
+
+def test_if_range_with_current_validator_sends_the_range(audio_file):
+    _, headers, _ = _serve(audio_file)
+    for validator in (headers["etag"], headers["last-modified"]):
+        status, _, body = _serve(audio_file, {"range": "bytes=0-9", "if-range": validator})
+        assert status == 206
+        assert body == CONTENT[:10]
+
+
+def test_stale_if_range_sends_the_whole_file(audio_file):
+    status, headers, body = _serve(audio_file, {"range": "bytes=0-9", "if-range": '"stale"'})
+    assert status == 200
+    assert body == CONTENT
+    assert "content-range" not in headers
+
+
+def test_head_sends_headers_only(audio_file):
+    status, headers, body = _serve(audio_file, method="HEAD")
+    assert status == 200
+    assert headers["content-length"] == "1024"
+    assert body == b""
@@ -0,0 +1,60 @@
+import pytest
+
+from Aroma_Agents.sub_agents.intent_parser.lexicon import classify_intent
+
+
+def test_mood_and_context():
+    intent, confidence = classify_intent("I'm anxious about my exams")
+    assert intent == {"mood": "anxious", "context": "exams"}
+    assert confidence == 0.95
+
+
+def test_chinese_mood_context_and_preference():
+    intent, _ = classify_intent("最近考试压力好大，睡不着，想用点薰衣草精油")
+    assert intent["mood"] == "stressed"
+    assert intent["context"] == "exams and insomnia"
+    assert "floral scents" in intent["preferences"]
+
+
+def test_longest_cue_wins_over_negation():
+    # "不开心" contains "开心" after a negation; the longer cue reads it as sad, not "not happy".
+    intent, confidence = classify_intent("我最近不开心")
+    assert intent == {"mood": "sad"}
+    assert confidence == 0.85
+
+
+def test_longest_cue_keeps_its_own_label():
+    intent, _ = classify_intent("I'm stressed out")
+    assert intent == {"mood": "stressed"}
+
+
+@pytest.mark.parametrize("text", ["I'm not anxious", "I don't feel tired at all", "我不焦虑"])
+def test_negated_mood_is_not_reported(text):
+    assert classify_intent(text) == (None, 0.0)
+
+
+@pytest.mark.parametrize("text, mood", [("I'm not anxious, just stressed", "stressed"), ("我不焦虑，就是好累", "tired")])
+def test_negation_stops_at_the_clause_and_lowers_confidence(text, mood):
+    intent, confidence = classify_intent(text)
+    assert intent == {"mood": mood}
+    _, plain_confidence = classify_intent(mood)
+    assert confidence == pytest.approx(plain_confidence - 0.25)
+
+
+def test_contrast_lowers_confidence():
+    _, plain = classify_intent("I am sad")
+    intent, confidence = classify_intent("I am sad but okay")
+    assert intent == {"mood": "sad"}
+    assert confidence < plain
+
+
+@pytest.mark.parametrize("text", ["I can't sleep", "睡不着"])
+def test_context_implies_mood(text):
+    intent, confidence = classify_intent(text)
+    assert intent == {"mood": "sleepless", "context": "insomnia"}
+    assert confidence == 0.8
+
+
+@pytest.mark.parametrize("text", ["hello there", "", None])
+def test_unknown_input(text):
+    assert classify_intent(text) == (None, 0.0)